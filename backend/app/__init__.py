@@ -7,13 +7,17 @@ from flask_cors import CORS
 from flask_migrate import Migrate
 from dotenv import load_dotenv
 from app.config import DevelopmentConfig
-from app.utils import get_keycloak_public_keys
+from app.database import configure_engines, engine_options
+from app.db_routing import RoutingSession, replica_router
+from app.keycloak_keys import key_manager
+from app.keycloak_client import keycloak_client
+from app.cache import feed_cache
 
 # Load environment variables
 load_dotenv()
 
 # 🔹 Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={"class_": RoutingSession})  # ✅ Routes read-only requests to replicas
 bcrypt = Bcrypt()
 migrate = Migrate()
 
@@ -25,9 +29,19 @@ def create_app(config_class=DevelopmentConfig):
     CORS(app, resources={r"/api/*": {"origins": "*"}}, supports_credentials=True)
 
     # 🚀 Initialize extensions
+    app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(app.config)  # ✅ Pool tuning for server databases
     db.init_app(app)
+    configure_engines(app, db)  # ✅ WAL + pragmas for SQLite files
+    replica_router.init_app(app)
     bcrypt.init_app(app)
     migrate.init_app(app, db)
+    feed_cache.init_app(app)
+    from app import settings  # ✅ Avoid circular imports
+    settings.init_app(app)  # ✅ Per-user settings snapshot cache
+    from app import identity  # ✅ Avoid circular imports
+    identity.init_app(app)  # ✅ Keycloak ID -> local user cache
+    from app import utils  # ✅ Avoid circular imports
+    utils.init_app(app)  # ✅ Verified JWT cache
 
     # 🔐 Keycloak Configuration (Load from config.py)
     app.config["KEYCLOAK_SERVER_URL"] = config_class.KEYCLOAK_SERVER_URL
@@ -36,14 +50,38 @@ def create_app(config_class=DevelopmentConfig):
     app.config["KEYCLOAK_CLIENT_SECRET"] = config_class.KEYCLOAK_CLIENT_SECRET
     app.config["KEYCLOAK_ISSUER"] = config_class.keycloak_issuer()
     app.config["KEYCLOAK_CERTS_URL"] = config_class.keycloak_certs_url()
+    keycloak_client.init_app(app)
+
+    # ✍️ Opt-in write-behind buffer for likes & reactions
+    from app.write_behind import engagement_buffer
+    engagement_buffer.init_app(app)
+
+    # 🗄 Chat archive (decompressed segment cache)
+    from app import chat_archive
+    chat_archive.init_app(app)
+
+    # 📡 Real-time event bus (GET /api/events)
+    from app.events import event_bus
+    event_bus.init_app(app)
 
     # 📊 Initialize API
     from app.routes import main_api
     api = Api(app, title="YesLove API", version="1.0", doc="/swagger")
     api.add_namespace(main_api, path="/api")
 
-    # 🔐 Fetch Keycloak Public Keys (Runs ONCE at startup)
-    with app.app_context():
-        get_keycloak_public_keys()
+    # 📈 Request, database and Keycloak metrics (GET /metrics)
+    from app.metrics import register_metrics
+    register_metrics(app)
+
+    # 🔎 Slow-query log and header-toggled SQL profiler
+    from app.sql_profiler import register_sql_profiler
+    register_sql_profiler(app)
+
+    # 🛠 Register maintenance CLI commands
+    from app.commands import register_commands
+    register_commands(app)
+
+    # 🔐 Load Keycloak Public Keys (disk snapshot now, network refresh in the background)
+    key_manager.init_app(app)
 
     return app
@@ -97,13 +97,71 @@ def register_models(api):
         "message": fields.String(required=True, description="Message content")
     })
 
-    models["get_messages"] = api.model("GetMessagesRequest", {})
+    models["get_messages"] = api.model("GetMessagesRequest", {
+        "before": fields.Integer(
+            required=False,
+            description="Return messages older than this message id (`before_cursor` of the previous page)"
+        ),
+        "after": fields.Integer(
+            required=False,
+            description="Return messages newer than this message id (`after_cursor` of the previous page)"
+        ),
+        "limit": fields.Integer(
+            required=False,
+            description="Number of messages per page (default 20, max 100)"
+        )
+    })
+
+    models["inbox_query"] = api.model("InboxQuery", {
+        "cursor": fields.String(
+            required=False,
+            description="Opaque cursor returned as `next_cursor` by the previous page"
+        ),
+        "limit": fields.Integer(
+            required=False,
+            description="Number of conversations per page (default 20, max 100)"
+        )
+    })
+
+    models["mark_read"] = api.model("MarkReadRequest", {
+        "message_id": fields.Integer(
+            required=False,
+            description="Last message read (defaults to the latest message in the conversation)"
+        )
+    })
+
+    models["events_query"] = api.model("EventsQuery", {
+        "last_event_id": fields.Integer(
+            required=False,
+            description="Resume after this event id (same as the Last-Event-ID header)"
+        )
+    })
+
+    models["get_comments"] = api.model("GetCommentsRequest", {})
 
     models["profile_request"] = api.model("GetProfileRequest", {})
 
-    models["followers"] = api.model("GetFollowersRequest", {})
+    models["followers"] = api.model("GetFollowersRequest", {
+        "before": fields.Integer(
+            required=False,
+            description="Return followers after this position (`next_cursor` of the previous page)"
+        ),
+        "limit": fields.Integer(
+            required=False,
+            description="Number of users per page (default 20, max 100)"
+        )
+    })
 
-    models["following"] = api.model("GetFollowingRequest", {})
+    models["following"] = api.model("GetFollowingRequest", {
+        "before": fields.Integer(
+            required=False,
+            description="Return followed users after this position (`next_cursor` of the previous page)"
+        ),
+        "limit": fields.Integer(
+            required=False,
+            description="Number of users per page (default 20, max 100)"
+        )
+    })
 
     models["email_notifications"] = api.model("EmailNotificationSettings", {
         "setting_id": fields.String(required=True, description="Unique ID for the setting"),
@@ -133,6 +191,14 @@ def register_models(api):
         "feed_type": fields.String(
             required=False, 
             description="Type of feed: 'all', 'mentions', 'favorites', 'friends', 'groups'"
+        ),
+        "cursor": fields.String(
+            required=False,
+            description="Opaque cursor returned as `next_cursor` by the previous page"
+        ),
+        "limit": fields.Integer(
+            required=False,
+            description="Number of posts per page (default 20, max 100)"
         )
     })
 
@@ -0,0 +1,252 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from app.metrics import metrics
+
+# -------------------------
+# 🔹 In-process LRU Cache (size + TTL bounded)
+# -------------------------
+class LRUCache:
+    """Thread-safe LRU cache where every entry also expires after a TTL (seconds)."""
+
+    def __init__(self, maxsize=1024, ttl=30):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store a value, evicting the least recently used entry when full."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+# -------------------------
+# 🔹 Single-flight Call Coalescing
+# -------------------------
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one, sharing the result with every waiter.
+
+    Results accepted by `cache_if` are kept for `ttl` seconds, so retries that
+    arrive just after the call finished are absorbed too.
+    """
+
+    def __init__(self, ttl=5, maxsize=1024):
+        self._results = LRUCache(maxsize=maxsize, ttl=ttl)
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn, cache_if=lambda result: True):
+        """Return `fn()`, running it at most once at a time per key."""
+        result = self._results.get(key)
+        if result is not None:
+            return result
+
+        with self._lock:
+            result = self._results.get(key)  # ✅ Re-check: a leader may have just finished
+            if result is not None:
+                return result
+            call = self._inflight.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._inflight[key] = _Call()
+
+        if is_leader:
+            try:
+                call.result = fn()
+                if cache_if(call.result):
+                    self._results.set(key, call.result)
+            except Exception as e:
+                call.error = e
+            finally:
+                with self._lock:
+                    del self._inflight[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+# -------------------------
+# 🔹 Shared Cache Tier
+# -------------------------
+class LocalSharedCache:
+    """In-process stand-in for a shared cache tier (Redis, Memcached, ...).
+
+    A real backend only needs the same `get` / `set` / `delete` / `incr` methods;
+    it is used for development, tests and single-worker deployments.
+    """
+
+    def __init__(self, maxsize=100_000):
+        self._cache = LRUCache(maxsize=maxsize, ttl=float("inf"))
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        return self._cache.get(key)
+
+    def set(self, key, value, ttl=None):
+        self._cache.set(key, value, ttl=ttl)
+
+    def delete(self, key):
+        self._cache.delete(key)
+
+    def incr(self, key):
+        """Atomically increment an integer counter and return the new value."""
+        with self._lock:
+            value = (self._cache.get(key) or 0) + 1
+            self._cache.set(key, value, ttl=float("inf"))
+            return value
+
+
+SHARED_CACHE_BACKENDS = {
+    "local": LocalSharedCache,
+}
+
+
+# -------------------------
+# 🔹 Per-user Feed Response Cache
+# -------------------------
+class FeedCache:
+    """Two-tier cache of feed pages keyed by (user id, feed_type, cursor, limit).
+
+    Invalidation is event-driven: write paths bump a per-user version, which
+    changes every key for that user, so stale pages are never served and simply
+    age out of the LRU. `get` returns the versioned key it looked up and `set`
+    stores under that key, so a page read before an invalidation can never be
+    stored as current. Versions live in the shared tier when one is configured,
+    so an invalidation on one worker is seen by all of them.
+    """
+
+    def __init__(self):
+        self.enabled = False
+        self.local = LRUCache()
+        self.shared = None
+        self._versions = LRUCache()
+        self._version_ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self.local_hits = self.shared_hits = self.misses = 0
+
+    def init_app(self, app):
+        """Configure tiers from FEED_CACHE_* settings."""
+        self.enabled = app.config.get("FEED_CACHE_ENABLED", True)
+        self.local = LRUCache(
+            maxsize=app.config.get("FEED_CACHE_MAX_ENTRIES", 2048),
+            ttl=app.config.get("FEED_CACHE_TTL", 30),
+        )
+        backend = app.config.get("FEED_CACHE_SHARED_BACKEND")
+        self.shared = SHARED_CACHE_BACKENDS[backend]() if backend else None
+        # ✅ Bounded: a forgotten version is replaced by a never-used one, which only costs a miss
+        self._versions = LRUCache(maxsize=app.config.get("FEED_CACHE_MAX_VERSIONS", 100_000), ttl=float("inf"))
+        self.local_hits = self.shared_hits = self.misses = 0
+
+    def _version(self, user_id):
+        if self.shared is not None:
+            return self.shared.get(f"feed_version:{user_id}") or 0
+        with self._lock:
+            version = self._versions.get(user_id)
+            if version is None:
+                version = next(self._version_ids)
+                self._versions.set(user_id, version)
+            return version
+
+    def _key(self, user_id, feed_type, cursor, limit):
+        return f"feed:{user_id}:v{self._version(user_id)}:{feed_type}:{cursor or ''}:{limit}"
+
+    def get(self, user_id, feed_type, cursor, limit):
+        """Return `(key, page)`: the page is None on a miss; pass `key` to `set` after reading the DB."""
+        if not self.enabled:
+            return None, None
+        key = self._key(user_id, feed_type, cursor, limit)
+
+        value = self.local.get(key)
+        if value is not None:
+            self._count(local_hit=True)
+            return key, value
+
+        if self.shared is not None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.local.set(key, value)  # ✅ Promote to the local tier
+                self._count(shared_hit=True)
+                return key, value
+
+        self._count()
+        return key, None
+
+    def set(self, key, value):
+        """Store a feed page in every tier under the key `get` returned (read-time version)."""
+        if not self.enabled or key is None:
+            return
+        self.local.set(key, value)
+        if self.shared is not None:
+            self.shared.set(key, value, ttl=self.local.ttl)  # ✅ FEED_CACHE_TTL bounds staleness in both tiers
+
+    def invalidate(self, *user_ids):
+        """Drop every cached feed page for the given users."""
+        if not self.enabled:
+            return
+        for user_id in set(user_ids):
+            if self.shared is not None:
+                self.shared.incr(f"feed_version:{user_id}")
+            else:
+                with self._lock:
+                    self._versions.set(user_id, next(self._version_ids))
+
+    def _count(self, local_hit=False, shared_hit=False):
+        with self._lock:
+            self.local_hits += local_hit
+            self.shared_hits += shared_hit
+            self.misses += not (local_hit or shared_hit)
+
+    def lookup_counts(self):
+        """Lookup counters by result, for /metrics."""
+        return {
+            (("result", "local_hit"),): self.local_hits,
+            (("result", "shared_hit"),): self.shared_hits,
+            (("result", "miss"),): self.misses,
+        }
+
+
+feed_cache = FeedCache()
+metrics.collector("yeslove_feed_cache_lookups_total", "counter", "Feed cache lookups by result.", feed_cache.lookup_counts)
+metrics.collector("yeslove_feed_cache_entries", "gauge", "Feed pages held in this worker's local cache tier.",
+                  lambda: {(): len(feed_cache.local)})
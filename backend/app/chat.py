@@ -0,0 +1,183 @@
+from datetime import datetime
+from sqlalchemy import case, func, insert, or_, select, update
+from app.models import User, Conversation, ConversationMember, Chat, db
+from app.pagination import keyset_query, split_page
+from app.toggles import insert_ignore
+from app.chat_archive import read_archive
+
+# -------------------------
+# 🔹 Conversations & Message History
+# -------------------------
+# Every pair of users shares one `conversation` row keyed by
+# (low_user_id, high_user_id), and each message carries its conversation id.
+# History is read in pages of (conversation_id, id) ranges, so a poll costs
+# O(page) however long the chat has been going.
+#
+# Each participant also has a `conversation_member` row (their inbox entry)
+# with the time of the last message and an unread counter. SendMessage
+# updates both rows and the conversation's last-message preview in place, so
+# the inbox is one index range scan however many messages exist.
+
+PREVIEW_LENGTH = 100
+
+
+def conversation_key(user_id, other_id):
+    """Canonical (low_user_id, high_user_id) key of the conversation between two users."""
+    return (user_id, other_id) if user_id < other_id else (other_id, user_id)
+
+
+def find_conversation(user_id, other_id):
+    """`(id, archived_through_id)` of the conversation between two users, or None if they never wrote to each other."""
+    low_user_id, high_user_id = conversation_key(user_id, other_id)
+    return db.session.execute(
+        select(Conversation.id, Conversation.archived_through_id)
+        .where(Conversation.low_user_id == low_user_id, Conversation.high_user_id == high_user_id)
+    ).first()
+
+
+def find_conversation_id(user_id, other_id):
+    """Id of the conversation between two users, or None if they never wrote to each other."""
+    conversation = find_conversation(user_id, other_id)
+    return conversation.id if conversation is not None else None
+
+
+def get_or_create_conversation_id(user_id, other_id):
+    """Id of the conversation between two users, created on first message (safe under concurrent sends)."""
+    low_user_id, high_user_id = conversation_key(user_id, other_id)
+    created = insert_ignore(Conversation, low_user_id=low_user_id, high_user_id=high_user_id)
+    conversation_id = find_conversation_id(user_id, other_id)
+    if created:
+        now = datetime.utcnow()
+        db.session.execute(insert(ConversationMember), [
+            {"user_id": member_id, "conversation_id": conversation_id, "last_message_at": now}
+            for member_id in (low_user_id, high_user_id)
+        ])
+    return conversation_id
+
+
+def record_message(message):
+    """Update the conversation's preview and both inbox entries for a new (flushed) message."""
+    db.session.execute(
+        update(Conversation).where(Conversation.id == message.conversation_id).values(
+            last_message_id=message.id,
+            last_sender_id=message.sender_id,
+            last_message_preview=message.message[:PREVIEW_LENGTH],
+            last_message_at=message.timestamp,
+        )
+    )
+    members = (ConversationMember.conversation_id == message.conversation_id)
+    db.session.execute(
+        update(ConversationMember).where(members, ConversationMember.user_id == message.receiver_id).values(
+            last_message_at=message.timestamp,
+            unread_count=ConversationMember.unread_count + 1,  # ✅ Atomic increment, safe under concurrent sends
+        )
+    )
+    db.session.execute(
+        update(ConversationMember).where(members, ConversationMember.user_id == message.sender_id).values(
+            last_message_at=message.timestamp,
+            unread_count=0,  # ✅ Replying means the sender has seen the thread
+            last_read_message_id=message.id,
+        )
+    )
+
+
+def inbox_query(user_id, cursor=None, limit=20):
+    """One page of a user's inbox rows joined with the conversation and the other participant."""
+    other_user_id = case(
+        (Conversation.low_user_id == user_id, Conversation.high_user_id), else_=Conversation.low_user_id
+    )
+    query = (
+        db.session.query(
+            ConversationMember.conversation_id,
+            ConversationMember.last_message_at,
+            ConversationMember.unread_count,
+            Conversation.last_message_id,
+            Conversation.last_sender_id,
+            Conversation.last_message_preview,
+            User.id.label("user_id"),
+            User.username,
+            User.profile_pic,
+        )
+        .join(Conversation, Conversation.id == ConversationMember.conversation_id)
+        .join(User, User.id == other_user_id)  # ✅ The other participant, in the same query
+        .filter(ConversationMember.user_id == user_id)
+    )
+    return keyset_query(query, ConversationMember.last_message_at, ConversationMember.conversation_id, cursor=cursor, limit=limit)
+
+
+def read_inbox(user_id, cursor=None, limit=20):
+    """Return one page of a user's conversations, most recent activity first, as `(rows, next_cursor)`."""
+    return split_page(inbox_query(user_id, cursor=cursor, limit=limit).all(), limit, "last_message_at", "conversation_id")
+
+
+def mark_read(user_id, conversation_id, message_id=None):
+    """Move the user's read marker up to `message_id` (default: the latest message) and recount unread.
+
+    Counting the hot `chat` table is enough: the archive job never moves a
+    message its receiver has not read.
+    Returns the new unread count, or None if the user is not in the conversation.
+    """
+    if message_id is None:
+        message_id = db.session.execute(
+            select(Conversation.last_message_id).where(Conversation.id == conversation_id)
+        ).scalar() or 0
+
+    # ✅ Recounted in the same statement, so a message arriving meanwhile stays unread
+    unread = (
+        select(func.count(Chat.id))
+        .where(Chat.conversation_id == conversation_id, Chat.id > message_id, Chat.sender_id != user_id)
+        .scalar_subquery()
+    )
+    member = (ConversationMember.user_id == user_id, ConversationMember.conversation_id == conversation_id)
+    db.session.execute(
+        update(ConversationMember)
+        .where(*member, or_(ConversationMember.last_read_message_id.is_(None), ConversationMember.last_read_message_id < message_id))
+        .values(last_read_message_id=message_id, unread_count=unread)
+    )
+    return db.session.execute(select(ConversationMember.unread_count).where(*member)).scalar()
+
+
+def messages_page_query(conversation_id, before=None, after=None, limit=20):
+    """SELECT of one page of a conversation (one extra row to detect more).
+
+    Newest-first below `before` (or from the end), oldest-first above `after`.
+    """
+    stmt = select(Chat).where(Chat.conversation_id == conversation_id)
+    if after is not None:
+        return stmt.where(Chat.id > after).order_by(Chat.id.asc()).limit(limit + 1)
+    if before is not None:
+        stmt = stmt.where(Chat.id < before)
+    return stmt.order_by(Chat.id.desc()).limit(limit + 1)
+
+
+def read_messages(conversation_id, before=None, after=None, limit=20, archived_through_id=None):
+    """Return one page of messages, oldest first, as `(messages, before_cursor, after_cursor)`.
+
+    Pass `before_cursor` back as `before` to scroll up (None when there is nothing
+    older) and `after_cursor` as `after` to poll for new messages. Messages up to
+    `archived_through_id` are read from the chat archive.
+    """
+    if archived_through_id is not None and after is not None and after < archived_through_id:
+        # ✅ Resuming from inside the archived range: archive first, then the hot table
+        rows = read_archive(conversation_id, archived_through_id, after=after, limit=limit + 1)
+        if len(rows) <= limit:
+            hot_after = max(after, archived_through_id)
+            rows += db.session.execute(messages_page_query(conversation_id, after=hot_after, limit=limit - len(rows))).scalars().all()
+    else:
+        rows = db.session.execute(messages_page_query(conversation_id, before=before, after=after, limit=limit)).scalars().all()
+        if archived_through_id is not None and after is None and len(rows) <= limit:
+            # ✅ Reached the start of the hot history: continue into the archive
+            older_than = min(before or archived_through_id + 1, archived_through_id + 1)
+            rows += read_archive(conversation_id, archived_through_id, before=older_than, limit=limit + 1 - len(rows))
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    if after is not None:
+        before_cursor = rows[0].id if rows else None
+        after_cursor = rows[-1].id if rows else after
+    else:
+        rows.reverse()  # ✅ Fetched newest-first, shown oldest-first
+        before_cursor = rows[0].id if has_more else None
+        after_cursor = rows[-1].id if rows else before
+    return rows, before_cursor, after_cursor
@@ -0,0 +1,160 @@
+import json
+import zlib
+from collections import namedtuple
+from datetime import datetime, timedelta
+from itertools import takewhile
+from sqlalchemy import delete, select, update
+from app.models import Conversation, ConversationMember, Chat, ChatArchiveSegment, db
+from app.cache import LRUCache
+from app.toggles import insert_ignore
+from app.logging_setup import logger
+
+# -------------------------
+# 🔹 Chat Archive (cold tier)
+# -------------------------
+# `flask archive-messages` moves messages older than ARCHIVE_AFTER_DAYS out of
+# the `chat` table into append-only, zlib-compressed segments of up to
+# ARCHIVE_SEGMENT_SIZE messages per conversation, stored in the "archive" bind
+# (ARCHIVE_DATABASE_URL). Each conversation remembers the last archived
+# message id (`archived_through_id`), so the hot table only holds newer
+# messages, and GetMessages continues into the archive when a page reaches
+# the start of the hot history. Segments are immutable, so decompressed ones
+# are cached per worker.
+#
+# Only messages their receiver has already read are archived, so everything
+# still unread stays in the hot table and `mark_read` can recount from it alone.
+
+ArchivedMessage = namedtuple("ArchivedMessage", ["id", "conversation_id", "sender_id", "receiver_id", "message", "timestamp"])
+
+segment_cache = LRUCache(maxsize=256, ttl=600)
+
+
+def init_app(app):
+    """Size the decompressed-segment cache from ARCHIVE_SEGMENT_CACHE_SIZE."""
+    global segment_cache
+    segment_cache = LRUCache(maxsize=app.config.get("ARCHIVE_SEGMENT_CACHE_SIZE", 256), ttl=600)
+
+
+def pack_messages(messages):
+    """Compress messages (oldest first) into a segment payload."""
+    rows = [[m.id, m.sender_id, m.receiver_id, m.message, m.timestamp.isoformat()] for m in messages]
+    return zlib.compress(json.dumps(rows, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack_messages(conversation_id, payload):
+    """Decompress a segment payload into ArchivedMessage tuples, oldest first."""
+    return [
+        ArchivedMessage(message_id, conversation_id, sender_id, receiver_id, message, datetime.fromisoformat(timestamp))
+        for message_id, sender_id, receiver_id, message, timestamp in json.loads(zlib.decompress(payload))
+    ]
+
+
+def _segment_messages(segment_id, conversation_id):
+    messages = segment_cache.get(segment_id)
+    if messages is None:
+        payload = db.session.execute(select(ChatArchiveSegment.payload).where(ChatArchiveSegment.id == segment_id)).scalar()
+        messages = unpack_messages(conversation_id, payload)
+        segment_cache.set(segment_id, messages)
+    return messages
+
+
+# -------------------------
+# Reads
+# -------------------------
+def read_archive(conversation_id, archived_through_id, before=None, after=None, limit=20):
+    """Up to `limit` archived messages: newest-first below `before`, or oldest-first above `after`."""
+    query = select(ChatArchiveSegment.id).where(
+        ChatArchiveSegment.conversation_id == conversation_id,
+        ChatArchiveSegment.first_message_id <= archived_through_id,  # ✅ Ignore segments an interrupted run left behind
+    )
+    if after is not None:
+        query = query.where(ChatArchiveSegment.last_message_id > after).order_by(ChatArchiveSegment.first_message_id.asc())
+        keep = lambda m: m.id > after and m.id <= archived_through_id
+    else:
+        if before is not None:
+            query = query.where(ChatArchiveSegment.first_message_id < before)
+        query = query.order_by(ChatArchiveSegment.first_message_id.desc())
+        keep = lambda m: (before is None or m.id < before) and m.id <= archived_through_id
+
+    messages = []
+    for segment_id in db.session.execute(query).scalars():
+        segment = [m for m in _segment_messages(segment_id, conversation_id) if keep(m)]
+        messages += segment if after is not None else reversed(segment)
+        if len(messages) >= limit:
+            break
+    return messages[:limit]
+
+
+# -------------------------
+# Archiving
+# -------------------------
+def _archive_segment(conversation_id, cutoff, segment_size):
+    """Archive the conversation's oldest hot messages (up to one segment). Returns how many moved."""
+    oldest = db.session.execute(
+        select(Chat).where(Chat.conversation_id == conversation_id).order_by(Chat.id.asc()).limit(segment_size)
+    ).scalars().all()
+    read_through = dict(db.session.execute(
+        select(ConversationMember.user_id, ConversationMember.last_read_message_id)
+        .where(ConversationMember.conversation_id == conversation_id)
+    ).all())
+    messages = list(takewhile(
+        lambda m: m.timestamp is not None and m.timestamp < cutoff and (read_through.get(m.receiver_id) or 0) >= m.id,
+        oldest,
+    ))  # ✅ Stops at the first message still unread by its receiver
+    if not messages:
+        return 0
+
+    # ✅ Write the segment first and commit it; only then trim the hot table
+    inserted = insert_ignore(
+        ChatArchiveSegment,
+        conversation_id=conversation_id,
+        first_message_id=messages[0].id,
+        last_message_id=messages[-1].id,
+        message_count=len(messages),
+        payload=pack_messages(messages),
+        created_at=datetime.utcnow(),
+    )
+    last_message_id = messages[-1].id
+    if not inserted:
+        # ✅ A previous run archived this segment but stopped before trimming: trim exactly what it holds
+        last_message_id = db.session.execute(
+            select(ChatArchiveSegment.last_message_id).where(
+                ChatArchiveSegment.conversation_id == conversation_id,
+                ChatArchiveSegment.first_message_id == messages[0].id,
+            )
+        ).scalar()
+    db.session.commit()
+
+    moved = db.session.execute(
+        delete(Chat).where(Chat.conversation_id == conversation_id, Chat.id <= last_message_id)
+    ).rowcount
+    db.session.execute(
+        update(Conversation).where(Conversation.id == conversation_id).values(archived_through_id=last_message_id)
+    )
+    db.session.commit()
+    return moved
+
+
+def archive_messages(older_than_days, segment_size=500, batch_size=500):
+    """Move messages older than `older_than_days` into archive segments. Returns the number moved."""
+    db.create_all(bind_key="archive")  # ✅ The archive database is not under migrations
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+
+    moved = 0
+    last_conversation_id = 0
+    while True:
+        conversation_ids = db.session.execute(
+            select(Conversation.id).where(Conversation.id > last_conversation_id).order_by(Conversation.id).limit(batch_size)
+        ).scalars().all()
+        if not conversation_ids:
+            break
+        for conversation_id in conversation_ids:
+            while True:
+                count = _archive_segment(conversation_id, cutoff, segment_size)
+                moved += count
+                if count < segment_size:
+                    break
+        last_conversation_id = conversation_ids[-1]
+        db.session.expunge_all()  # ✅ Keep memory flat across batches
+    logger.info("✅ Archived %s chat messages older than %s", moved, cutoff.isoformat())
+    return moved
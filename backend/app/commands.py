@@ -0,0 +1,66 @@
+import click
+
+# -------------------------
+# 🔹 Flask CLI Maintenance Commands
+# -------------------------
+
+@click.command("rebuild-timelines")
+def rebuild_timelines_command():
+    """Rebuild every user's materialized home timeline from the follow graph."""
+    from app.timeline import rebuild_timelines  # ✅ Avoid circular imports
+    click.echo(f"✅ Rebuilt {rebuild_timelines()} timelines.")
+
+
+@click.command("repair-counters")
+def repair_counters_command():
+    """Recompute like, comment, reaction and follow counters from the source tables."""
+    from app.counters import recompute_counters  # ✅ Avoid circular imports
+    recompute_counters()
+    click.echo("✅ Counters recomputed.")
+
+
+@click.command("backfill-mentions")
+@click.option("--chunk-size", default=500, show_default=True, help="Rows read per batch.")
+def backfill_mentions_command(chunk_size):
+    """Rebuild the @mention index from existing posts and comments."""
+    from app.mentions import backfill_mentions  # ✅ Avoid circular imports
+    click.echo(f"✅ Scanned {backfill_mentions(chunk_size=chunk_size)} posts and comments.")
+
+
+@click.command("archive-messages")
+@click.option("--older-than-days", type=int, default=None, help="Defaults to ARCHIVE_AFTER_DAYS.")
+def archive_messages_command(older_than_days):
+    """Move old chat messages into compressed segments in the archive database."""
+    from flask import current_app
+    from app.chat_archive import archive_messages  # ✅ Avoid circular imports
+    moved = archive_messages(
+        older_than_days if older_than_days is not None else current_app.config["ARCHIVE_AFTER_DAYS"],
+        segment_size=current_app.config["ARCHIVE_SEGMENT_SIZE"],
+    )
+    click.echo(f"✅ Archived {moved} messages.")
+
+
+@click.command("check-query-plans")
+@click.option("--verbose", "-v", is_flag=True, help="Print every plan, not just the failing ones.")
+def check_query_plans_command(verbose):
+    """EXPLAIN the hot queries and fail if any needs a full scan or a sort."""
+    from app.query_plans import check_query_plans  # ✅ Avoid circular imports
+    failed = 0
+    for name, (plan, problems) in check_query_plans().items():
+        click.echo(f"{'❌' if problems else '✅'} {name}")
+        if problems or verbose:
+            for line in plan:
+                click.echo(f"      {line}")
+        failed += bool(problems)
+    if failed:
+        raise click.ClickException(f"{failed} hot queries fall back to a full scan or a sort.")
+    click.echo("✅ All hot queries use index-ordered range scans.")
+
+
+def register_commands(app):
+    """Attach maintenance commands to `flask <command>`."""
+    app.cli.add_command(rebuild_timelines_command)
+    app.cli.add_command(repair_counters_command)
+    app.cli.add_command(backfill_mentions_command)
+    app.cli.add_command(archive_messages_command)
+    app.cli.add_command(check_query_plans_command)
@@ -11,12 +11,106 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY') or 'default_secret_key'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
 
+    # Database Engine Configuration (pool settings apply to server databases, pragmas to SQLite files)
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 10))  # Persistent connections per worker
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", 20))  # Extra connections allowed under burst
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", 30))  # Seconds to wait for a free connection
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", 1800))  # Seconds; replace connections before server-side idle kills
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"  # Detect dead connections on checkout
+    SQLITE_WAL = os.getenv("SQLITE_WAL", "true").lower() == "true"  # journal_mode=WAL
+    SQLITE_SYNCHRONOUS = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")  # NORMAL is durable enough under WAL
+    SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", 5000))  # Wait this long for the write lock
+    SQLITE_CACHE_SIZE_KB = int(os.getenv("SQLITE_CACHE_SIZE_KB", 20000))  # Page cache per connection
+    SQLITE_MMAP_SIZE = int(os.getenv("SQLITE_MMAP_SIZE", 268435456))  # Bytes of the file to memory-map (0 = off)
+
+    # Database Binds (read replicas + chat archive)
+    ARCHIVE_DATABASE_URL = os.getenv("ARCHIVE_DATABASE_URL", "sqlite:///chat_archive.db")  # Archived chat segments; a separate database
+    SQLALCHEMY_BINDS = {
+        "archive": ARCHIVE_DATABASE_URL,
+        **{
+            f"replica_{i}": url.strip()
+            for i, url in enumerate(filter(None, os.getenv("DATABASE_REPLICA_URLS", "").split(",")))
+        },  # Comma-separated replica URLs; empty = everything on the primary
+    }
+    DB_REPLICA_STICKY_SECONDS = int(os.getenv("DB_REPLICA_STICKY_SECONDS", 5))  # Reads stay on the primary after a user's write
+
     # Upload Folder Configuration
     BASE_DIR = os.path.abspath(os.path.dirname(__file__))  # Base directory of the project
     UPLOAD_FOLDER = os.path.join(BASE_DIR, 'static', 'uploads')  # Absolute path to upload folder
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # Maximum file size: 16MB
     ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif'}  # Allowed file types
 
+    # Home Timeline (fan-out-on-write) Configuration
+    TIMELINE_FANOUT_MAX_FOLLOWERS = int(os.getenv("TIMELINE_FANOUT_MAX_FOLLOWERS", 5000))  # Above this, followers pull at read time
+    TIMELINE_FANOUT_BATCH_SIZE = int(os.getenv("TIMELINE_FANOUT_BATCH_SIZE", 500))  # Timeline rows inserted per statement
+    TIMELINE_BACKFILL_LIMIT = int(os.getenv("TIMELINE_BACKFILL_LIMIT", 200))  # Posts copied into a timeline on follow
+
+    # Feed Response Cache Configuration
+    FEED_CACHE_ENABLED = os.getenv("FEED_CACHE_ENABLED", "true").lower() == "true"
+    FEED_CACHE_MAX_ENTRIES = int(os.getenv("FEED_CACHE_MAX_ENTRIES", 2048))  # In-process LRU size
+    FEED_CACHE_TTL = int(os.getenv("FEED_CACHE_TTL", 30))  # Seconds; bounds staleness for pages not explicitly invalidated
+    FEED_CACHE_MAX_VERSIONS = int(os.getenv("FEED_CACHE_MAX_VERSIONS", 100_000))  # Per-user versions kept without a shared tier
+    FEED_CACHE_SHARED_BACKEND = os.getenv("FEED_CACHE_SHARED_BACKEND", "")  # "" (off) or "local"
+
+    # Settings Snapshot Cache Configuration
+    SETTINGS_CACHE_MAX_ENTRIES = int(os.getenv("SETTINGS_CACHE_MAX_ENTRIES", 10000))  # In-process LRU size
+    SETTINGS_CACHE_SHARED_BACKEND = os.getenv("SETTINGS_CACHE_SHARED_BACKEND", FEED_CACHE_SHARED_BACKEND)  # Where versions live; "" = per process
+    SETTINGS_CACHE_TTL = int(os.getenv("SETTINGS_CACHE_TTL", 600))  # Seconds, with a shared tier (invalidation reaches every worker)
+    SETTINGS_CACHE_LOCAL_TTL = int(os.getenv("SETTINGS_CACHE_LOCAL_TTL", 5))  # Seconds, without one: other workers are stale at most this long
+
+    # Identity Resolution Cache Configuration
+    IDENTITY_CACHE_MAX_ENTRIES = int(os.getenv("IDENTITY_CACHE_MAX_ENTRIES", 10000))  # In-process LRU size
+    IDENTITY_CACHE_SHARED_BACKEND = os.getenv("IDENTITY_CACHE_SHARED_BACKEND", FEED_CACHE_SHARED_BACKEND)  # Where versions live; "" = per process
+    IDENTITY_CACHE_TTL = int(os.getenv("IDENTITY_CACHE_TTL", 300))  # Seconds, with a shared tier (invalidation reaches every worker)
+    IDENTITY_CACHE_LOCAL_TTL = int(os.getenv("IDENTITY_CACHE_LOCAL_TTL", 5))  # Seconds, without one: other workers resolve a deleted user at most this long
+
+    # Verified JWT Cache Configuration
+    JWT_CACHE_MAX_ENTRIES = int(os.getenv("JWT_CACHE_MAX_ENTRIES", 10000))  # Verified tokens kept until their exp
+
+    # Keycloak Public Key (JWKS) Configuration
+    JWKS_REFRESH_INTERVAL = int(os.getenv("JWKS_REFRESH_INTERVAL", 300))  # Seconds between background refreshes (0 = off)
+    JWKS_MIN_REFETCH_INTERVAL = int(os.getenv("JWKS_MIN_REFETCH_INTERVAL", 10))  # Throttle for unknown-`kid` refetches
+    JWKS_FETCH_TIMEOUT = int(os.getenv("JWKS_FETCH_TIMEOUT", 5))  # Seconds
+    JWKS_SNAPSHOT_PATH = os.getenv("JWKS_SNAPSHOT_PATH")  # Defaults to <instance>/keycloak_jwks.json
+
+    # Keycloak HTTP Client Configuration
+    KEYCLOAK_POOL_SIZE = int(os.getenv("KEYCLOAK_POOL_SIZE", 10))  # Keep-alive connections per worker
+    KEYCLOAK_MAX_RETRIES = int(os.getenv("KEYCLOAK_MAX_RETRIES", 2))  # Idempotent calls only
+    KEYCLOAK_RETRY_BACKOFF = float(os.getenv("KEYCLOAK_RETRY_BACKOFF", 0.2))  # Seconds, full jitter
+    KEYCLOAK_BREAKER_THRESHOLD = int(os.getenv("KEYCLOAK_BREAKER_THRESHOLD", 5))  # Consecutive failures to open
+    KEYCLOAK_BREAKER_COOLDOWN = int(os.getenv("KEYCLOAK_BREAKER_COOLDOWN", 30))  # Seconds before a trial call
+    REFRESH_TOKEN_COALESCE_WINDOW = int(os.getenv("REFRESH_TOKEN_COALESCE_WINDOW", 5))  # Seconds a refresh result is reused
+
+    # Write-behind Buffer Configuration (LikePost / ReactToPost)
+    WRITE_BEHIND_ENABLED = os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true"  # Acknowledge first, write in batches
+    WRITE_BEHIND_FLUSH_INTERVAL = float(os.getenv("WRITE_BEHIND_FLUSH_INTERVAL", 0.5))  # Seconds between batch writes
+    WRITE_BEHIND_BATCH_SIZE = int(os.getenv("WRITE_BEHIND_BATCH_SIZE", 500))  # Events per transaction; also triggers an early flush
+    WRITE_BEHIND_MAX_PENDING = int(os.getenv("WRITE_BEHIND_MAX_PENDING", 10000))  # Beyond this, new events wait (backpressure)
+    WRITE_BEHIND_MAX_RETRIES = int(os.getenv("WRITE_BEHIND_MAX_RETRIES", 3))  # Failed flushes before an event is dropped
+
+    # Chat Archive Configuration (flask archive-messages)
+    ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS", 180))  # Messages older than this move to the archive database
+    ARCHIVE_SEGMENT_SIZE = int(os.getenv("ARCHIVE_SEGMENT_SIZE", 500))  # Messages per compressed segment
+    ARCHIVE_SEGMENT_CACHE_SIZE = int(os.getenv("ARCHIVE_SEGMENT_CACHE_SIZE", 256))  # Decompressed segments kept per worker
+
+    # Real-time Events Configuration (GET /api/events)
+    EVENT_BUS_BACKEND = os.getenv("EVENT_BUS_BACKEND", "app.events.InProcessBus")  # Swap for a broker-backed bus on multi-node deployments
+    EVENTS_REPLAY_SIZE = int(os.getenv("EVENTS_REPLAY_SIZE", 200))  # Recent events kept per user for Last-Event-ID resume
+    EVENTS_REPLAY_SECONDS = int(os.getenv("EVENTS_REPLAY_SECONDS", 3600))  # A user's replay buffer expires after this idle time
+    EVENTS_REPLAY_MAX_USERS = int(os.getenv("EVENTS_REPLAY_MAX_USERS", 100000))  # Replay buffers kept per worker (LRU)
+    EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", 1000))  # Undelivered events per connection before it is dropped
+    EVENTS_HEARTBEAT_SECONDS = int(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15))  # Keep-alive comment interval
+    EVENTS_MAX_STREAM_SECONDS = int(os.getenv("EVENTS_MAX_STREAM_SECONDS", 300))  # Streams end after this; clients resume (and re-authenticate)
+
+    # Metrics Configuration
+    METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"  # Exposes Prometheus text at GET /metrics
+
+    # SQL Profiler Configuration
+    SQL_PROFILER_ENABLED = os.getenv("SQL_PROFILER_ENABLED", "false").lower() == "true"  # Staging only: honour the header below
+    SQL_PROFILER_HEADER = os.getenv("SQL_PROFILER_HEADER", "X-Profile-SQL")  # Send "X-Profile-SQL: 1" to profile a request
+    SQL_N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", 5))  # Repeats of one statement shape to flag
+    SQL_SLOW_QUERY_MS = int(os.getenv("SQL_SLOW_QUERY_MS", 200))  # Statements slower than this go to slow_queries.log (0 = off)
+
 class DevelopmentConfig(Config):
     """Development Configuration"""
     DEBUG = True
@@ -0,0 +1,71 @@
+from sqlalchemy import func, insert, select, update
+from app.models import User, Post, Comment, Like, Follow, Reaction, PostReactionCount, db
+from app.database import upsert_insert
+from app.logging_setup import logger
+
+# -------------------------
+# 🔹 Denormalized Engagement Counters
+# -------------------------
+# Counters are changed with `SET col = col + delta` in the same transaction as
+# the row they count, so concurrent requests never lose an update and readers
+# never have to load the underlying Like / Comment / Follow rows.
+
+
+def bump_post_counter(post_id, column, delta):
+    """Atomically add `delta` to a Post counter column (e.g. Post.like_count)."""
+    Post.query.filter_by(id=post_id).update({column: column + delta}, synchronize_session=False)
+
+
+def bump_reaction_count(post_id, reaction_type, delta):
+    """Atomically add `delta` to a post's count for one reaction type."""
+    stmt = upsert_insert(db.session, PostReactionCount)
+    if stmt is not None and delta > 0:
+        # ✅ One statement, no insert race when two users add the first reaction of a type
+        stmt = stmt.values(post_id=post_id, reaction_type=reaction_type, count=delta)
+        db.session.execute(stmt.on_conflict_do_update(
+            index_elements=[PostReactionCount.post_id, PostReactionCount.reaction_type],
+            set_={"count": PostReactionCount.count + delta},
+        ))
+        return
+
+    updated = PostReactionCount.query.filter_by(post_id=post_id, reaction_type=reaction_type).update(
+        {PostReactionCount.count: PostReactionCount.count + delta}, synchronize_session=False
+    )
+    if not updated and delta > 0:
+        db.session.add(PostReactionCount(post_id=post_id, reaction_type=reaction_type, count=delta))
+
+
+def bump_follow_counts(follower_id, followed_id, delta):
+    """Atomically adjust following_count on the follower and follower_count on the followed user."""
+    User.query.filter_by(id=follower_id).update(
+        {User.following_count: User.following_count + delta}, synchronize_session=False
+    )
+    User.query.filter_by(id=followed_id).update(
+        {User.follower_count: User.follower_count + delta}, synchronize_session=False
+    )
+
+
+def reaction_summary(post):
+    """Return a {reaction_type: count} dict for a post, skipping zero counts."""
+    return {row.reaction_type: row.count for row in post.reaction_counts if row.count > 0}
+
+
+def recompute_counters():
+    """Recompute every denormalized counter from the source tables in bulk statements."""
+    db.session.execute(update(Post).values(
+        like_count=select(func.count(Like.id)).where(Like.post_id == Post.id).scalar_subquery(),
+        comment_count=select(func.count(Comment.id)).where(Comment.post_id == Post.id).scalar_subquery(),
+    ))
+    db.session.execute(update(User).values(
+        follower_count=select(func.count(Follow.id)).where(Follow.followed_id == User.id).scalar_subquery(),
+        following_count=select(func.count(Follow.id)).where(Follow.follower_id == User.id).scalar_subquery(),
+    ))
+
+    db.session.execute(PostReactionCount.__table__.delete())
+    db.session.execute(insert(PostReactionCount).from_select(
+        ["post_id", "reaction_type", "count"],
+        select(Reaction.post_id, Reaction.reaction_type, func.count(Reaction.id))
+        .group_by(Reaction.post_id, Reaction.reaction_type)
+    ))
+    db.session.commit()
+    logger.info("✅ Recomputed post and user counters.")
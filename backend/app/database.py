@@ -0,0 +1,88 @@
+import sqlite3
+from sqlalchemy import event
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import make_url
+
+# -------------------------
+# 🔹 Database Engine Profile
+# -------------------------
+# Server databases (Postgres, MySQL, ...) get a tuned connection pool. SQLite
+# files get WAL journaling and connection pragmas so readers never block the
+# writer and concurrent writers wait briefly instead of failing with
+# "database is locked".
+
+
+def is_sqlite(uri):
+    return make_url(uri).get_backend_name() == "sqlite"
+
+
+def is_sqlite_memory(uri):
+    url = make_url(uri)
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(config):
+    """Build SQLALCHEMY_ENGINE_OPTIONS for the configured database URI."""
+    options = dict(config.get("SQLALCHEMY_ENGINE_OPTIONS") or {})
+    if is_sqlite(config["SQLALCHEMY_DATABASE_URI"]):
+        return options  # ✅ SQLite: tuned through pragmas on connect, pool defaults are right
+
+    options.setdefault("pool_size", config.get("DB_POOL_SIZE", 10))
+    options.setdefault("max_overflow", config.get("DB_MAX_OVERFLOW", 20))
+    options.setdefault("pool_timeout", config.get("DB_POOL_TIMEOUT", 30))
+    options.setdefault("pool_recycle", config.get("DB_POOL_RECYCLE", 1800))
+    options.setdefault("pool_pre_ping", config.get("DB_POOL_PRE_PING", True))
+    return options
+
+
+def sqlite_pragmas(config):
+    """PRAGMA statements applied to every new SQLite connection, in order."""
+    pragmas = []
+    if config.get("SQLITE_WAL", True):
+        pragmas.append("PRAGMA journal_mode=WAL")  # ✅ Readers don't block the writer (persisted in the file)
+    pragmas += [
+        f"PRAGMA synchronous={config.get('SQLITE_SYNCHRONOUS', 'NORMAL')}",  # ✅ Safe with WAL, far fewer fsyncs
+        f"PRAGMA busy_timeout={int(config.get('SQLITE_BUSY_TIMEOUT_MS', 5000))}",  # ✅ Wait for the write lock
+        f"PRAGMA cache_size=-{int(config.get('SQLITE_CACHE_SIZE_KB', 20000))}",  # ✅ Negative = KiB
+        f"PRAGMA mmap_size={int(config.get('SQLITE_MMAP_SIZE', 268435456))}",
+        "PRAGMA temp_store=MEMORY",
+    ]
+    return pragmas
+
+
+def apply_sqlite_pragmas(engine, config):
+    """Run `sqlite_pragmas(config)` on every connection the engine opens."""
+    if engine.dialect.name != "sqlite" or is_sqlite_memory(str(engine.url)):
+        return
+    pragmas = sqlite_pragmas(config)
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        if not isinstance(dbapi_connection, sqlite3.Connection):
+            return
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(pragma)
+        cursor.close()
+
+
+def configure_engines(app, db):
+    """Apply the SQLite connection profile to every engine Flask-SQLAlchemy created for `app`."""
+    with app.app_context():
+        for engine in db.engines.values():
+            apply_sqlite_pragmas(engine, app.config)
+
+
+# -------------------------
+# 🔹 Dialect-specific INSERT (ON CONFLICT)
+# -------------------------
+UPSERT_DIALECTS = {
+    "sqlite": sqlite.insert,
+    "postgresql": postgresql.insert,
+}
+
+
+def upsert_insert(session, model):
+    """Return an INSERT for `model` that supports `on_conflict_do_*`, or None if the dialect has no ON CONFLICT."""
+    insert = UPSERT_DIALECTS.get(session.get_bind(clause=model.__table__.insert()).dialect.name)
+    return insert(model) if insert is not None else None
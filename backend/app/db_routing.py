@@ -0,0 +1,109 @@
+import random
+from functools import wraps
+from flask import g, has_request_context, request
+from flask_sqlalchemy.session import Session
+from itsdangerous import BadSignature, URLSafeTimedSerializer
+from sqlalchemy import inspect
+from sqlalchemy.sql.dml import UpdateBase
+
+# -------------------------
+# 🔹 Read-replica Routing
+# -------------------------
+# Replicas are extra binds named "replica_<n>" (from DATABASE_REPLICA_URLS).
+# Resources decorated with @use_replica read from one replica per request;
+# flushes, INSERT/UPDATE/DELETE and SELECT ... FOR UPDATE always go to the
+# primary. After a user writes, their reads stay on the primary for
+# DB_REPLICA_STICKY_SECONDS so they never read behind their own write. The pin
+# is a signed cookie rather than worker memory, so it holds whichever worker
+# or node serves the next read; the signature keeps clients from pinning
+# themselves to the primary for longer.
+# Models on their own bind (the chat archive) always use that bind.
+
+REPLICA_BIND_PREFIX = "replica_"
+STICKY_COOKIE = "db_primary_pin"
+
+
+def _is_write(clause):
+    return isinstance(clause, UpdateBase) or getattr(clause, "_for_update_arg", None) is not None
+
+
+def _bind_key(mapper):
+    """Bind key of a mapped model ("archive", ...), None for models on the primary."""
+    return inspect(mapper).local_table.metadata.info.get("bind_key") if mapper is not None else None
+
+
+class RoutingSession(Session):
+    """Flask-SQLAlchemy session that sends read-only requests' SELECTs to a replica bind."""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and has_request_context():
+            if self._flushing or _is_write(clause):
+                g.db_wrote = True  # ✅ Pin this user to the primary after the request
+            elif not g.get("db_wrote") and _bind_key(mapper) is None:  # ✅ Once this request has written, keep reading from the primary
+                replica = g.get("db_replica")
+                if replica is not None:
+                    return self._db.engines[replica]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+class ReplicaRouter:
+    def __init__(self):
+        self.replica_keys = []
+        self.sticky_seconds = 5
+        self._signer = None
+
+    def init_app(self, app):
+        """Read replica binds and the sticky window from the app config."""
+        self.replica_keys = sorted(k for k in app.config.get("SQLALCHEMY_BINDS", {}) if k.startswith(REPLICA_BIND_PREFIX))
+        self.sticky_seconds = app.config.get("DB_REPLICA_STICKY_SECONDS", 5)
+        self._signer = URLSafeTimedSerializer(app.config["SECRET_KEY"], salt="db-replica-sticky")
+        app.after_request(self._after_request)
+
+    def pin_to_primary(self, response, user_key):
+        """Keep `user_key`'s reads on the primary for the sticky window (on every worker)."""
+        if user_key and self.replica_keys:
+            response.set_cookie(
+                STICKY_COOKIE, self._signer.dumps(user_key),
+                max_age=self.sticky_seconds, httponly=True, samesite="Lax",
+            )
+
+    def pinned_to_primary(self, user_key):
+        """Whether this request carries an unexpired pin for `user_key`."""
+        pin = request.cookies.get(STICKY_COOKIE)
+        if not user_key or not pin:
+            return False
+        try:
+            return self._signer.loads(pin, max_age=self.sticky_seconds) == user_key
+        except BadSignature:  # ✅ Also covers expired pins (SignatureExpired)
+            return False
+
+    def choose_replica(self):
+        """Pick a replica bind for this request, or None to stay on the primary."""
+        if not self.replica_keys or self.pinned_to_primary(_user_key()):
+            return None
+        return random.choice(self.replica_keys)
+
+    def _after_request(self, response):
+        if g.pop("db_wrote", False):
+            self.pin_to_primary(response, _user_key())
+        return response
+
+
+def _user_key():
+    user = getattr(request, "user", None)
+    return user.get("keycloak_id") if user else None
+
+
+replica_router = ReplicaRouter()
+
+
+def use_replica(f):
+    """Route this resource's reads to a replica (apply inside @require_auth so the user is known)."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        g.db_replica = replica_router.choose_replica()
+        try:
+            return f(*args, **kwargs)
+        finally:
+            g.pop("db_replica", None)
+    return decorated_function
@@ -0,0 +1,168 @@
+import json
+import queue
+import threading
+import time
+from collections import deque, namedtuple
+from werkzeug.utils import import_string
+from app.cache import LRUCache
+from app.logging_setup import logger
+
+# -------------------------
+# 🔹 Real-time Event Push (server-sent events)
+# -------------------------
+# Routes publish small per-user events (new message, comment, like, follow)
+# after their transaction commits. GET /api/events streams them to the user's
+# open connections. Every event has an increasing integer id. A client that
+# reconnects with `Last-Event-ID` gets everything it missed from a short
+# per-user replay buffer. If the gap is older than the buffer, it gets a
+# single "resync" event and catches up through the cursor endpoints
+# (`get_messages?after=`, `inbox`) instead of refetching everything.
+#
+# The bus backend is chosen by EVENT_BUS_BACKEND. `InProcessBus` only reaches
+# connections held by the same worker process. A multi-node deployment plugs
+# in a broker-backed class with the same publish/subscribe/unsubscribe API.
+
+Event = namedtuple("Event", ["id", "type", "data"])
+
+
+def format_sse(event):
+    """Serialize an event in the text/event-stream wire format."""
+    return f"id: {event.id}\nevent: {event.type}\ndata: {json.dumps(event.data, default=str)}\n\n"
+
+
+class Subscription:
+    """One open event stream: events to replay first, then a queue of live events."""
+
+    def __init__(self, user_id, replay=(), resync_id=None, queue_size=1000):
+        self.user_id = user_id
+        self.replay = list(replay)
+        self.resync_id = resync_id  # ✅ Set when the requested Last-Event-ID is older than the replay buffer
+        self.closed = False
+        self._queue = queue.Queue(maxsize=queue_size)
+
+    def deliver(self, event):
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            self.close()  # ✅ Slow consumer: drop the stream, the client resumes from its last event id
+
+    def get(self, timeout):
+        """Next live event, or None if none arrived within `timeout` seconds (or the stream was closed)."""
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.closed = True
+        try:
+            self._queue.put_nowait(None)  # ✅ Wake up a waiting reader
+        except queue.Full:
+            pass
+
+
+class InProcessBus:
+    """Single-process pub/sub with a bounded per-user replay buffer."""
+
+    def __init__(self, config):
+        self.replay_size = config.get("EVENTS_REPLAY_SIZE", 200)
+        self.queue_size = config.get("EVENTS_QUEUE_SIZE", 1000)
+        self._history = LRUCache(  # user_id -> [deque of recent events, floor]
+            maxsize=config.get("EVENTS_REPLAY_MAX_USERS", 100_000),
+            ttl=config.get("EVENTS_REPLAY_SECONDS", 3600),
+        )
+        self._subscribers = {}  # user_id -> set of Subscription
+        self._lock = threading.Lock()
+        self._last_id = 0
+
+    def _next_id(self):
+        # ✅ Microsecond clock, so ids keep increasing across restarts
+        self._last_id = max(self._last_id + 1, time.time_ns() // 1000)
+        return self._last_id
+
+    def _user_history(self, user_id):
+        history = self._history.get(user_id)
+        if history is None:
+            # ✅ Floor: anything at or below it may have been missed (before this buffer existed or evicted)
+            history = [deque(maxlen=self.replay_size), self._next_id()]
+            self._history.set(user_id, history)
+        return history
+
+    def publish(self, user_id, event_type, data):
+        with self._lock:
+            events, _ = history = self._user_history(user_id)
+            if len(events) == events.maxlen:
+                history[1] = events[0].id  # ✅ The oldest event is about to fall out of the buffer
+            event = Event(self._next_id(), event_type, data)
+            events.append(event)
+            subscribers = list(self._subscribers.get(user_id, ()))
+        for subscription in subscribers:
+            subscription.deliver(event)
+        return event
+
+    def subscribe(self, user_id, last_event_id=None):
+        with self._lock:  # ✅ Replay snapshot and registration are atomic: no event is lost or sent twice
+            events, floor = self._user_history(user_id)
+            replay, resync_id = [], None
+            if last_event_id is not None:
+                if last_event_id < floor:
+                    resync_id = floor
+                replay = [event for event in events if event.id > last_event_id]
+            subscription = Subscription(user_id, replay, resync_id, self.queue_size)
+            self._subscribers.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.user_id)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.user_id]
+        subscription.close()
+
+    def connection_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._subscribers.values())
+
+
+class EventBus:
+    def __init__(self):
+        self.backend = None
+        self.heartbeat = 15
+        self.max_stream_seconds = 300
+
+    def init_app(self, app):
+        """Instantiate the EVENT_BUS_BACKEND class with the app config."""
+        self.backend = import_string(app.config.get("EVENT_BUS_BACKEND", "app.events.InProcessBus"))(app.config)
+        self.heartbeat = app.config.get("EVENTS_HEARTBEAT_SECONDS", 15)
+        self.max_stream_seconds = app.config.get("EVENTS_MAX_STREAM_SECONDS", 300)
+
+    def publish(self, user_ids, event_type, data):
+        """Publish one event to each user. Best effort: push never fails the request that triggered it."""
+        for user_id in user_ids:
+            try:
+                self.backend.publish(user_id, event_type, data)
+            except Exception as e:
+                logger.error("❌ Could not publish %s event to user %s: %s", event_type, user_id, e)
+
+    def subscribe(self, user_id, last_event_id=None):
+        return self.backend.subscribe(user_id, last_event_id)
+
+    def stream(self, subscription):
+        """Yield a subscription as text/event-stream chunks until the client leaves or the stream expires."""
+        deadline = time.monotonic() + self.max_stream_seconds
+        try:
+            yield "retry: 3000\n\n"  # ✅ Client reconnect delay (ms)
+            if subscription.resync_id is not None:
+                yield format_sse(Event(subscription.resync_id, "resync", {}))
+            for event in subscription.replay:
+                yield format_sse(event)
+            while not subscription.closed and time.monotonic() < deadline:
+                event = subscription.get(timeout=self.heartbeat)
+                yield format_sse(event) if event is not None else ": keep-alive\n\n"
+        finally:
+            self.backend.unsubscribe(subscription)
+
+
+event_bus = EventBus()
@@ -0,0 +1,51 @@
+from sqlalchemy import select
+from app.models import User, Follow, db
+
+# -------------------------
+# 🔹 Follower / Following Lists
+# -------------------------
+# Lists are paged newest follow first by `follow.id` (the `before` cursor is
+# the last follow id of the previous page). A page is one range scan on
+# (followed_id, id) or (follower_id, id) joined with the listed users' id,
+# username and profile_pic. Totals come from the stored User.follower_count /
+# following_count counters, and "does the viewer follow them" is answered for
+# the whole page with one lookup on `unique_follow`.
+
+
+def _follow_page_query(owner_column, listed_column, user_id, before=None, limit=20):
+    query = (
+        db.session.query(Follow.id.label("follow_id"), User.id, User.username, User.profile_pic)
+        .join(User, User.id == listed_column)  # ✅ Listed users in the same query
+        .filter(owner_column == user_id)
+    )
+    if before is not None:
+        query = query.filter(Follow.id < before)
+    return query.order_by(Follow.id.desc()).limit(limit + 1)  # ✅ One extra row to detect a next page
+
+
+def followers_query(user_id, before=None, limit=20):
+    """One page of the users following `user_id`, newest follow first."""
+    return _follow_page_query(Follow.followed_id, Follow.follower_id, user_id, before=before, limit=limit)
+
+
+def following_query(user_id, before=None, limit=20):
+    """One page of the users `user_id` follows, newest follow first."""
+    return _follow_page_query(Follow.follower_id, Follow.followed_id, user_id, before=before, limit=limit)
+
+
+def read_follow_page(query, limit):
+    """Trim `limit + 1` rows of a follow list query to a page. Returns `(rows, next_cursor)`."""
+    rows = query.all()
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, rows[-1].follow_id
+
+
+def followed_among(viewer_id, user_ids):
+    """Subset of `user_ids` that `viewer_id` follows, in one query."""
+    if viewer_id is None or not user_ids:
+        return set()
+    return set(db.session.execute(
+        select(Follow.followed_id).where(Follow.follower_id == viewer_id, Follow.followed_id.in_(user_ids))
+    ).scalars())
@@ -0,0 +1,79 @@
+import itertools
+import threading
+from collections import namedtuple
+from app.cache import LRUCache, SHARED_CACHE_BACKENDS
+
+# -------------------------
+# 🔹 Identity Resolution Cache
+# -------------------------
+# Maps a token's `sub` (Keycloak ID) to a slim, immutable record of the local
+# user, so handlers don't each issue their own `User.query.filter_by(keycloak_id=...)`.
+# Profile updates and account deletion invalidate an entry by bumping a
+# per-Keycloak-ID version; a cached identity is only served while its version
+# is current.
+#
+# With a shared tier (IDENTITY_CACHE_SHARED_BACKEND), versions live there, so a
+# deleted user stops resolving on every worker at once. Without one, versions
+# are per process and entries only live for IDENTITY_CACHE_LOCAL_TTL seconds.
+
+Identity = namedtuple("Identity", ["id", "keycloak_id", "username", "email", "user_type"])
+
+identity_cache = LRUCache(maxsize=10000, ttl=5)
+_shared_versions = None
+_identity_versions = LRUCache(maxsize=10000, ttl=float("inf"))
+_version_ids = itertools.count(1)
+_versions_lock = threading.Lock()
+
+
+def init_app(app):
+    """Configure the identity cache from IDENTITY_CACHE_* settings."""
+    global identity_cache, _shared_versions, _identity_versions
+    backend = app.config.get("IDENTITY_CACHE_SHARED_BACKEND")
+    _shared_versions = SHARED_CACHE_BACKENDS[backend]() if backend else None
+    max_entries = app.config.get("IDENTITY_CACHE_MAX_ENTRIES", 10000)
+    ttl = app.config.get("IDENTITY_CACHE_TTL", 300) if _shared_versions else app.config.get("IDENTITY_CACHE_LOCAL_TTL", 5)
+    identity_cache = LRUCache(maxsize=max_entries, ttl=ttl)
+    # ✅ Bounded: a forgotten version is replaced by a never-used one, which only costs a lookup
+    _identity_versions = LRUCache(maxsize=max_entries, ttl=float("inf"))
+
+
+def _identity_version(keycloak_id):
+    if _shared_versions is not None:
+        return _shared_versions.get(f"identity_version:{keycloak_id}") or 0
+    with _versions_lock:
+        version = _identity_versions.get(keycloak_id)
+        if version is None:
+            version = next(_version_ids)
+            _identity_versions.set(keycloak_id, version)
+        return version
+
+
+def resolve_identity(keycloak_id):
+    """Return the local user's Identity for a Keycloak ID, or None if there is no local user yet."""
+    version = _identity_version(keycloak_id)
+    cached = identity_cache.get(keycloak_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+
+    from app.models import User  # ✅ Avoid circular imports
+    row = (
+        User.query.with_entities(User.id, User.keycloak_id, User.username, User.email, User.user_type)
+        .filter_by(keycloak_id=keycloak_id)
+        .first()
+    )
+    if row is None:
+        return None  # ✅ Not cached: the user may be created by their next login
+
+    identity = Identity(*row)
+    identity_cache.set(keycloak_id, (version, identity))  # ✅ Under the version read before the query
+    return identity
+
+
+def invalidate_identity(keycloak_id):
+    """Forget the cached identity for a Keycloak ID on every worker (profile update, account deletion, ...)."""
+    if _shared_versions is not None:
+        _shared_versions.incr(f"identity_version:{keycloak_id}")
+    else:
+        with _versions_lock:
+            _identity_versions.set(keycloak_id, next(_version_ids))
+    identity_cache.delete(keycloak_id)
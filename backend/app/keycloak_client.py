@@ -0,0 +1,196 @@
+import hashlib
+import random
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from app.logging_setup import logger
+from app.cache import SingleFlight
+from app.metrics import observe_keycloak
+
+# -------------------------
+# 🔹 Pooled Keycloak HTTP Client
+# -------------------------
+# One keep-alive connection pool for every call to Keycloak, with per-operation
+# timeouts, jittered retries for idempotent operations, and a circuit breaker
+# that fails fast while the identity provider is degraded.
+
+
+class KeycloakUnavailable(Exception):
+    """Raised when Keycloak cannot be reached (timeout, connection error, 5xx, or open circuit)."""
+
+
+# ✅ (connect, read) timeouts in seconds, and whether the call is safe to retry
+OPERATIONS = {
+    "token": {"timeout": (3.05, 10), "idempotent": False},  # password / refresh_token grants
+    "logout": {"timeout": (3.05, 5), "idempotent": False},
+    "reset_password": {"timeout": (3.05, 10), "idempotent": True},  # PUT
+    "reset_email": {"timeout": (3.05, 10), "idempotent": False},
+    "delete_user": {"timeout": (3.05, 10), "idempotent": True},  # DELETE
+}
+
+RETRY_STATUSES = {502, 503, 504}
+
+
+class CircuitBreaker:
+    """Opens after `threshold` consecutive failures; lets one trial call through after `cooldown` seconds."""
+
+    def __init__(self, threshold=5, cooldown=30):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at >= self.cooldown:
+                self.opened_at = time.monotonic()  # ✅ Half-open: one trial call per cooldown window
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold and self.opened_at is None:
+                self.opened_at = time.monotonic()
+                logger.error("❌ Keycloak circuit opened after %s consecutive failures", self.failures)
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None
+
+
+class KeycloakClient:
+    def __init__(self):
+        self.server_url = None
+        self.realm = None
+        self.max_retries = 2
+        self.retry_backoff = 0.2
+        self.breaker = CircuitBreaker()
+        self.session = self._build_session(pool_size=10)
+        self.refresh_flight = SingleFlight(ttl=5)
+
+    def init_app(self, app):
+        """Configure the connection pool, retries and circuit breaker from KEYCLOAK_* settings."""
+        self.server_url = app.config["KEYCLOAK_SERVER_URL"].rstrip("/")
+        self.realm = app.config["KEYCLOAK_REALM_NAME"]
+        self.max_retries = app.config.get("KEYCLOAK_MAX_RETRIES", 2)
+        self.retry_backoff = app.config.get("KEYCLOAK_RETRY_BACKOFF", 0.2)
+        self.breaker = CircuitBreaker(
+            threshold=app.config.get("KEYCLOAK_BREAKER_THRESHOLD", 5),
+            cooldown=app.config.get("KEYCLOAK_BREAKER_COOLDOWN", 30),
+        )
+        self.session = self._build_session(pool_size=app.config.get("KEYCLOAK_POOL_SIZE", 10))
+        self.refresh_flight = SingleFlight(ttl=app.config.get("REFRESH_TOKEN_COALESCE_WINDOW", 5))
+
+    @staticmethod
+    def _build_session(pool_size):
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)  # ✅ Keep-alive pool per worker
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    # -------------------------
+    # URLs
+    # -------------------------
+    def realm_url(self, path):
+        return f"{self.server_url}/realms/{self.realm}/{path}"
+
+    def admin_url(self, path):
+        return f"{self.server_url}/admin/realms/{self.realm}/{path}"
+
+    # -------------------------
+    # Core request
+    # -------------------------
+    def request(self, operation, method, url, **kwargs):
+        """Send one request to Keycloak. Returns the `requests.Response` or raises KeycloakUnavailable."""
+        spec = OPERATIONS[operation]
+        attempts = 1 + (self.max_retries if spec["idempotent"] else 0)
+
+        for attempt in range(1, attempts + 1):
+            if not self.breaker.allow():
+                raise KeycloakUnavailable("Keycloak circuit is open")
+
+            started = time.perf_counter()
+            try:
+                response = self.session.request(method, url, timeout=spec["timeout"], **kwargs)
+            except requests.RequestException as e:
+                error, response = e, None
+            else:
+                error = None
+            elapsed = time.perf_counter() - started
+            elapsed_ms = elapsed * 1000
+            observe_keycloak(operation, response.status_code if response is not None else "error", elapsed)
+
+            if response is not None and response.status_code not in RETRY_STATUSES and response.status_code < 500:
+                self.breaker.record_success()
+                logger.info("🔹 Keycloak %s: %s in %.0f ms", operation, response.status_code, elapsed_ms)
+                return response
+
+            self.breaker.record_failure()
+            reason = error or f"HTTP {response.status_code}"
+            logger.warning("⚠️ Keycloak %s attempt %s/%s failed after %.0f ms: %s", operation, attempt, attempts, elapsed_ms, reason)
+
+            if attempt < attempts:
+                time.sleep(random.uniform(0, self.retry_backoff * 2 ** (attempt - 1)))  # ✅ Full jitter
+            elif response is not None:
+                return response  # ✅ Let the caller map Keycloak's own 5xx to a response
+
+        raise KeycloakUnavailable(f"Keycloak {operation} failed: {reason}")
+
+    # -------------------------
+    # Operations
+    # -------------------------
+    def token(self, payload):
+        """POST to the OpenID Connect token endpoint (password / refresh_token grants)."""
+        return self.request(
+            "token", "POST", self.realm_url("protocol/openid-connect/token"),
+            data=payload, headers={"Content-Type": "application/x-www-form-urlencoded"},
+        )
+
+    def refresh(self, payload):
+        """Refresh-token grant, coalesced per refresh token.
+
+        Concurrent (and, for a short window, repeated) refreshes of the same token
+        share one upstream call. Returns `(status_code, json_body)`.
+        """
+        key = hashlib.sha256(payload["refresh_token"].encode("utf-8")).hexdigest()
+
+        def call():
+            response = self.token(payload)
+            return response.status_code, (response.json() if response.status_code == 200 else None)
+
+        return self.refresh_flight.do(key, call, cache_if=lambda result: result[0] < 500)
+
+    def logout(self, access_token):
+        return self.request(
+            "logout", "POST", self.realm_url("protocol/openid-connect/logout"),
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+    def reset_password(self, keycloak_id, payload, access_token):
+        return self.request(
+            "reset_password", "PUT", self.admin_url(f"users/{keycloak_id}/reset-password"),
+            json=payload, headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+    def send_reset_email(self, payload):
+        return self.request("reset_email", "POST", self.realm_url("protocol/openid-connect/auth"), json=payload)
+
+    def delete_user(self, keycloak_id, access_token):
+        return self.request(
+            "delete_user", "DELETE", self.admin_url(f"users/{keycloak_id}"),
+            headers={"Authorization": f"Bearer {access_token}"},
+        )
+
+
+keycloak_client = KeycloakClient()
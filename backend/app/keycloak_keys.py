@@ -0,0 +1,160 @@
+import json
+import os
+import threading
+import time
+from urllib.request import urlopen
+from authlib.jose import JsonWebKey
+from app.logging_setup import logger
+
+# -------------------------
+# 🔹 Keycloak JWKS Key Manager
+# -------------------------
+# Keeps Keycloak's signing keys indexed by `kid`, refreshes them on a background
+# timer, refetches once (single-flight) when a token names an unknown `kid`, and
+# snapshots the key set to disk so a cold start can verify tokens immediately.
+
+
+class KeycloakKeyManager:
+    def __init__(self):
+        self.certs_url = None
+        self.snapshot_path = None
+        self.refresh_interval = 300
+        self.min_refetch_interval = 10
+        self.fetch_timeout = 5
+        self._keys = {}  # kid -> imported JsonWebKey
+        self._jwks = {"keys": []}
+        self._last_fetch = 0.0
+        self._fetch_lock = threading.Lock()
+        self._rotation_listeners = []
+        self._refresh_thread = None
+        self._stop = threading.Event()
+
+    def init_app(self, app):
+        """Configure from the app, load the disk snapshot and start background refresh (non-blocking)."""
+        self.certs_url = app.config["KEYCLOAK_CERTS_URL"]
+        self.snapshot_path = app.config.get("JWKS_SNAPSHOT_PATH") or os.path.join(app.instance_path, "keycloak_jwks.json")
+        self.refresh_interval = app.config.get("JWKS_REFRESH_INTERVAL", 300)
+        self.min_refetch_interval = app.config.get("JWKS_MIN_REFETCH_INTERVAL", 10)
+        self.fetch_timeout = app.config.get("JWKS_FETCH_TIMEOUT", 5)
+
+        self.load_snapshot()
+        if self.refresh_interval:
+            self.start()
+
+    def add_rotation_listener(self, callback):
+        """Call `callback()` whenever the key set changes."""
+        self._rotation_listeners.append(callback)
+
+    # -------------------------
+    # Key lookup
+    # -------------------------
+    def key_set(self):
+        """Return the current JWKS document ({"keys": [...]})."""
+        return self._jwks
+
+    def get_key(self, kid):
+        """Return the signing key for `kid`, refetching the JWKS once if it is unknown."""
+        key = self._lookup(kid)
+        if key is not None:
+            return key
+
+        # ✅ Single-flight: one thread refetches, concurrent callers wait and re-check
+        with self._fetch_lock:
+            key = self._lookup(kid)
+            if key is None and time.monotonic() - self._last_fetch >= self.min_refetch_interval:
+                logger.info("🔹 Unknown key id '%s', refetching Keycloak public keys.", kid)
+                self._fetch()
+                key = self._lookup(kid)
+        return key
+
+    def _lookup(self, kid):
+        if kid is None and len(self._keys) == 1:
+            return next(iter(self._keys.values()))  # ✅ Tokens without a `kid` against a single-key realm
+        return self._keys.get(kid)
+
+    # -------------------------
+    # Fetching & snapshots
+    # -------------------------
+    def refresh(self):
+        """Fetch the JWKS from Keycloak now. Returns True on success."""
+        with self._fetch_lock:
+            return self._fetch()
+
+    def _fetch(self):
+        self._last_fetch = time.monotonic()
+        try:
+            with urlopen(self.certs_url, timeout=self.fetch_timeout) as response:
+                jwks = json.loads(response.read())
+        except Exception as e:
+            logger.error("⚠️ Could not fetch Keycloak public keys from %s. Error: %s", self.certs_url, e)
+            return False
+
+        if self.set_keys(jwks):
+            self._save_snapshot()
+        return True
+
+    def set_keys(self, jwks):
+        """Replace the key set. Returns True if the set of keys changed."""
+        keys = {}
+        for jwk in jwks.get("keys", []):
+            if jwk.get("use", "sig") != "sig":
+                continue
+            try:
+                keys[jwk.get("kid")] = JsonWebKey.import_key(jwk)
+            except Exception as e:
+                logger.warning("⚠️ Skipping unusable Keycloak key '%s': %s", jwk.get('kid'), e)
+
+        changed = jwks != self._jwks
+        self._keys, self._jwks = keys, jwks
+        if changed:
+            logger.info("✅ Loaded %s Keycloak signing key(s): %s", len(keys), sorted(map(str, keys)))
+            for callback in self._rotation_listeners:
+                callback()
+        return changed
+
+    def load_snapshot(self):
+        """Load the last known key set from disk, if present."""
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+        try:
+            with open(self.snapshot_path, encoding="utf-8") as f:
+                self.set_keys(json.load(f))
+            logger.info("✅ Loaded Keycloak key snapshot from %s", self.snapshot_path)
+            return True
+        except (OSError, ValueError) as e:
+            logger.warning("⚠️ Ignoring unreadable Keycloak key snapshot %s: %s", self.snapshot_path, e)
+            return False
+
+    def _save_snapshot(self):
+        if not self.snapshot_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.snapshot_path), exist_ok=True)
+            tmp_path = f"{self.snapshot_path}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self._jwks, f)
+            os.replace(tmp_path, self.snapshot_path)  # ✅ Atomic: readers never see a partial file
+        except OSError as e:
+            logger.warning("⚠️ Could not write Keycloak key snapshot %s: %s", self.snapshot_path, e)
+
+    # -------------------------
+    # Background refresh
+    # -------------------------
+    def start(self):
+        """Start the background refresh thread (first fetch happens immediately, off the boot path)."""
+        if self._refresh_thread and self._refresh_thread.is_alive():
+            return
+        self._stop.clear()
+        self._refresh_thread = threading.Thread(target=self._refresh_loop, name="jwks-refresh", daemon=True)
+        self._refresh_thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _refresh_loop(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.refresh_interval)
+
+
+key_manager = KeycloakKeyManager()
@@ -1,13 +1,124 @@
+import atexit
+import json
 import logging
+import os
+import queue
+import random
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-    handlers=[
-        logging.FileHandler("app.log", encoding="utf-8"),  # ✅ Log to a file
-        logging.StreamHandler()          # ✅ Print logs to the console
-    ],
-)
+# -------------------------
+# 🔹 Logging Configuration (environment driven)
+# -------------------------
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FILE = os.getenv("LOG_FILE", "app.log")
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", 10 * 1024 * 1024))  # ✅ Rotate the file at 10 MB
+LOG_BACKUP_COUNT = int(os.getenv("LOG_BACKUP_COUNT", 5))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", 10000))
+LOG_SAMPLE_RATES = os.getenv("LOG_SAMPLE_RATES", "")  # e.g. "DEBUG=0,INFO=0.05" (unlisted levels keep everything)
+SLOW_QUERY_LOG_FILE = os.getenv("SLOW_QUERY_LOG_FILE", "slow_queries.log")
+
+# ✅ Attributes every LogRecord has; anything else was passed via `extra=` and is emitted as a field
+_RESERVED_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+class JsonFormatter(logging.Formatter):
+    """Render records as one JSON object per line (message formatting happens here, off the request thread)."""
+
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "thread": record.threadName,
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RESERVED_ATTRS})
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class SamplingFilter(logging.Filter):
+    """Keep only a fraction of records per level; records logged with `extra={"sample": False}` are always kept."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        rate = self.rates.get(record.levelno)
+        if rate is None or getattr(record, "sample", True) is False:
+            return True
+        return rate > 0 and random.random() < rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """Hand records to the writer thread without formatting them and without ever blocking the caller."""
+
+    def prepare(self, record):
+        return record  # ✅ Lazy: %-args are formatted by the listener thread, not the request thread
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass  # ✅ Under overload drop the record rather than stall a request
+
+
+def parse_sample_rates(spec):
+    """Parse "INFO=0.1,DEBUG=0" into {logging.INFO: 0.1, logging.DEBUG: 0.0}."""
+    rates = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        level, _, rate = item.partition("=")
+        rates[logging.getLevelName(level.strip().upper())] = float(rate)
+    return rates
+
+
+def json_file_handler(path):
+    """Size-rotated JSON-lines file handler."""
+    handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUP_COUNT, encoding="utf-8", delay=True)
+    handler.setFormatter(JsonFormatter())
+    return handler
+
+
+def configure_logging():
+    """Route all logging through a bounded queue drained by a background writer thread."""
+    file_handler = json_file_handler(LOG_FILE)  # ✅ Structured JSON to the log file
+
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))  # ✅ Readable console
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(parse_sample_rates(LOG_SAMPLE_RATES)))
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.handlers = [queue_handler]
+
+    listener = QueueListener(log_queue, file_handler, console_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)  # ✅ Flush pending records at shutdown
+    return listener
+
+
+def configure_slow_query_logging():
+    """Dedicated slow-SQL log: its own file, same non-blocking queue pipeline, not mixed into app.log."""
+    slow_logger = logging.getLogger("yeslove.slow_sql")
+    slow_logger.propagate = False
+    slow_logger.setLevel(logging.WARNING)
+
+    log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+    slow_logger.handlers = [NonBlockingQueueHandler(log_queue)]
+
+    listener = QueueListener(log_queue, json_file_handler(SLOW_QUERY_LOG_FILE))
+    listener.start()
+    atexit.register(listener.stop)
+    return slow_logger
+
+
+log_listener = configure_logging()
+slow_query_logger = configure_slow_query_logging()
 
 logger = logging.getLogger(__name__)
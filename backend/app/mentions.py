@@ -0,0 +1,68 @@
+import re
+from app.models import User, Post, Comment, Mention, db
+from app.logging_setup import logger
+from app.pagination import keyset_page
+from app.toggles import insert_ignore
+
+# -------------------------
+# 🔹 @mention Index
+# -------------------------
+# Mentions are parsed once when a post or comment is written and stored in the
+# `mention` table, so the "mentions" feed never scans post content.
+
+MENTION_PATTERN = re.compile(r"@([\w.-]+)")
+
+
+def extract_usernames(text):
+    """Return the set of usernames mentioned as @username in `text`."""
+    return {name.rstrip(".-") for name in MENTION_PATTERN.findall(text or "") if name.rstrip(".-")}
+
+
+def record_mentions(post_id, text, timestamp):
+    """Index every existing user mentioned in `text` against `post_id`. Returns the newly mentioned user ids."""
+    usernames = extract_usernames(text)
+    if not usernames:
+        return set()
+
+    user_ids = [row.id for row in db.session.query(User.id).filter(User.username.in_(usernames))]
+    # ✅ Race-free: a post already indexed for a user (e.g. via an earlier comment) keeps its first mention
+    return {
+        user_id for user_id in user_ids
+        if insert_ignore(Mention, mentioned_user_id=user_id, post_id=post_id, timestamp=timestamp)
+    }
+
+
+def read_mentions(user_id, cursor=None, limit=20):
+    """Return one newest-first page of `(post_ids, next_cursor)` of posts mentioning a user."""
+    query = db.session.query(Mention.post_id, Mention.timestamp).filter(Mention.mentioned_user_id == user_id)
+    rows, next_cursor = keyset_page(query, Mention.timestamp, Mention.post_id, cursor=cursor, limit=limit)
+    return [row.post_id for row in rows], next_cursor
+
+
+def backfill_mentions(chunk_size=500):
+    """Rebuild the mention index from existing posts and comments, streaming in id-ordered chunks."""
+    db.session.execute(Mention.__table__.delete())
+    db.session.commit()
+
+    indexed = 0
+    for model, post_id_col in ((Post, Post.id), (Comment, Comment.post_id)):
+        last_id = 0
+        while True:
+            rows = (
+                db.session.query(model.id, post_id_col.label("post_id"), model.content, model.timestamp)
+                .filter(model.id > last_id)
+                .order_by(model.id)
+                .limit(chunk_size)
+                .all()
+            )
+            if not rows:
+                break
+            for row in rows:
+                if "@" in (row.content or ""):
+                    record_mentions(row.post_id, row.content, row.timestamp)
+            db.session.commit()
+            indexed += len(rows)
+            last_id = rows[-1].id
+
+    logger.info("✅ Scanned %s posts and comments for mentions.", indexed)
+    return indexed
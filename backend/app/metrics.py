@@ -0,0 +1,205 @@
+import threading
+import time
+from bisect import bisect_left
+from flask import Response, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# -------------------------
+# 🔹 In-process Metrics Registry (Prometheus text format)
+# -------------------------
+# Each thread records into its own shard without taking a lock; shards are only
+# summed when /metrics is scraped. Shards of finished threads are folded into a
+# retired shard so thread-per-request servers don't grow the shard list.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)  # Seconds
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)  # Bytes
+QUERY_COUNT_BUCKETS = (1, 2, 5, 10, 20, 50, 100)
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}  # name -> (type, help, buckets)
+        self._collectors = {}  # name -> (type, help, collect)
+        self._local = threading.local()
+        self._shards = []  # (thread, shard)
+        self._retired = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, help_text):
+        self._metrics[name] = ("counter", help_text, None)
+
+    def histogram(self, name, help_text, buckets=LATENCY_BUCKETS):
+        self._metrics[name] = ("histogram", help_text, tuple(buckets))
+
+    def collector(self, name, kind, help_text, collect):
+        """Register a counter or gauge read at scrape time: `collect()` returns {labels: value}."""
+        self._collectors[name] = (kind, help_text, collect)
+
+    # -------------------------
+    # Recording (lock-free per thread)
+    # -------------------------
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._retire_dead_shards()
+                self._shards.append((threading.current_thread(), shard))
+        return shard
+
+    def inc(self, name, labels=(), amount=1):
+        """Add `amount` to a counter. `labels` is a tuple of (name, value) pairs."""
+        shard = self._shard()
+        key = (name, labels)
+        shard[key] = shard.get(key, 0) + amount
+
+    def observe(self, name, value, labels=()):
+        """Record one histogram observation."""
+        shard = self._shard()
+        key = (name, labels)
+        state = shard.get(key)
+        if state is None:
+            buckets = self._metrics[name][2]
+            state = shard[key] = [[0] * (len(buckets) + 1), 0.0, 0]  # per-bucket counts (+Inf last), sum, count
+        state[0][bisect_left(self._metrics[name][2], value)] += 1
+        state[1] += value
+        state[2] += 1
+
+    # -------------------------
+    # Collection
+    # -------------------------
+    def _retire_dead_shards(self):
+        """Fold shards of finished threads into the retired shard (caller holds the lock)."""
+        alive = []
+        for thread, shard in self._shards:
+            if thread.is_alive():
+                alive.append((thread, shard))
+            else:
+                self._merge(self._retired, shard.copy())
+        self._shards = alive
+
+    def _merge(self, into, shard):
+        for key, value in shard.items():
+            if self._metrics[key[0]][0] == "counter":
+                into[key] = into.get(key, 0) + value
+                continue
+            state = into.setdefault(key, [[0] * len(value[0]), 0.0, 0])
+            state[0] = [a + b for a, b in zip(state[0], value[0])]
+            state[1] += value[1]
+            state[2] += value[2]
+
+    def snapshot(self):
+        """Return the merged state of every shard: {(name, labels): value}."""
+        with self._lock:
+            self._retire_dead_shards()
+            merged = {}
+            self._merge(merged, self._retired)
+            for _, shard in self._shards:
+                self._merge(merged, shard.copy())  # ✅ dict.copy() is atomic under the GIL
+        return merged
+
+    def render(self):
+        """Render every metric in the Prometheus text exposition format."""
+        merged = self.snapshot()
+        lines = []
+        for name, (kind, help_text, buckets) in self._metrics.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (metric, labels), value in sorted(merged.items()):
+                if metric != name:
+                    continue
+                if kind == "counter":
+                    lines.append(f"{name}{_labels(labels)} {value}")
+                    continue
+                cumulative = 0
+                for bound, count in zip(buckets + ("+Inf",), value[0]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(labels + (('le', str(bound)),))} {cumulative}")
+                lines.append(f"{name}_sum{_labels(labels)} {value[1]}")
+                lines.append(f"{name}_count{_labels(labels)} {value[2]}")
+        for name, (kind, help_text, collect) in self._collectors.items():
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in sorted(collect().items()):
+                lines.append(f"{name}{_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+metrics = MetricsRegistry()
+metrics.counter("yeslove_http_requests_total", "HTTP requests by endpoint, method and status.")
+metrics.counter("yeslove_http_request_errors_total", "HTTP requests that ended in a 5xx response.")
+metrics.histogram("yeslove_http_request_duration_seconds", "HTTP request latency.")
+metrics.histogram("yeslove_http_response_size_bytes", "HTTP response body size.", SIZE_BUCKETS)
+metrics.histogram("yeslove_db_time_seconds", "Total database time spent per HTTP request.")
+metrics.histogram("yeslove_db_queries_per_request", "SQL statements executed per HTTP request.", QUERY_COUNT_BUCKETS)
+metrics.histogram("yeslove_keycloak_request_duration_seconds", "Keycloak call latency by operation and outcome.")
+
+
+def observe_keycloak(operation, outcome, seconds):
+    """Record one Keycloak call (`outcome` is the HTTP status or "error")."""
+    metrics.observe("yeslove_keycloak_request_duration_seconds", seconds,
+                    (("operation", operation), ("outcome", str(outcome))))
+
+
+# -------------------------
+# 🔹 Request & Database Instrumentation
+# -------------------------
+def _before_request():
+    g.metrics_started = time.perf_counter()
+    g.db_time = 0.0
+    g.db_queries = 0
+
+
+def _after_request(response):
+    started = g.pop("metrics_started", None)
+    if started is None or request.endpoint == "metrics":
+        return response
+
+    labels = (("endpoint", request.endpoint or "unmatched"), ("method", request.method))
+    metrics.inc("yeslove_http_requests_total", labels + (("status", str(response.status_code)),))
+    if response.status_code >= 500:
+        metrics.inc("yeslove_http_request_errors_total", labels)
+    metrics.observe("yeslove_http_request_duration_seconds", time.perf_counter() - started, labels)
+    if response.content_length is not None:
+        metrics.observe("yeslove_http_response_size_bytes", response.content_length, labels)
+    metrics.observe("yeslove_db_time_seconds", g.db_time, labels)
+    metrics.observe("yeslove_db_queries_per_request", g.db_queries, labels)
+    return response
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_query_start = time.perf_counter()  # ✅ Per statement: nothing is left behind if it raises
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._metrics_query_start
+    if has_request_context() and "db_time" in g:
+        g.db_time += elapsed
+        g.db_queries += 1
+
+
+def metrics_view():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
+def register_metrics(app):
+    """Instrument requests and SQL statements, and expose GET /metrics."""
+    if not app.config.get("METRICS_ENABLED", True):
+        return
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    app.add_url_rule("/metrics", "metrics", metrics_view)
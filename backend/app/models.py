@@ -22,6 +22,10 @@ class User(db.Model):
     profile_pic = db.Column(db.String(200), default="default.jpg")
     user_type = db.Column(db.String(20), default="standard")  # ✅ Defaulgt to "standard" or "professional"
 
+    # ✅ Denormalized counters (kept current by atomic increments, see app/counters.py)
+    follower_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    following_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     # ✅ Relationships
     posts = db.relationship("Post", backref="author", lazy=True, cascade="all, delete-orphan")
     followers = db.relationship("Follow", foreign_keys="[Follow.followed_id]", backref="followed", lazy=True)
@@ -43,9 +47,17 @@ class Post(db.Model):
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)  # ✅ Added timestamp
     user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
 
+    # ✅ Denormalized counters (kept current by atomic increments, see app/counters.py)
+    like_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    comment_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
     # ✅ Relationships
     comments = db.relationship("Comment", backref="post", lazy=True, cascade="all, delete-orphan")
     likes = db.relationship("Like", backref="post", lazy=True, cascade="all, delete-orphan")
+    reaction_counts = db.relationship("PostReactionCount", lazy=True, cascade="all, delete-orphan")
+
+    # ✅ Composite index so feed pages are served as an index-ordered range scan
+    __table_args__ = (db.Index("ix_post_user_id_timestamp_id", "user_id", "timestamp", "id"),)
 
 
 # -------------------------
@@ -58,6 +70,9 @@ class Comment(db.Model):
     user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
     post_id = db.Column(db.Integer, db.ForeignKey("post.id", ondelete="CASCADE"), nullable=False, index=True)
 
+    # ✅ A post's comments in order, straight from the index
+    __table_args__ = (db.Index("ix_comment_post_id_timestamp_id", "post_id", "timestamp", "id"),)
+
 
 # -------------------------
 # 🚀 Like Model (Prevent Duplicate Likes)
@@ -66,9 +81,12 @@ class Like(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
     post_id = db.Column(db.Integer, db.ForeignKey("post.id", ondelete="CASCADE"), nullable=False, index=True)
+    post_timestamp = db.Column(db.DateTime)  # ✅ Copied from Post.timestamp for index-ordered favorites
 
-    # ✅ Unique Constraint (Prevent duplicate likes)
-    __table_args__ = (db.UniqueConstraint("user_id", "post_id", name="unique_like"),)
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "post_id", name="unique_like"),  # ✅ Prevent duplicate likes
+        db.Index("ix_like_user_id_post_timestamp_post_id", "user_id", "post_timestamp", "post_id"),  # ✅ Favorites feed, newest post first
+    )
 
 
 # -------------------------
@@ -76,11 +94,15 @@ class Like(db.Model):
 # -------------------------
 class Follow(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    follower_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
-    followed_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
+    follower_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    followed_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
 
-    # ✅ Unique Constraint (Prevent duplicate follows)
-    __table_args__ = (db.UniqueConstraint("follower_id", "followed_id", name="unique_follow"),)
+    __table_args__ = (
+        db.UniqueConstraint("follower_id", "followed_id", name="unique_follow"),  # ✅ Prevent duplicate follows
+        db.CheckConstraint("follower_id != followed_id", name="check_no_self_follow"),  # ✅ Prevent users from following themselves
+        db.Index("ix_follow_followed_id_id", "followed_id", "id"),  # ✅ Follower list pages, newest first
+        db.Index("ix_follow_follower_id_id", "follower_id", "id"),  # ✅ Following list pages, newest first
+    )
 
 
 # -------------------------
@@ -100,21 +122,87 @@ class ProfessionalDetails(db.Model):
     )
 
 
+# -------------------------
+# 🚀 Conversation Model (one per pair of users)
+# -------------------------
+class Conversation(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    low_user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)  # ✅ Smaller user id
+    high_user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # ✅ Last message, kept current by SendMessage for inbox previews
+    last_message_id = db.Column(db.Integer, nullable=True)
+    last_sender_id = db.Column(db.Integer, nullable=True)
+    last_message_preview = db.Column(db.String(200), nullable=True)
+    last_message_at = db.Column(db.DateTime, nullable=True)
+
+    # ✅ Messages up to this id live in the chat archive, not the `chat` table
+    archived_through_id = db.Column(db.Integer, nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint("low_user_id", "high_user_id", name="unique_conversation"),  # ✅ Canonical pair key
+        db.CheckConstraint("low_user_id < high_user_id", name="check_conversation_user_order"),
+    )
+
+
+# -------------------------
+# 🚀 Conversation Member Model (Per-user inbox entry)
+# -------------------------
+class ConversationMember(db.Model):
+    __tablename__ = "conversation_member"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)  # ✅ Inbox owner
+    conversation_id = db.Column(db.Integer, db.ForeignKey("conversation.id", ondelete="CASCADE"), primary_key=True)
+    last_message_at = db.Column(db.DateTime, nullable=False)  # ✅ Copied from the conversation for index-ordered reads
+    unread_count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+    last_read_message_id = db.Column(db.Integer, nullable=True)
+
+    # ✅ Inbox reads are a single range scan on (user_id, last_message_at, conversation_id)
+    __table_args__ = (db.Index("ix_conversation_member_user_id_last_message_at_conversation_id", "user_id", "last_message_at", "conversation_id"),)
+
+
 # -------------------------
 # 🚀 Chat Model
 # -------------------------
 class Chat(db.Model):
     id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(db.Integer, db.ForeignKey("conversation.id", ondelete="CASCADE"), nullable=False)
     sender_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
     receiver_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False, index=True)
     message = db.Column(db.Text, nullable=False)
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
 
-    # ✅ Prevent users from messaging themselves
-    __table_args__ = (db.CheckConstraint("sender_id != receiver_id", name="check_no_self_message"),)
+    __table_args__ = (
+        db.CheckConstraint("sender_id != receiver_id", name="check_no_self_message"),  # ✅ Prevent users from messaging themselves
+        db.Index("ix_chat_conversation_id_id", "conversation_id", "id"),  # ✅ Message history pages by id
+    )
+
+
+# -------------------------
+# 🚀 Chat Archive Segment Model (archive database)
+# -------------------------
+class ChatArchiveSegment(db.Model):
+    __bind_key__ = "archive"
+    __tablename__ = "chat_archive_segment"
+
+    id = db.Column(db.Integer, primary_key=True)
+    conversation_id = db.Column(db.Integer, nullable=False)  # ✅ No FK: lives in a separate database
+    first_message_id = db.Column(db.Integer, nullable=False)
+    last_message_id = db.Column(db.Integer, nullable=False)
+    message_count = db.Column(db.Integer, nullable=False)
+    payload = db.Column(db.LargeBinary, nullable=False)  # ✅ zlib-compressed JSON of the messages, oldest first
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # ✅ One segment per starting message (re-running an interrupted archive job is a no-op)
+    __table_args__ = (db.UniqueConstraint("conversation_id", "first_message_id", name="unique_chat_archive_segment"),)
+
 
 class EmailNotificationSettings(db.Model):
     __tablename__ = "email_notification_settings"
+    __table_args__ = (
+        db.Index("ix_email_notification_settings_user_id_setting_id", "user_id", "setting_id", unique=True),  # ✅ Upsert target
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String, db.ForeignKey("user.keycloak_id"), nullable=False)
@@ -123,6 +211,9 @@ class EmailNotificationSettings(db.Model):
 
 class ProfileVisibilitySettings(db.Model):
     __tablename__ = "profile_visibility_settings"
+    __table_args__ = (
+        db.Index("ix_profile_visibility_settings_user_id_setting_id", "user_id", "setting_id", unique=True),  # ✅ Upsert target
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.String, db.ForeignKey("user.keycloak_id"), nullable=False)
@@ -138,3 +229,46 @@ class Reaction(db.Model):
      
     user = db.relationship("User", backref="reactions")
     post = db.relationship("Post", backref="reactions")
+
+    # ✅ Unique Constraint (One reaction per user per post)
+    __table_args__ = (db.UniqueConstraint("user_id", "post_id", name="unique_reaction"),)
+
+
+# -------------------------
+# 🚀 Post Reaction Count Model (Denormalized per-type reaction totals)
+# -------------------------
+class PostReactionCount(db.Model):
+    __tablename__ = "post_reaction_count"
+
+    post_id = db.Column(db.Integer, db.ForeignKey("post.id", ondelete="CASCADE"), primary_key=True)
+    reaction_type = db.Column(db.String(50), primary_key=True)
+    count = db.Column(db.Integer, nullable=False, default=0, server_default="0")
+
+
+# -------------------------
+# 🚀 Timeline Entry Model (Materialized Home Timeline)
+# -------------------------
+class TimelineEntry(db.Model):
+    __tablename__ = "timeline_entry"
+
+    user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)  # ✅ Timeline owner
+    post_id = db.Column(db.Integer, db.ForeignKey("post.id", ondelete="CASCADE"), primary_key=True)
+    author_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), nullable=False)
+    timestamp = db.Column(db.DateTime, nullable=False)  # ✅ Copied from Post.timestamp for index-ordered reads
+
+    # ✅ Feed reads are a single range scan on (user_id, timestamp, post_id)
+    __table_args__ = (db.Index("ix_timeline_entry_user_id_timestamp_post_id", "user_id", "timestamp", "post_id"),)
+
+
+# -------------------------
+# 🚀 Mention Model (Index of @username mentions)
+# -------------------------
+class Mention(db.Model):
+    __tablename__ = "mention"
+
+    mentioned_user_id = db.Column(db.Integer, db.ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    post_id = db.Column(db.Integer, db.ForeignKey("post.id", ondelete="CASCADE"), primary_key=True)
+    timestamp = db.Column(db.DateTime, nullable=False)  # ✅ When the mention was written (post or comment)
+
+    # ✅ "Mentions" feed reads are a single range scan on (mentioned_user_id, timestamp, post_id)
+    __table_args__ = (db.Index("ix_mention_mentioned_user_id_timestamp_post_id", "mentioned_user_id", "timestamp", "post_id"),)
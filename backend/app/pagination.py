@@ -0,0 +1,68 @@
+import base64
+from datetime import datetime
+from sqlalchemy import and_, or_
+
+# -------------------------
+# 🔹 Keyset (Cursor) Pagination Helpers
+# -------------------------
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(timestamp, row_id):
+    """Encode a (timestamp, id) position into an opaque, URL-safe cursor."""
+    raw = f"{timestamp.isoformat()}|{row_id}"
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Decode an opaque cursor into a (timestamp, id) tuple. Raises ValueError if malformed."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        timestamp, row_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse a `limit` query argument, clamped to [1, maximum]. Raises ValueError if not an integer."""
+    if value in (None, ""):
+        return default
+    return max(1, min(int(value), maximum))
+
+
+def after_cursor(query, timestamp_col, id_col, cursor):
+    """Restrict a newest-first query to rows strictly older than the cursor position."""
+    timestamp, row_id = cursor
+    return query.filter(or_(
+        timestamp_col < timestamp,
+        and_(timestamp_col == timestamp, id_col < row_id),
+    ))
+
+
+def keyset_query(query, timestamp_col, id_col, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Order `query` newest-first after the cursor, fetching one extra row to detect a next page."""
+    if cursor is not None:
+        query = after_cursor(query, timestamp_col, id_col, cursor)
+    return query.order_by(timestamp_col.desc(), id_col.desc()).limit(limit + 1)
+
+
+def split_page(rows, limit, timestamp_attr="timestamp", id_attr="id"):
+    """Trim `limit + 1` newest-first rows to a page. Returns `(rows, next_cursor)`."""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(getattr(last, timestamp_attr), getattr(last, id_attr))
+
+
+def keyset_page(query, timestamp_col, id_col, cursor=None, limit=DEFAULT_PAGE_SIZE):
+    """Fetch one newest-first page of `query`.
+
+    Returns `(rows, next_cursor)`; `next_cursor` is None on the last page.
+    Cost is O(limit) index reads regardless of how deep the client has scrolled.
+    """
+    rows = keyset_query(query, timestamp_col, id_col, cursor=cursor, limit=limit).all()
+    return split_page(rows, limit, timestamp_col.key, id_col.key)
@@ -0,0 +1,112 @@
+import re
+from datetime import datetime
+from sqlalchemy import select, text
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+from app.models import Comment, Conversation, Follow, Mention, EmailNotificationSettings, ProfileVisibilitySettings, db
+from app.pagination import keyset_query
+from app.timeline import timeline_entries_query, author_posts_query, favorite_posts_query
+from app.chat import messages_page_query, inbox_query
+from app.follows import followers_query, following_query
+
+# -------------------------
+# 🔹 Query-plan Regression Check
+# -------------------------
+# `flask check-query-plans` runs EXPLAIN on every hot read and fails if one of
+# them needs a full scan or a sort, i.e. an index it depends on is missing or
+# the query stopped matching it. The database must be at the latest migration.
+# On Postgres, sequential scans and sorts are disabled for the check so the
+# planner picks an index whenever one fits, even on small tables.
+
+SAMPLE_CURSOR = (datetime(2026, 1, 1), 1)
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN wrapper that compiles for the session's dialect."""
+
+    inherit_cache = False
+
+    def __init__(self, statement):
+        self.statement = statement
+
+
+@compiles(Explain)
+def _compile_explain(element, compiler, **kw):
+    prefix = "EXPLAIN QUERY PLAN " if compiler.dialect.name == "sqlite" else "EXPLAIN "
+    return prefix + compiler.process(element.statement, **kw)
+
+
+def _settings_query(model):
+    return select(model.setting_id, model.value).where(model.user_id == 1)
+
+
+def _mentions_query(cursor=None):
+    query = db.session.query(Mention.post_id, Mention.timestamp).filter(Mention.mentioned_user_id == 1)
+    return keyset_query(query, Mention.timestamp, Mention.post_id, cursor=cursor)
+
+
+def _comments_query():
+    return select(Comment.id).where(Comment.post_id == 1).order_by(Comment.timestamp.asc(), Comment.id.asc())
+
+
+# ✅ Name -> statement builder, with placeholder ids (plans don't depend on the values)
+HOT_QUERIES = {
+    "timeline": lambda: timeline_entries_query(1),
+    "timeline (next page, friends only)": lambda: timeline_entries_query(
+        1, cursor=SAMPLE_CURSOR, include_own=False, exclude_authors=(2, 3)
+    ),
+    "author posts": lambda: author_posts_query(1),
+    "author posts (next page)": lambda: author_posts_query(1, cursor=SAMPLE_CURSOR),
+    "favorites": lambda: favorite_posts_query(1),
+    "favorites (next page)": lambda: favorite_posts_query(1, cursor=SAMPLE_CURSOR),
+    "mentions": lambda: _mentions_query(),
+    "mentions (next page)": lambda: _mentions_query(cursor=SAMPLE_CURSOR),
+    "comments": _comments_query,
+    "conversation lookup": lambda: select(Conversation.id).where(Conversation.low_user_id == 1, Conversation.high_user_id == 2),
+    "messages": lambda: messages_page_query(1),
+    "messages (older page)": lambda: messages_page_query(1, before=100),
+    "messages (new since)": lambda: messages_page_query(1, after=100),
+    "inbox": lambda: inbox_query(1),
+    "inbox (next page)": lambda: inbox_query(1, cursor=SAMPLE_CURSOR),
+    "followers": lambda: followers_query(1),
+    "followers (next page)": lambda: followers_query(1, before=100),
+    "following": lambda: following_query(1),
+    "following (next page)": lambda: following_query(1, before=100),
+    "viewer follows page": lambda: select(Follow.followed_id).where(Follow.follower_id == 1, Follow.followed_id.in_((2, 3))),
+    "email notification settings": lambda: _settings_query(EmailNotificationSettings),
+    "profile visibility settings": lambda: _settings_query(ProfileVisibilitySettings),
+}
+
+# ✅ Plan lines that mean "reads every row" or "sorts after reading"
+PLAN_PROBLEMS = {
+    "sqlite": re.compile(r"^(SCAN (?!CONSTANT ROW)|USE TEMP B-TREE)"),
+    "postgresql": re.compile(r"^\s*(->\s*)?(Seq Scan|Sort|Incremental Sort)\b"),
+}
+
+
+def explain(statement):
+    """Return the plan of `statement` (an ORM Query or a SELECT) as a list of lines."""
+    statement = getattr(statement, "statement", statement)
+    rows = db.session.execute(Explain(statement)).all()
+    if db.session.get_bind().dialect.name == "sqlite":
+        return [row[-1] for row in rows]  # ✅ (id, parent, notused, detail)
+    return [row[0] for row in rows]
+
+
+def check_query_plans():
+    """EXPLAIN every hot query. Returns `{name: (plan_lines, problem_lines)}`."""
+    dialect = db.session.get_bind().dialect.name
+    if dialect not in PLAN_PROBLEMS:
+        raise RuntimeError(f"Query-plan check is not supported on {dialect}")
+
+    results = {}
+    try:
+        if dialect == "postgresql":
+            db.session.execute(text("SET LOCAL enable_seqscan = off"))
+            db.session.execute(text("SET LOCAL enable_sort = off"))
+        for name, build in HOT_QUERIES.items():
+            plan = explain(build())
+            results[name] = (plan, [line for line in plan if PLAN_PROBLEMS[dialect].search(line)])
+    finally:
+        db.session.rollback()  # ✅ Drop the SET LOCALs
+    return results
@@ -1,11 +1,30 @@
-from flask import Blueprint, request, jsonify, current_app
-import requests
-from app.models import User, Post, Comment, Follow, Like, Chat, Reaction, ProfessionalDetails,EmailNotificationSettings, ProfileVisibilitySettings, db
+from flask import Blueprint, request, jsonify, current_app, Response, stream_with_context
+from app.models import User, Post, Comment, Chat, ProfessionalDetails, db
 from flask_cors import CORS  # ✅ Allow React Native to connect
 from flask_restx import Namespace, Resource
 from app.utils import require_auth  # ✅ Import Keycloak authentication utilities
+from app.identity import invalidate_identity  # ✅ Identity resolution cache
+from app.keycloak_client import keycloak_client, KeycloakUnavailable  # ✅ Pooled Keycloak client
 from app.logging_setup import logger  # ✅ Import logger
 from app.api_models import register_models  # ✅ Import the function to register models
+from app.pagination import decode_cursor, parse_limit, split_page  # ✅ Cursor pagination helpers
+from app.timeline import fan_out_post, backfill_follow, prune_follow, read_timeline, favorite_posts_query  # ✅ Home timeline store
+from app.counters import bump_post_counter, reaction_summary  # ✅ Denormalized counters
+from app.mentions import record_mentions, read_mentions  # ✅ @mention index
+from app.cache import feed_cache  # ✅ Per-user feed response cache
+from app.toggles import toggle_like, toggle_follow, follow, unfollow, toggle_reaction  # ✅ Race-free toggles
+from app.write_behind import engagement_buffer  # ✅ Opt-in write-behind for likes/reactions
+from app.db_routing import use_replica  # ✅ Read-replica routing
+from app.events import event_bus  # ✅ Real-time push (SSE)
+from app.follows import followers_query, following_query, read_follow_page, followed_among  # ✅ Follow lists
+from app.chat import (  # ✅ Conversations, message history and inbox
+    PREVIEW_LENGTH, find_conversation, find_conversation_id, get_or_create_conversation_id, record_message, read_messages, read_inbox, mark_read
+)
+from app.settings import (  # ✅ Settings defaults + bulk upsert
+    email_notification_settings, profile_visibility_settings, hidden_profile_fields, invalidate_settings,
+    save_email_notification_settings, save_profile_visibility_settings,
+)
+from sqlalchemy.orm import joinedload, selectinload
 
 
 
@@ -19,6 +38,29 @@ CORS(main, resources={r"/api/*": {"origins": "*"}})
 models = register_models(main_api)  # ✅ Register models
 
 
+@main_api.errorhandler(KeycloakUnavailable)
+def handle_keycloak_unavailable(error):
+    """Fail fast with 503 when Keycloak is slow, down, or the circuit breaker is open."""
+    return {"message": "Authentication service is temporarily unavailable. Please try again."}, 503
+
+FEED_TYPES = ("all", "mentions", "favorites", "friends", "groups")
+
+
+def invalidate_post_feeds(post_id, *user_ids):
+    """Invalidate cached feeds of a post's author plus the given users after engagement changes.
+
+    Returns the author's id (None if the post doesn't exist).
+    """
+    author_id = db.session.query(Post.user_id).filter(Post.id == post_id).scalar()
+    feed_cache.invalidate(*[uid for uid in (author_id, *user_ids) if uid is not None])
+    return author_id
+
+
+def actor(user):
+    """Public fields of the user who triggered a real-time event."""
+    return {"id": user.id, "username": user.username}
+
+
 
 # -------------------------
 # 🚀 AUTHENTICATION ROUTES (Keycloak)
@@ -57,10 +99,6 @@ class Login(Resource):
         
         
 
-        keycloak_url = f"{current_app.config['KEYCLOAK_SERVER_URL']}/realms/{current_app.config['KEYCLOAK_REALM_NAME']}/protocol/openid-connect/token"
-        
-        logger.info(f"Keycloak URL: {keycloak_url}")  #✅ Log the URL
-                     
         payload = {
             "grant_type": "password",
             "client_id": current_app.config["KEYCLOAK_CLIENT_ID"],
@@ -69,8 +107,8 @@ class Login(Resource):
             "password": password
         }
 
-        response = requests.post(keycloak_url, data=payload, headers={"Content-Type": "application/x-www-form-urlencoded"})
-        logger.info(f"Keycloak response: {response.status_code} - {response.text}")  # ✅ Debug response
+        response = keycloak_client.token(payload)  # ✅ Pooled, timeout-bounded Keycloak call
+        logger.info("Keycloak login response: %s", response.status_code)  # ✅ Status only; the body carries tokens
 
 
         if response.status_code == 200:
@@ -85,7 +123,7 @@ class Login(Resource):
 
             # ✅ Get Keycloak roles
             keycloak_roles = user_info.get("realm_access", {}).get("roles", [])
-            logger.info(f"User roles from Keycloak: {keycloak_roles}")
+            logger.debug("User roles from Keycloak: %s", keycloak_roles)
 
             # Determine user type
             user_type = "professional" if "professional" in keycloak_roles else "standard"
@@ -93,7 +131,7 @@ class Login(Resource):
             # ✅ Ensure user exists in local DB
             user = User.query.filter_by(keycloak_id=user_info["sub"]).first()
             if not user:
-                logger.info(f"🔹 Creating new user {user_info['preferred_username']} in database...")
+                logger.info("🔹 Creating new user %s in database...", user_info['preferred_username'])
                 user = User(
                     keycloak_id=user_info["sub"],
                     username=user_info.get("preferred_username", username),
@@ -102,7 +140,7 @@ class Login(Resource):
                 )
                 db.session.add(user)
                 db.session.commit()
-                logger.info(f"✅ User {user.username} created successfully.")
+                logger.info("✅ User %s created successfully.", user.username)
 
             # ✅ If user is professional, ensure they have details
             if user.user_type == "professional":
@@ -113,7 +151,7 @@ class Login(Resource):
                         "set_professional_details_required": True
                     }, 200
 
-            logger.info(f"✅ User {user.username} logged in successfully.")
+            logger.info("✅ User %s logged in successfully.", user.username)
             return token_data, 200
 
         logger.error("❌ Invalid login credentials")
@@ -150,6 +188,7 @@ class SetUserType(Resource):
         # ✅ Update user type
         user.user_type = user_type
         db.session.commit()
+        invalidate_identity(keycloak_id)
 
         if user_type == "professional":
             # ✅ Ensure ProfessionalDetails are created
@@ -160,9 +199,9 @@ class SetUserType(Resource):
             )
             db.session.add(professional_details)
             db.session.commit()
-            logger.info(f"✅ User {user.username} set as a professional.")
+            logger.info("✅ User %s set as a professional.", user.username)
 
-        logger.info(f"✅ User {user.username} set as {user_type}.")
+        logger.info("✅ User %s set as %s.", user.username, user_type)
         return {"message": f"User type set to {user_type}"}, 200
 
 
@@ -174,12 +213,7 @@ class Logout(Resource):
     def post(self):
         """Logout user from Keycloak."""
         token = request.headers.get("Authorization").split(" ")[1]
-        keycloak_logout_url = f"{current_app.config['KEYCLOAK_SERVER_URL']}/realms/{current_app.config['KEYCLOAK_REALM_NAME']}/protocol/openid-connect/logout"
-
-        response = requests.post(
-            keycloak_logout_url,
-            headers={"Authorization": f"Bearer {token}"},
-        )
+        response = keycloak_client.logout(token)
 
         if response.status_code == 204:
             return {"message": "Logged out successfully"}, 200
@@ -196,7 +230,6 @@ class RefreshToken(Resource):
         if not refresh_token:
             return {"message": "Missing refresh token"}, 400
 
-        keycloak_url = f"{current_app.config['KEYCLOAK_SERVER_URL']}/realms/{current_app.config['KEYCLOAK_REALM_NAME']}/protocol/openid-connect/token"
         payload = {
             "grant_type": "refresh_token",
             "client_id": current_app.config["KEYCLOAK_CLIENT_ID"],
@@ -204,12 +237,12 @@ class RefreshToken(Resource):
             "refresh_token": refresh_token
         }
 
-        response = requests.post(keycloak_url, data=payload, headers={"Content-Type": "application/x-www-form-urlencoded"})
+        status_code, token_data = keycloak_client.refresh(payload)  # ✅ Coalesced per refresh token
 
-        if response.status_code == 200:
-            return response.json(), 200
+        if status_code == 200:
+            return token_data, 200
         
-        return {"message": "Failed to refresh token"}, response.status_code
+        return {"message": "Failed to refresh token"}, status_code
 
 
 # -------------------------
@@ -219,16 +252,17 @@ class RefreshToken(Resource):
 @main_api.route("/profile/<string:keycloak_id>")
 class UserProfile(Resource):
     @require_auth()
+    @use_replica  # ✅ Read-only: served from a replica
     @main_api.expect(models["auth_header"])  # ✅ Require Authorization Header
     @main_api.response(200, "Success", models["profile"])  # ✅ Ensure correct model
     def get(self, keycloak_id):
         """Get user profile and posts."""
-        logger.info(f"🔹 Fetching profile for Keycloak ID: {keycloak_id}")
+        logger.debug("🔹 Fetching profile for Keycloak ID: %s", keycloak_id)
 
         user = User.query.filter_by(keycloak_id=keycloak_id).first()
 
         if not user:
-            logger.warning(f"❌ User with Keycloak ID {keycloak_id} not found")
+            logger.warning("❌ User with Keycloak ID %s not found", keycloak_id)
             return {"message": "User not found"}, 404
 
         # ✅ Ensure all fields are JSON-serializable
@@ -258,8 +292,14 @@ class UserProfile(Resource):
             ]
         }
 
-        # 🔹 Log the response structure
-        logger.info(f"✅ Response Data: {response_data}")
+        # ✅ Blank the fields the owner hid from other users (settings snapshot, no query when cached)
+        if request.user["keycloak_id"] != keycloak_id:
+            hidden = hidden_profile_fields(keycloak_id)
+            for section in (response_data["contact_info"], response_data["education_info"]):
+                for field in hidden & section.keys():
+                    section[field] = ""
+
+        logger.info("✅ Profile %s returned with %d posts", keycloak_id, len(response_data["posts"]))
 
         # ✅ Return the response as a dictionary (DO NOT use `jsonify`)
         return response_data, 200
@@ -281,6 +321,7 @@ class UpdateProfile(Resource):
         user.bio = data.get("bio", user.bio)
         user.profile_pic = data.get("profile_pic", user.profile_pic)
         db.session.commit()
+        invalidate_identity(user.keycloak_id)
         return {"message": "Profile updated successfully"}, 200
     
     
@@ -332,19 +373,18 @@ class ChangePassword(Resource):
         if not new_password:
             return {"message": "New password is required"}, 400
 
-        user = User.query.filter_by(keycloak_id=request.user["keycloak_id"]).first()
+        user = request.identity  # ✅ Resolved once per request by require_auth
         if not user:
             return {"message": "User not found"}, 404
 
-        keycloak_admin_url = f"{current_app.config['KEYCLOAK_SERVER_URL']}/admin/realms/{current_app.config['KEYCLOAK_REALM_NAME']}/users/{user.keycloak_id}/reset-password"
         payload = {
             "type": "password",
             "value": new_password,
             "temporary": False
         }
-        headers = {"Authorization": f"Bearer {request.headers.get('Authorization').split()[1]}"}
+        token = request.headers.get("Authorization").split()[1]
 
-        response = requests.put(keycloak_admin_url, json=payload, headers=headers)
+        response = keycloak_client.reset_password(user.keycloak_id, payload, token)
 
         if response.status_code == 204:
             return {"message": "Password changed successfully"}, 200
@@ -366,7 +406,6 @@ class ResetPassword(Resource):
         if not email:
             return {"message": "Email is required"}, 400
 
-        keycloak_reset_url = f"{current_app.config['KEYCLOAK_SERVER_URL']}/realms/{current_app.config['KEYCLOAK_REALM_NAME']}/protocol/openid-connect/auth"
         payload = {
             "client_id": current_app.config["KEYCLOAK_CLIENT_ID"],
             "redirect_uri": current_app.config["FRONTEND_URL"],
@@ -376,7 +415,7 @@ class ResetPassword(Resource):
             "email": email
         }
 
-        response = requests.post(keycloak_reset_url, json=payload)
+        response = keycloak_client.send_reset_email(payload)
 
         if response.status_code == 200:
             return {"message": "Password reset email sent"}, 200
@@ -392,9 +431,7 @@ class EmailNotifications(Resource):
     @require_auth()
     def get(self):
         """Get email notification settings."""
-        user_id = request.user["keycloak_id"]
-        settings = EmailNotificationSettings.query.filter_by(user_id=user_id).all()
-        return [{"setting_id": s.setting_id, "value": s.value} for s in settings], 200
+        return email_notification_settings(request.user["keycloak_id"]), 200  # ✅ Defaults merged in one query
 
     @require_auth()
     @main_api.expect(models["auth_header"])  # ✅ Require Authorization Header
@@ -404,18 +441,9 @@ class EmailNotifications(Resource):
         data = request.json
         user_id = request.user["keycloak_id"]
 
-        for setting in data.get("settings", []):
-            setting_id = setting["setting_id"]
-            value = setting["value"]
-
-            existing_setting = EmailNotificationSettings.query.filter_by(user_id=user_id, setting_id=setting_id).first()
-            if existing_setting:
-                existing_setting.value = value
-            else:
-                new_setting = EmailNotificationSettings(user_id=user_id, setting_id=setting_id, value=value)
-                db.session.add(new_setting)
-
+        save_email_notification_settings(user_id, data.get("settings", []))  # ✅ One batched upsert
         db.session.commit()
+        invalidate_settings(user_id)
         return {"message": "Email notification settings updated"}, 200
 
 
@@ -428,9 +456,7 @@ class ProfileVisibility(Resource):
     @require_auth()
     def get(self):
         """Get profile visibility settings."""
-        user_id = request.user["keycloak_id"]
-        settings = ProfileVisibilitySettings.query.filter_by(user_id=user_id).all()
-        return [{"setting_id": s.setting_id, "value": s.value, "category": s.category} for s in settings], 200
+        return profile_visibility_settings(request.user["keycloak_id"]), 200  # ✅ Defaults merged in one query
 
     @require_auth()
     @main_api.expect(models["auth_header"])  # ✅ Require Authorization Header
@@ -440,19 +466,9 @@ class ProfileVisibility(Resource):
         data = request.json
         user_id = request.user["keycloak_id"]
 
-        for setting in data.get("settings", []):
-            setting_id = setting["setting_id"]
-            value = setting["value"]
-            category = setting["category"]
-
-            existing_setting = ProfileVisibilitySettings.query.filter_by(user_id=user_id, setting_id=setting_id).first()
-            if existing_setting:
-                existing_setting.value = value
-            else:
-                new_setting = ProfileVisibilitySettings(user_id=user_id, setting_id=setting_id, value=value, category=category)
-                db.session.add(new_setting)
-
+        save_profile_visibility_settings(user_id, data.get("settings", []))  # ✅ One batched upsert
         db.session.commit()
+        invalidate_settings(user_id)
         return {"message": "Profile visibility settings updated"}, 200
 
 
@@ -472,14 +488,18 @@ class DeleteAccount(Resource):
         if not user:
             return {"message": "User not found"}, 404
 
-        keycloak_delete_url = f"{current_app.config['KEYCLOAK_SERVER_URL']}/admin/realms/{current_app.config['KEYCLOAK_REALM_NAME']}/users/{user_id}"
-        headers = {"Authorization": f"Bearer {request.headers.get('Authorization').split()[1]}"}
+        token = request.headers.get("Authorization").split()[1]
 
-        response = requests.delete(keycloak_delete_url, headers=headers)
+        response = keycloak_client.delete_user(user_id, token)
 
         if response.status_code == 204:
             db.session.delete(user)
             db.session.commit()
+            invalidate_identity(user_id)
+            invalidate_settings(user_id)
+            return {"message": "Account deleted successfully"}, 200
+        return {"message": "Failed to delete account"}, response.status_code
+
 # -------------------------
 # 🚀 FEED & POSTS ROUTES
 # -------------------------
@@ -487,42 +507,72 @@ class DeleteAccount(Resource):
 @main_api.route("/feed")
 class Feed(Resource):
     @require_auth()
+    @use_replica  # ✅ Read-only: served from a replica
     @main_api.expect(models["auth_header"])  # ✅ Require Authorization Header
     @main_api.expect(models["feed_query"])  # ✅ Attach model
     def get(self):
-        """Fetch posts based on selected feed type (All Updates, Mentions, Favorites, Friends, Groups)."""
-        user = User.query.filter_by(keycloak_id=request.user["keycloak_id"]).first()  # ✅ Use Keycloak UUID
+        """Fetch one page of posts for the selected feed type (All Updates, Mentions, Favorites, Friends, Groups)."""
+        user = request.identity  # ✅ Resolved once per request by require_auth
         if not user:
             return {"message": "User not found"}, 404
 
         feed_type = request.args.get("feed_type", "all")  # ✅ Default to "all"
+        if feed_type not in FEED_TYPES:
+            feed_type = "all"
+
+        # ✅ Parse pagination arguments (opaque cursor + page size)
+        raw_cursor = request.args.get("cursor")
+        try:
+            limit = parse_limit(request.args.get("limit"))
+            cursor = decode_cursor(raw_cursor) if raw_cursor else None
+        except ValueError:
+            return {"message": "Invalid cursor or limit"}, 400
+
+        # ✅ Serve repeat opens from the feed cache
+        cache_key, cached = feed_cache.get(user.id, feed_type, raw_cursor, limit)
+        if cached is not None:
+            return cached, 200
+
+        # ✅ Load authors and reaction totals with the page instead of once per post
+        feed_options = (joinedload(Post.author), selectinload(Post.reaction_counts))
 
         # ✅ Fetch different types of posts based on the selected feed
-        if feed_type == "mentions":
-            posts = Post.query.filter(Post.content.contains(f"@{user.username}")).order_by(Post.timestamp.desc()).all()
+        if feed_type in ("all", "friends", "mentions"):
+            if feed_type == "mentions":
+                # ✅ Served from the mention index instead of scanning post content
+                post_ids, next_cursor = read_mentions(user.id, cursor=cursor, limit=limit)
+            else:
+                # ✅ Served from the materialized home timeline ("friends" excludes own posts)
+                post_ids, next_cursor = read_timeline(user.id, cursor=cursor, limit=limit, include_own=(feed_type == "all"))
+            posts_by_id = {post.id: post for post in Post.query.options(*feed_options).filter(Post.id.in_(post_ids)).all()}
+            posts = [posts_by_id[post_id] for post_id in post_ids if post_id in posts_by_id]
         elif feed_type == "favorites":
-            posts = Post.query.join(Like).filter(Like.user_id == user.id).order_by(Post.timestamp.desc()).all()
-        elif feed_type == "friends":
-            friend_ids = [follow.followed_id for follow in user.following]
-            posts = Post.query.filter(Post.user_id.in_(friend_ids)).order_by(Post.timestamp.desc()).all()
-        elif feed_type == "groups":
+            engagement_buffer.flush(user_id=user.id)  # ✅ The user's own buffered likes must be in the list
+            query = favorite_posts_query(user.id, cursor=cursor, limit=limit).options(*feed_options)
+            posts, next_cursor = split_page(query.all(), limit)  # ✅ Like.post_timestamp is a copy of Post.timestamp
+        else:  # "groups"
             # 🔹 Future: Implement group post filtering
-            posts = []
-        else:  # "all"
-            following = [follow.followed_id for follow in user.following]
-            following.append(user.id)  # Include own posts
-            posts = Post.query.filter(Post.user_id.in_(following)).order_by(Post.timestamp.desc()).all()
-
-        return [{
-            "id": post.id,
-            "author": post.author.username,
-            "author_pic": post.author.profile_pic,
-            "content": post.content,
-            "image": post.image,
-            "timestamp": post.timestamp.isoformat(),
-            "likes": len(post.likes),
-            "comments": len(post.comments)
-        } for post in posts], 200
+            posts, next_cursor = [], None
+
+        posts_data = []
+        for post in posts:
+            # ✅ Include likes/reactions still waiting in the write-behind buffer
+            likes, reactions = engagement_buffer.merged_counts(post.id, post.like_count, reaction_summary(post))
+            posts_data.append({
+                "id": post.id,
+                "author": post.author.username,
+                "author_pic": post.author.profile_pic,
+                "content": post.content,
+                "image": post.image,
+                "timestamp": post.timestamp.isoformat(),
+                "likes": likes,
+                "comments": post.comment_count,
+                "reactions": reactions
+            })
+
+        response_data = {"posts": posts_data, "next_cursor": next_cursor}
+        feed_cache.set(cache_key, response_data)  # ✅ Under the version read before the DB query
+        return response_data, 200
 
 
 
@@ -534,7 +584,7 @@ class CreatePost(Resource):
     def post(self):
         """Create a new post."""
         data = request.json
-        user = User.query.filter_by(keycloak_id=request.user["keycloak_id"]).first()  # ✅ Use Keycloak UUID
+        user = request.identity  # ✅ Resolved once per request by require_auth
         if not user:
             return {"message": "User not found"}, 404
 
@@ -543,7 +593,11 @@ class CreatePost(Resource):
 
         post = Post(content=data["content"], user_id=user.id)
         db.session.add(post)
+        db.session.flush()  # ✅ Assign post.id / timestamp before fan-out
+        timeline_user_ids = fan_out_post(post)
+        mentioned_user_ids = record_mentions(post.id, post.content, post.timestamp)
         db.session.commit()
+        feed_cache.invalidate(*timeline_user_ids, *mentioned_user_ids)
         return {"message": "Post created successfully"}, 201
 
 @main_api.route("/post/<int:post_id>/reaction")
@@ -556,7 +610,7 @@ class ReactToPost(Resource):
         data = request.json
         reaction_type = data.get("reaction_type")  # Expected values: like, love, laugh, angry, etc.
         
-        user = User.query.filter_by(keycloak_id=request.user["keycloak_id"]).first()
+        user = request.identity  # ✅ Resolved once per request by require_auth
         if not user:
             return {"message": "User not found"}, 404
 
@@ -564,23 +618,18 @@ class ReactToPost(Resource):
         if not post:
             return {"message": "Post not found"}, 404
 
-        # ✅ Check if user already reacted to this post
-        existing_reaction = Reaction.query.filter_by(user_id=user.id, post_id=post_id).first()
+        # ✅ Remove if same type, replace if different, add if none (race-free, counters included)
+        if engagement_buffer.enabled:
+            outcome = engagement_buffer.toggle_reaction(user.id, post_id, reaction_type)  # ✅ Written in the next batch
+        else:
+            outcome = toggle_reaction(user.id, post_id, reaction_type)
+            db.session.commit()
+        feed_cache.invalidate(user.id, post.user_id)
 
-        if existing_reaction:
-            if existing_reaction.reaction_type == reaction_type:
-                db.session.delete(existing_reaction)  # Remove reaction if same type
-                db.session.commit()
-                return {"message": f"Removed {reaction_type} reaction"}, 200
-            else:
-                existing_reaction.reaction_type = reaction_type  # Update reaction type
-                db.session.commit()
-                return {"message": f"Updated reaction to {reaction_type}"}, 200
-        
-        # ✅ Add new reaction
-        new_reaction = Reaction(user_id=user.id, post_id=post_id, reaction_type=reaction_type)
-        db.session.add(new_reaction)
-        db.session.commit()
+        if outcome == "removed":
+            return {"message": f"Removed {reaction_type} reaction"}, 200
+        if outcome == "updated":
+            return {"message": f"Updated reaction to {reaction_type}"}, 200
         return {"message": f"Added {reaction_type} reaction"}, 201
 
 
@@ -595,22 +644,25 @@ class FollowUser(Resource):
     @main_api.expect(models["followers"])  # ✅ Attach model
     def post(self, user_id):
         """Follow or unfollow a user."""
-        user = User.query.filter_by(keycloak_id=request.user["keycloak_id"]).first()  # ✅ Use Keycloak UUID
+        user = request.identity  # ✅ Resolved once per request by require_auth
         target_user = User.query.get(user_id)
 
         if not user or not target_user:
             return {"message": "User not found"}, 404
 
-        existing_follow = Follow.query.filter_by(follower_id=user.id, followed_id=user_id).first()
+        if user.id == user_id:
+            return {"message": "You cannot follow yourself"}, 400
 
-        if existing_follow:
-            db.session.delete(existing_follow)
+        if not toggle_follow(user.id, user_id):  # ✅ Race-free toggle, counters included
+            prune_follow(user.id, user_id)
             db.session.commit()
+            feed_cache.invalidate(user.id)
             return {"message": "Unfollowed successfully"}
 
-        new_follow = Follow(follower_id=user.id, followed_id=user_id)
-        db.session.add(new_follow)
+        backfill_follow(user.id, user_id)
         db.session.commit()
+        feed_cache.invalidate(user.id)
+        event_bus.publish([user_id], "follow", {"user": actor(user)})
         return {"message": "Followed successfully"}
     
     # -------------------------
@@ -624,23 +676,29 @@ class LikePost(Resource):
     @main_api.expect(models["like_post"])  # ✅ Attach model
     def post(self, post_id):
         """Like or unlike a post."""
-        user = User.query.filter_by(keycloak_id=request.user["keycloak_id"]).first()
+        user = request.identity  # ✅ Resolved once per request by require_auth
         if not user:
-            logger.warning(f"❌ User with Keycloak ID {request.user['keycloak_id']} not found")
+            logger.warning("❌ User with Keycloak ID %s not found", request.user['keycloak_id'])
             return {"message": "User not found"}, 404
 
-        existing_like = Like.query.filter_by(user_id=user.id, post_id=post_id).first()
+        if not Post.query.get(post_id):
+            return {"message": "Post not found"}, 404
 
-        if existing_like:
-            db.session.delete(existing_like)
+        if engagement_buffer.enabled:
+            liked = engagement_buffer.toggle_like(user.id, post_id)  # ✅ Acknowledged now, written in the next batch
+        else:
+            liked = toggle_like(user.id, post_id)  # ✅ Race-free toggle, counter included
             db.session.commit()
-            logger.info(f"🔹 User {user.username} unliked post {post_id}")
+
+        if not liked:
+            invalidate_post_feeds(post_id, user.id)
+            logger.info("🔹 User %s unliked post %s", user.username, post_id)
             return {"message": "Like removed"}, 200
 
-        new_like = Like(user_id=user.id, post_id=post_id)
-        db.session.add(new_like)
-        db.session.commit()
-        logger.info(f"✅ User {user.username} liked post {post_id}")
+        author_id = invalidate_post_feeds(post_id, user.id)
+        if author_id is not None and author_id != user.id:
+            event_bus.publish([author_id], "like", {"post_id": post_id, "user": actor(user)})
+        logger.info("✅ User %s liked post %s", user.username, post_id)
         return {"message": "Post liked"}, 201
 
 # -------------------------
@@ -654,7 +712,7 @@ class AddComment(Resource):
     @main_api.expect(models["add_comment"])
     def post(self, post_id):
         """Add a comment to a post."""
-        user = User.query.filter_by(keycloak_id=request.user["keycloak_id"]).first()
+        user = request.identity  # ✅ Resolved once per request by require_auth
         if not user:
             return {"message": "User not found"}, 404
 
@@ -666,24 +724,38 @@ class AddComment(Resource):
 
         comment = Comment(content=content, user_id=user.id, post_id=post_id)
         db.session.add(comment)
+        db.session.flush()
+        bump_post_counter(post_id, Post.comment_count, 1)
+        mentioned_user_ids = record_mentions(post_id, comment.content, comment.timestamp)
+        event = {"post_id": post_id, "comment_id": comment.id, "content": content[:PREVIEW_LENGTH], "user": actor(user)}
         db.session.commit()
+        author_id = invalidate_post_feeds(post_id, user.id, *mentioned_user_ids)
+        if author_id is not None and author_id != user.id:
+            event_bus.publish([author_id], "comment", event)
         return {"message": "Comment added"}, 201
 
 
 @main_api.route("/post/<int:post_id>/comments")
 class GetComments(Resource):
-    @main_api.expect(models["get_messages"])  # ✅ Attach model
+    @use_replica  # ✅ Read-only: served from a replica
+    @main_api.expect(models["get_comments"])  # ✅ Attach model
     def get(self, post_id):
         """Fetch all comments for a post."""
-        comments = Comment.query.filter_by(post_id=post_id).all()
+        comments = (
+            db.session.query(Comment, User.username)
+            .join(User, User.id == Comment.user_id)  # ✅ Authors in the same query
+            .filter(Comment.post_id == post_id)
+            .order_by(Comment.timestamp.asc(), Comment.id.asc())
+            .all()
+        )
         return [
             {
                 "id": comment.id,
                 "content": comment.content,
-                "author": comment.user.username,
+                "author": username,
                 "timestamp": comment.timestamp.isoformat() if comment.timestamp else None,
             }
-            for comment in comments
+            for comment, username in comments
         ], 200
 
 
@@ -698,55 +770,84 @@ class FollowUser(Resource):
     @main_api.expect(models["follow"])  # ✅ Attach model
     def post(self, user_id):
         """Follow or unfollow a user."""
-        user = User.query.filter_by(keycloak_id=request.user["keycloak_id"]).first()
+        user = request.identity  # ✅ Resolved once per request by require_auth
         target_user = User.query.get(user_id)
 
         if not user or not target_user:
             return {"message": "User not found"}, 404
 
+        if user.id == user_id:
+            return {"message": "You cannot follow yourself"}, 400
+
         follow_action = request.json.get("action", "follow")  # Default to "follow"
 
         if follow_action == "unfollow":
-            existing_follow = Follow.query.filter_by(follower_id=user.id, followed_id=user_id).first()
-            if existing_follow:
-                db.session.delete(existing_follow)
+            if unfollow(user.id, user_id):  # ✅ One conditional DELETE, counters included
+                prune_follow(user.id, user_id)
                 db.session.commit()
+                feed_cache.invalidate(user.id)
                 return {"message": "Unfollowed successfully"}, 200
             return {"message": "You are not following this user"}, 400
 
         # Follow the user
-        existing_follow = Follow.query.filter_by(follower_id=user.id, followed_id=user_id).first()
-        if existing_follow:
+        if not follow(user.id, user_id):  # ✅ INSERT ... ON CONFLICT DO NOTHING, counters included
             return {"message": "Already following"}, 400
 
-        new_follow = Follow(follower_id=user.id, followed_id=user_id)
-        db.session.add(new_follow)
+        backfill_follow(user.id, user_id)
         db.session.commit()
+        feed_cache.invalidate(user.id)
+        event_bus.publish([user_id], "follow", {"user": actor(user)})
         return {"message": "Followed successfully"}, 201
 
 
+def follow_list_response(user_id, build_query, total_column):
+    """One page of a follower/following list, with the stored total and the viewer's follow state."""
+    try:
+        before = int(request.args["before"]) if request.args.get("before") else None
+        limit = parse_limit(request.args.get("limit"))
+    except ValueError:
+        return {"message": "Invalid cursor or limit"}, 400
+
+    total = db.session.query(total_column).filter(User.id == user_id).scalar()  # ✅ Stored counter, no COUNT(*)
+    if total is None:
+        return {"message": "User not found"}, 404
+
+    rows, next_cursor = read_follow_page(build_query(user_id, before=before, limit=limit), limit)
+    viewer = request.identity
+    followed = followed_among(viewer.id if viewer else None, [row.id for row in rows])  # ✅ One lookup per page
+    return {
+        "users": [
+            {
+                "id": row.id,
+                "username": row.username,
+                "profile_pic": row.profile_pic,
+                "followed_by_viewer": row.id in followed,
+            }
+            for row in rows
+        ],
+        "total": total,
+        "next_cursor": next_cursor,
+    }, 200
+
+
 @main_api.route("/followers/<int:user_id>")
 class GetFollowers(Resource):
+    @require_auth(optional=True)  # ✅ Anonymous allowed; a viewer also gets `followed_by_viewer`
+    @use_replica  # ✅ Read-only: served from a replica
     @main_api.expect(models["followers"])  # ✅ Attach model
     def get(self, user_id):
-        """Fetch all followers of a user."""
-        followers = Follow.query.filter_by(followed_id=user_id).all()
-        return [
-            {"id": follow.follower_id, "username": follow.follower.username}
-            for follow in followers
-        ], 200
+        """Fetch one page of a user's followers (newest first)."""
+        return follow_list_response(user_id, followers_query, User.follower_count)
 
 
 @main_api.route("/following/<int:user_id>")
 class GetFollowing(Resource):
+    @require_auth(optional=True)  # ✅ Anonymous allowed; a viewer also gets `followed_by_viewer`
+    @use_replica  # ✅ Read-only: served from a replica
     @main_api.expect(models["following"])  # ✅ Attach model
     def get(self, user_id):
-        """Fetch all users the current user is following."""
-        following = Follow.query.filter_by(follower_id=user_id).all()
-        return [
-            {"id": follow.followed_id, "username": follow.followed.username}
-            for follow in following
-        ], 200
+        """Fetch one page of the users a user is following (newest first)."""
+        return follow_list_response(user_id, following_query, User.following_count)
 
 
 # -------------------------
@@ -760,7 +861,7 @@ class SendMessage(Resource):
     @main_api.expect(models["send_message"])  # ✅ Attach model
     def post(self):
         """Send a private message."""
-        user = User.query.filter_by(keycloak_id=request.user["keycloak_id"]).first()
+        user = request.identity  # ✅ Resolved once per request by require_auth
         if not user:
             return {"message": "User not found"}, 404
 
@@ -773,18 +874,30 @@ class SendMessage(Resource):
             return {"message": "Message and receiver ID are required"}, 400
 
         if user.id == receiver_id:
-            logger.warning(f"❌ User {user.username} tried to message themselves")
+            logger.warning("❌ User %s tried to message themselves", user.username)
             return {"message": "You cannot message yourself"}, 400
 
         receiver = User.query.get(receiver_id)
         if not receiver:
-            logger.warning(f"❌ Receiver ID {receiver_id} not found")
+            logger.warning("❌ Receiver ID %s not found", receiver_id)
             return {"message": "Receiver not found"}, 404
 
-        new_message = Chat(sender_id=user.id, receiver_id=receiver_id, message=message)
+        conversation_id = get_or_create_conversation_id(user.id, receiver.id)
+        new_message = Chat(conversation_id=conversation_id, sender_id=user.id, receiver_id=receiver.id, message=message)
         db.session.add(new_message)
+        db.session.flush()
+        record_message(new_message)  # ✅ Inbox preview + unread counter, in the same transaction
+        event = {
+            "id": new_message.id,
+            "conversation_id": conversation_id,
+            "sender": actor(user),
+            "receiver_id": receiver.id,
+            "message": message,
+            "timestamp": new_message.timestamp.isoformat(),
+        }
         db.session.commit()
-        logger.info(f"✅ Message sent from {user.username} to {receiver.username}")
+        event_bus.publish([receiver.id, user.id], "message", event)  # ✅ The sender's other devices too
+        logger.info("✅ Message sent from %s to %s", user.username, receiver.username)
         return {"message": "Message sent successfully"}, 201
 
 
@@ -794,25 +907,134 @@ class GetMessages(Resource):
     @main_api.expect(models["auth_header"])  # ✅ Require Authorization Header
     @main_api.expect(models["get_messages"])  # ✅ Attach model
     def get(self, receiver_id):
-        """Fetch chat messages between two users."""
-        user = User.query.filter_by(keycloak_id=request.user["keycloak_id"]).first()
+        """Fetch one page of chat messages between two users (oldest first)."""
+        user = request.identity  # ✅ Resolved once per request by require_auth
         if not user:
             return {"message": "User not found"}, 404
 
-        messages = Chat.query.filter(
-            ((Chat.sender_id == user.id) & (Chat.receiver_id == receiver_id))
-            | ((Chat.sender_id == receiver_id) & (Chat.receiver_id == user.id))
-        ).order_by(Chat.timestamp.asc()).all()
+        # ✅ Parse pagination arguments (message-id cursors + page size)
+        try:
+            before = int(request.args["before"]) if request.args.get("before") else None
+            after = int(request.args["after"]) if request.args.get("after") else None
+            limit = parse_limit(request.args.get("limit"))
+        except ValueError:
+            return {"message": "Invalid cursor or limit"}, 400
+        if before is not None and after is not None:
+            return {"message": "Use either 'before' or 'after', not both"}, 400
+
+        conversation = find_conversation(user.id, receiver_id)
+        if conversation is None:
+            return {"messages": [], "before_cursor": None, "after_cursor": None}, 200
+
+        messages, before_cursor, after_cursor = read_messages(
+            conversation.id, before=before, after=after, limit=limit,
+            archived_through_id=conversation.archived_through_id,  # ✅ Older pages come from the chat archive
+        )
 
-        return [
-            {
-                "sender": msg.sender.username,
-                "receiver": msg.receiver.username,
-                "message": msg.message,
-                "timestamp": msg.timestamp.isoformat(),
-            }
-            for msg in messages
-        ], 200
+        # ✅ Both participants' usernames in one query per response
+        usernames = dict(db.session.query(User.id, User.username).filter(User.id.in_((user.id, receiver_id))).all())
+
+        return {
+            "messages": [
+                {
+                    "id": msg.id,
+                    "sender": usernames.get(msg.sender_id),
+                    "receiver": usernames.get(msg.receiver_id),
+                    "message": msg.message,
+                    "timestamp": msg.timestamp.isoformat(),
+                }
+                for msg in messages
+            ],
+            "before_cursor": before_cursor,
+            "after_cursor": after_cursor,
+        }, 200
+
+@main_api.route("/inbox")
+class Inbox(Resource):
+    @require_auth()
+    @use_replica  # ✅ Read-only: served from a replica
+    @main_api.expect(models["auth_header"])  # ✅ Require Authorization Header
+    @main_api.expect(models["inbox_query"])  # ✅ Attach model
+    def get(self):
+        """List the user's conversations, most recent first, with last-message preview and unread count."""
+        user = request.identity  # ✅ Resolved once per request by require_auth
+        if not user:
+            return {"message": "User not found"}, 404
+
+        try:
+            limit = parse_limit(request.args.get("limit"))
+            cursor = decode_cursor(request.args["cursor"]) if request.args.get("cursor") else None
+        except ValueError:
+            return {"message": "Invalid cursor or limit"}, 400
+
+        rows, next_cursor = read_inbox(user.id, cursor=cursor, limit=limit)
+        return {
+            "conversations": [
+                {
+                    "conversation_id": row.conversation_id,
+                    "user": {"id": row.user_id, "username": row.username, "profile_pic": row.profile_pic},
+                    "last_message": {
+                        "id": row.last_message_id,
+                        "preview": row.last_message_preview,
+                        "from_me": row.last_sender_id == user.id,
+                        "timestamp": row.last_message_at.isoformat(),
+                    } if row.last_message_id else None,
+                    "unread_count": row.unread_count,
+                }
+                for row in rows
+            ],
+            "next_cursor": next_cursor,
+        }, 200
+
+
+@main_api.route("/mark_read/<int:receiver_id>")
+class MarkRead(Resource):
+    @require_auth()
+    @main_api.expect(models["auth_header"])  # ✅ Require Authorization Header
+    @main_api.expect(models["mark_read"])  # ✅ Attach model
+    def post(self, receiver_id):
+        """Mark the conversation with a user as read (up to `message_id`, default the latest message)."""
+        user = request.identity  # ✅ Resolved once per request by require_auth
+        if not user:
+            return {"message": "User not found"}, 404
+
+        message_id = (request.get_json(silent=True) or {}).get("message_id")
+        if message_id is not None and not isinstance(message_id, int):
+            return {"message": "message_id must be an integer"}, 400
+
+        conversation_id = find_conversation_id(user.id, receiver_id)
+        if conversation_id is None:
+            return {"message": "Conversation not found"}, 404
+
+        unread_count = mark_read(user.id, conversation_id, message_id)
+        db.session.commit()
+        return {"message": "Conversation marked as read", "unread_count": unread_count}, 200
+
+@main_api.route("/events")
+class EventStream(Resource):
+    @require_auth()
+    @main_api.expect(models["auth_header"])  # ✅ Require Authorization Header
+    @main_api.expect(models["events_query"])  # ✅ Attach model
+    def get(self):
+        """Server-sent event stream of the user's new messages, comments, likes and follows."""
+        user = request.identity  # ✅ Resolved once per request by require_auth
+        if not user:
+            return {"message": "User not found"}, 404
+
+        # ✅ Browsers send Last-Event-ID on reconnect; other clients may pass it as a query argument
+        last_event_id = request.headers.get("Last-Event-ID") or request.args.get("last_event_id")
+        try:
+            last_event_id = int(last_event_id) if last_event_id else None
+        except ValueError:
+            return {"message": "Invalid Last-Event-ID"}, 400
+
+        subscription = event_bus.subscribe(user.id, last_event_id)
+        db.session.close()  # ✅ Don't hold a pooled connection for the life of the stream
+        return Response(
+            stream_with_context(event_bus.stream(subscription)),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},  # ✅ No proxy buffering
+        )
 
 # ✅ Register the API correctly
 #api.add_namespace(main_namespace, path="/api")
@@ -0,0 +1,194 @@
+import itertools
+import threading
+from collections import namedtuple
+from types import MappingProxyType
+from sqlalchemy import select, update
+from app.cache import LRUCache, SHARED_CACHE_BACKENDS
+from app.database import upsert_insert
+from app.models import db, EmailNotificationSettings, ProfileVisibilitySettings
+
+# -------------------------
+# 🔹 Per-user Settings (defaults + bulk upsert)
+# -------------------------
+# Only settings a user has changed are stored. Reads merge the stored rows over
+# these defaults; writes apply the whole payload in one INSERT ... ON CONFLICT
+# DO UPDATE against the unique (user_id, setting_id) index.
+
+DEFAULT_EMAIL_NOTIFICATIONS = {
+    "new_follower": True,
+    "post_liked": True,
+    "post_commented": True,
+    "post_reaction": True,
+    "mentioned": True,
+    "new_message": True,
+}
+
+# setting_id -> (value, category); setting ids match the profile's contact/education field names
+DEFAULT_PROFILE_VISIBILITY = {
+    "email": ("visible", "Contact"),
+    "phone": ("visible", "Contact"),
+    "address": ("visible", "Contact"),
+    "website": ("visible", "Contact"),
+    "birthday": ("visible", "Education And Other Information"),
+    "education": ("visible", "Education And Other Information"),
+    "institution": ("visible", "Education And Other Information"),
+    "employment": ("visible", "Education And Other Information"),
+}
+
+
+def upsert_settings(model, user_id, rows, update_columns):
+    """Insert or update `rows` (dicts with setting_id + values) for `user_id` in one statement.
+
+    Dialects without ON CONFLICT fall back to one SELECT plus two executemany batches.
+    """
+    rows = list({row["setting_id"]: {**row, "user_id": user_id} for row in rows}.values())  # ✅ Last one wins
+    if not rows:
+        return
+
+    stmt = upsert_insert(db.session, model)
+    if stmt is not None:
+        stmt = stmt.values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[model.user_id, model.setting_id],
+            set_={column: getattr(stmt.excluded, column) for column in update_columns},
+        )
+        db.session.execute(stmt)
+        return
+
+    existing = dict(db.session.execute(
+        select(model.setting_id, model.id).where(model.user_id == user_id, model.setting_id.in_([r["setting_id"] for r in rows]))
+    ).all())
+    updates = [{"id": existing[r["setting_id"]], **{c: r[c] for c in update_columns}} for r in rows if r["setting_id"] in existing]
+    inserts = [r for r in rows if r["setting_id"] not in existing]
+    if updates:
+        db.session.execute(update(model), updates)  # ✅ Bulk UPDATE by primary key
+    if inserts:
+        db.session.execute(model.__table__.insert(), inserts)
+
+
+# -------------------------
+# 🔹 Per-user Settings Snapshot Cache
+# -------------------------
+# One immutable, defaults-applied snapshot per user, so hot paths (profile field
+# filtering, notification dispatch) check a preference without a query. The
+# settings POST endpoints invalidate it after commit by bumping a per-user
+# version; a snapshot is only served while its version is current, and a read
+# that raced an invalidation is never cached as current.
+#
+# With a shared tier (SETTINGS_CACHE_SHARED_BACKEND), versions live there, so
+# an invalidation on one worker is seen by every worker on its next read.
+# Without one, versions are per process and snapshots only live for
+# SETTINGS_CACHE_LOCAL_TTL seconds, which bounds how long another worker can
+# still show a field the user just hid.
+
+SettingsSnapshot = namedtuple("SettingsSnapshot", ["version", "email_notifications", "profile_visibility", "hidden_fields"])
+
+settings_cache = LRUCache(maxsize=10000, ttl=5)
+_shared_versions = None
+_settings_versions = LRUCache(maxsize=10000, ttl=float("inf"))
+_version_ids = itertools.count(1)
+_versions_lock = threading.Lock()
+
+
+def init_app(app):
+    """Configure the snapshot cache from SETTINGS_CACHE_* settings."""
+    global settings_cache, _shared_versions, _settings_versions
+    backend = app.config.get("SETTINGS_CACHE_SHARED_BACKEND")
+    _shared_versions = SHARED_CACHE_BACKENDS[backend]() if backend else None
+    max_entries = app.config.get("SETTINGS_CACHE_MAX_ENTRIES", 10000)
+    ttl = app.config.get("SETTINGS_CACHE_TTL", 600) if _shared_versions else app.config.get("SETTINGS_CACHE_LOCAL_TTL", 5)
+    settings_cache = LRUCache(maxsize=max_entries, ttl=ttl)
+    # ✅ Bounded: a forgotten version is replaced by a never-used one, which only costs a reload
+    _settings_versions = LRUCache(maxsize=max_entries, ttl=float("inf"))
+
+
+def _settings_version(user_id):
+    if _shared_versions is not None:
+        return _shared_versions.get(f"settings_version:{user_id}") or 0
+    with _versions_lock:
+        version = _settings_versions.get(user_id)
+        if version is None:
+            version = next(_version_ids)
+            _settings_versions.set(user_id, version)
+        return version
+
+
+def settings_snapshot(user_id):
+    """Return the user's SettingsSnapshot, loading it (two small queries) on a miss."""
+    version = _settings_version(user_id)
+    snapshot = settings_cache.get(user_id)
+    if snapshot is not None and snapshot.version == version:
+        return snapshot
+
+    notifications = dict(DEFAULT_EMAIL_NOTIFICATIONS)
+    notifications.update(db.session.execute(
+        select(EmailNotificationSettings.setting_id, EmailNotificationSettings.value)
+        .where(EmailNotificationSettings.user_id == user_id)
+    ).all())
+    visibility = dict(DEFAULT_PROFILE_VISIBILITY)
+    visibility.update(
+        (setting_id, (value, category)) for setting_id, value, category in db.session.execute(
+            select(ProfileVisibilitySettings.setting_id, ProfileVisibilitySettings.value, ProfileVisibilitySettings.category)
+            .where(ProfileVisibilitySettings.user_id == user_id)
+        )
+    )
+
+    snapshot = SettingsSnapshot(
+        version=version,
+        email_notifications=MappingProxyType(notifications),
+        profile_visibility=MappingProxyType(visibility),
+        hidden_fields=frozenset(setting_id for setting_id, (value, _) in visibility.items() if value == "hidden"),
+    )
+    settings_cache.set(user_id, snapshot)  # ✅ Tagged with the version read before the queries
+    return snapshot
+
+
+def invalidate_settings(user_id):
+    """Drop the user's snapshot on every worker (call after committing a settings change)."""
+    if _shared_versions is not None:
+        _shared_versions.incr(f"settings_version:{user_id}")
+    else:
+        with _versions_lock:
+            _settings_versions.set(user_id, next(_version_ids))
+    settings_cache.delete(user_id)
+
+
+def notification_enabled(user_id, setting_id):
+    """Whether the user wants email for `setting_id` (unknown settings default to on)."""
+    return bool(settings_snapshot(user_id).email_notifications.get(setting_id, True))
+
+
+def hidden_profile_fields(user_id):
+    """Profile field names the user hid from other users."""
+    return settings_snapshot(user_id).hidden_fields
+
+
+def email_notification_settings(user_id):
+    """Every email notification setting for `user_id`, stored values over defaults."""
+    values = settings_snapshot(user_id).email_notifications
+    return [{"setting_id": setting_id, "value": value} for setting_id, value in values.items()]
+
+
+def profile_visibility_settings(user_id):
+    """Every profile visibility setting for `user_id`, stored values over defaults."""
+    values = settings_snapshot(user_id).profile_visibility
+    return [
+        {"setting_id": setting_id, "value": value, "category": category}
+        for setting_id, (value, category) in values.items()
+    ]
+
+
+def save_email_notification_settings(user_id, settings):
+    upsert_settings(
+        EmailNotificationSettings, user_id,
+        [{"setting_id": s["setting_id"], "value": s["value"]} for s in settings],
+        update_columns=["value"],
+    )
+
+
+def save_profile_visibility_settings(user_id, settings):
+    upsert_settings(
+        ProfileVisibilitySettings, user_id,
+        [{"setting_id": s["setting_id"], "value": s["value"], "category": s["category"]} for s in settings],
+        update_columns=["value"],
+    )
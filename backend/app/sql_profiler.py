@@ -0,0 +1,112 @@
+import re
+import time
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.logging_setup import logger, slow_query_logger
+
+# -------------------------
+# 🔹 Per-request SQL Profiler
+# -------------------------
+# When SQL_PROFILER_ENABLED is set, a request carrying the SQL_PROFILER_HEADER
+# header records every statement it runs, grouped by statement shape. Shapes
+# repeated SQL_N_PLUS_ONE_THRESHOLD times or more are reported as likely N+1
+# lazy loads. Statements slower than SQL_SLOW_QUERY_MS always go to the
+# dedicated slow-query log, whether or not the request is profiled.
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+def statement_shape(statement):
+    """Normalize a SQL statement so repeated executions with different values compare equal."""
+    shape = _WHITESPACE.sub(" ", statement).strip()
+    shape = _LITERAL.sub("?", shape)
+    return _IN_LIST.sub("(?)", shape)
+
+
+class RequestProfile:
+    def __init__(self):
+        self.query_count = 0
+        self.total_time = 0.0
+        self.shapes = {}  # shape -> [count, seconds]
+
+    def record(self, statement, elapsed):
+        self.query_count += 1
+        self.total_time += elapsed
+        stats = self.shapes.setdefault(statement_shape(statement), [0, 0.0])
+        stats[0] += 1
+        stats[1] += elapsed
+
+    def repeated(self, threshold):
+        """Shapes executed at least `threshold` times, most frequent first."""
+        return sorted(
+            ((shape, count, seconds) for shape, (count, seconds) in self.shapes.items() if count >= threshold),
+            key=lambda item: item[1], reverse=True,
+        )
+
+
+# -------------------------
+# 🔹 Engine Events
+# -------------------------
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._profiler_query_start = time.perf_counter()  # ✅ Dies with the statement, even one that raises
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - context._profiler_query_start
+    if not has_request_context():
+        return
+
+    profile = g.get("sql_profile")
+    if profile is not None:
+        profile.record(statement, elapsed)
+
+    slow_ms = current_app.config.get("SQL_SLOW_QUERY_MS", 200)
+    if slow_ms and elapsed * 1000 >= slow_ms:
+        slow_query_logger.warning(
+            "Slow SQL (%.1f ms) on %s: %s", elapsed * 1000, request.endpoint, _WHITESPACE.sub(" ", statement),
+            extra={"duration_ms": round(elapsed * 1000, 1), "endpoint": request.endpoint, "executemany": executemany},
+        )
+
+
+# -------------------------
+# 🔹 Request Hooks
+# -------------------------
+def _before_request():
+    header = current_app.config.get("SQL_PROFILER_HEADER", "X-Profile-SQL")
+    if request.headers.get(header, "").lower() in ("1", "true", "yes"):
+        g.sql_profile = RequestProfile()
+
+
+def _after_request(response):
+    profile = g.pop("sql_profile", None)
+    if profile is None:
+        return response
+
+    threshold = current_app.config.get("SQL_N_PLUS_ONE_THRESHOLD", 5)
+    suspects = profile.repeated(threshold)
+    for shape, count, seconds in suspects:
+        logger.warning("⚠️ Possible N+1 on %s: %d× (%.1f ms) %s", request.endpoint, count, seconds * 1000, shape)
+
+    logger.info(
+        "🔹 SQL profile for %s: %d queries in %.1f ms", request.endpoint, profile.query_count, profile.total_time * 1000,
+        extra={"endpoint": request.endpoint, "query_count": profile.query_count,
+               "db_time_ms": round(profile.total_time * 1000, 1), "n_plus_one_suspects": len(suspects),
+               "sample": False},
+    )
+    response.headers["X-SQL-Query-Count"] = str(profile.query_count)
+    response.headers["X-SQL-Time-Ms"] = f"{profile.total_time * 1000:.1f}"
+    response.headers["X-SQL-N-Plus-One"] = str(len(suspects))
+    return response
+
+
+def register_sql_profiler(app):
+    """Install the slow-query log and, if SQL_PROFILER_ENABLED, the header-toggled per-request profiler."""
+    if not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    if app.config.get("SQL_PROFILER_ENABLED", False):
+        app.before_request(_before_request)
+        app.after_request(_after_request)
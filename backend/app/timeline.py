@@ -0,0 +1,153 @@
+import heapq
+from flask import current_app
+from sqlalchemy import insert
+from app.models import User, Post, Like, Follow, TimelineEntry, db
+from app.logging_setup import logger
+from app.pagination import keyset_query, split_page
+
+# -------------------------
+# 🔹 Fan-out-on-write Home Timeline
+# -------------------------
+# Every post is copied into the `timeline_entry` rows of its author and followers
+# when it is written, so the "all" / "friends" feeds are one indexed range scan.
+# Authors with more than TIMELINE_FANOUT_MAX_FOLLOWERS followers are skipped at
+# write time; their followers pull those posts at read time instead.
+
+
+def _is_pull_author(user_id):
+    """Return True if this author's posts are pulled at read time instead of fanned out."""
+    follower_count = db.session.query(User.follower_count).filter(User.id == user_id).scalar() or 0
+    return follower_count > current_app.config["TIMELINE_FANOUT_MAX_FOLLOWERS"]
+
+
+def _pull_author_ids(user_id):
+    """Return ids of followed authors whose posts are not fanned out into this user's timeline."""
+    rows = (
+        db.session.query(Follow.followed_id)
+        .join(User, User.id == Follow.followed_id)
+        .filter(Follow.follower_id == user_id)
+        .filter(User.follower_count > current_app.config["TIMELINE_FANOUT_MAX_FOLLOWERS"])
+        .all()
+    )
+    return [row.followed_id for row in rows]
+
+
+def fan_out_post(post):
+    """Push a newly created post into the author's and followers' timelines (in batches).
+
+    Returns the ids of the users whose timelines changed.
+    """
+    entry = {"post_id": post.id, "author_id": post.user_id, "timestamp": post.timestamp}
+    db.session.execute(insert(TimelineEntry), [dict(entry, user_id=post.user_id)])  # ✅ Own timeline
+
+    if _is_pull_author(post.user_id):
+        logger.info("🔹 Skipping fan-out for post %s: author %s is read-time pulled", post.id, post.user_id)
+        return [post.user_id]
+
+    batch_size = current_app.config["TIMELINE_FANOUT_BATCH_SIZE"]
+    updated_user_ids = [post.user_id]
+    last_follower_id = 0
+    while True:
+        follower_ids = [
+            row.follower_id for row in db.session.query(Follow.follower_id)
+            .filter(Follow.followed_id == post.user_id, Follow.follower_id > last_follower_id)
+            .filter(Follow.follower_id != post.user_id)  # ✅ The author's own row is already written
+            .order_by(Follow.follower_id)
+            .limit(batch_size)
+        ]
+        if not follower_ids:
+            break
+        db.session.execute(insert(TimelineEntry), [dict(entry, user_id=follower_id) for follower_id in follower_ids])
+        updated_user_ids.extend(follower_ids)
+        last_follower_id = follower_ids[-1]
+    return updated_user_ids
+
+
+def backfill_follow(follower_id, followed_id):
+    """Copy the followed user's most recent posts into the follower's timeline."""
+    prune_follow(follower_id, followed_id)  # ✅ Idempotent: never leave duplicate rows behind
+    if follower_id != followed_id and _is_pull_author(followed_id):
+        return
+
+    posts = (
+        db.session.query(Post.id, Post.timestamp)
+        .filter(Post.user_id == followed_id)
+        .order_by(Post.timestamp.desc(), Post.id.desc())
+        .limit(current_app.config["TIMELINE_BACKFILL_LIMIT"])
+        .all()
+    )
+    if posts:
+        db.session.execute(insert(TimelineEntry), [
+            {"user_id": follower_id, "post_id": post.id, "author_id": followed_id, "timestamp": post.timestamp}
+            for post in posts
+        ])
+
+
+def prune_follow(follower_id, followed_id):
+    """Remove the followed user's posts from the follower's timeline."""
+    TimelineEntry.query.filter_by(user_id=follower_id, author_id=followed_id).delete(synchronize_session=False)
+
+
+def timeline_entries_query(user_id, cursor=None, limit=20, include_own=True, exclude_authors=()):
+    """One newest-first page of a user's `(post_id, timestamp)` timeline rows."""
+    query = db.session.query(TimelineEntry.post_id, TimelineEntry.timestamp).filter(TimelineEntry.user_id == user_id)
+    if not include_own:
+        query = query.filter(TimelineEntry.author_id != user_id)
+    if exclude_authors:
+        query = query.filter(TimelineEntry.author_id.notin_(exclude_authors))  # ✅ Stale rows from before the author grew
+    return keyset_query(query, TimelineEntry.timestamp, TimelineEntry.post_id, cursor=cursor, limit=limit)
+
+
+def author_posts_query(author_id, cursor=None, limit=20):
+    """One newest-first page of an author's `(post_id, timestamp)` rows.
+
+    Kept to a single author so it stays one range of ix_post_user_id_timestamp_id;
+    `user_id IN (...)` would need a sort.
+    """
+    query = db.session.query(Post.id.label("post_id"), Post.timestamp).filter(Post.user_id == author_id)
+    return keyset_query(query, Post.timestamp, Post.id, cursor=cursor, limit=limit)
+
+
+def favorite_posts_query(user_id, cursor=None, limit=20):
+    """One newest-first page of the posts a user liked, one range of ix_like_user_id_post_timestamp_post_id."""
+    query = Post.query.join(Like, Like.post_id == Post.id).filter(Like.user_id == user_id)
+    return keyset_query(query, Like.post_timestamp, Like.post_id, cursor=cursor, limit=limit)
+
+
+def read_timeline(user_id, cursor=None, limit=20, include_own=True):
+    """Return one newest-first page of `(post_ids, next_cursor)` from a user's home timeline."""
+    pull_ids = _pull_author_ids(user_id)
+    rows = timeline_entries_query(user_id, cursor=cursor, limit=limit, include_own=include_own, exclude_authors=pull_ids).all()
+
+    # ✅ Merge in posts from authors that were too large to fan out
+    if pull_ids:
+        pulled = [author_posts_query(author_id, cursor=cursor, limit=limit).all() for author_id in pull_ids]
+        newest_first = lambda row: (row.timestamp, row.post_id)
+        rows = list(heapq.merge(rows, *pulled, key=newest_first, reverse=True))[:limit + 1]
+
+    rows, next_cursor = split_page(rows, limit, "timestamp", "post_id")
+    return [row.post_id for row in rows], next_cursor
+
+
+def rebuild_timelines(batch_size=100):
+    """Rebuild every user's timeline from the follow graph. Used for backfill and repair."""
+    rebuilt = 0
+    last_user_id = 0
+    while True:
+        user_ids = [
+            row.id for row in db.session.query(User.id)
+            .filter(User.id > last_user_id).order_by(User.id).limit(batch_size)
+        ]
+        if not user_ids:
+            break
+        for user_id in user_ids:
+            TimelineEntry.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+            backfill_follow(user_id, user_id)  # ✅ Own posts
+            for row in db.session.query(Follow.followed_id).filter(Follow.follower_id == user_id, Follow.followed_id != user_id).all():
+                backfill_follow(user_id, row.followed_id)
+        db.session.commit()
+        rebuilt += len(user_ids)
+        last_user_id = user_ids[-1]
+
+    logger.info("✅ Rebuilt %s home timelines.", rebuilt)
+    return rebuilt
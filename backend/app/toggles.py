@@ -0,0 +1,129 @@
+from collections import Counter
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from app.models import Post, Like, Follow, Reaction, db
+from app.database import upsert_insert
+from app.counters import bump_post_counter, bump_reaction_count, bump_follow_counts
+
+# -------------------------
+# 🔹 Race-free Toggles (likes, follows, reactions)
+# -------------------------
+# Each action is a conditional DELETE or an INSERT ... ON CONFLICT DO NOTHING
+# against the table's unique constraint, and counters are only bumped when the
+# statement actually changed a row. Concurrent taps on the same button can't
+# raise IntegrityError or leave duplicate rows, and counters stay exact.
+
+
+def insert_ignore(model, **values):
+    """Insert one row unless it violates a unique constraint. Returns True if a row was inserted."""
+    stmt = upsert_insert(db.session, model)
+    if stmt is not None:
+        return db.session.execute(stmt.values(**values).on_conflict_do_nothing()).rowcount == 1
+
+    try:
+        with db.session.begin_nested():  # ✅ SAVEPOINT: a conflict doesn't poison the outer transaction
+            db.session.execute(model.__table__.insert().values(**values))
+        return True
+    except IntegrityError:
+        return False
+
+
+def _delete(model, *criteria):
+    return db.session.execute(delete(model).where(*criteria)).rowcount
+
+
+def _insert_like(user_id, post_id):
+    post_timestamp = select(Post.timestamp).where(Post.id == post_id).scalar_subquery()  # ✅ Same statement, no extra read
+    return insert_ignore(Like, user_id=user_id, post_id=post_id, post_timestamp=post_timestamp)
+
+
+# -------------------------
+# Likes
+# -------------------------
+def toggle_like(user_id, post_id):
+    """Unlike if liked, otherwise like. Returns True if the post is now liked."""
+    if _delete(Like, Like.user_id == user_id, Like.post_id == post_id):
+        bump_post_counter(post_id, Post.like_count, -1)
+        return False
+    if _insert_like(user_id, post_id):
+        bump_post_counter(post_id, Post.like_count, 1)
+    return True
+
+
+def set_like(user_id, post_id, liked):
+    """Make the like exist (or not) without touching counters. Returns the row delta (+1, -1 or 0)."""
+    if liked:
+        return 1 if _insert_like(user_id, post_id) else 0
+    return -_delete(Like, Like.user_id == user_id, Like.post_id == post_id)
+
+
+# -------------------------
+# Follows
+# -------------------------
+def follow(follower_id, followed_id):
+    """Returns True if a new follow was created (False if it already existed)."""
+    created = insert_ignore(Follow, follower_id=follower_id, followed_id=followed_id)
+    if created:
+        bump_follow_counts(follower_id, followed_id, 1)
+    return created
+
+
+def unfollow(follower_id, followed_id):
+    """Returns True if a follow was removed (False if there was none)."""
+    removed = _delete(Follow, Follow.follower_id == follower_id, Follow.followed_id == followed_id)
+    if removed:
+        bump_follow_counts(follower_id, followed_id, -1)
+    return bool(removed)
+
+
+def toggle_follow(follower_id, followed_id):
+    """Unfollow if following, otherwise follow. Returns True if now following."""
+    if unfollow(follower_id, followed_id):
+        return False
+    follow(follower_id, followed_id)
+    return True
+
+
+# -------------------------
+# Reactions (one per user per post)
+# -------------------------
+def _remove_reaction(user_id, post_id):
+    """Delete the user's reaction on a post and return its type (None if there was none)."""
+    criteria = (Reaction.user_id == user_id, Reaction.post_id == post_id)
+    if db.session.get_bind(clause=delete(Reaction)).dialect.delete_returning:
+        return db.session.execute(delete(Reaction).where(*criteria).returning(Reaction.reaction_type)).scalar()
+
+    previous = db.session.execute(select(Reaction.reaction_type).where(*criteria).with_for_update()).scalar()
+    if previous is not None and not _delete(Reaction, *criteria):
+        return None  # ✅ A concurrent request removed it first
+    return previous
+
+
+def toggle_reaction(user_id, post_id, reaction_type):
+    """Remove the reaction if it has the same type, otherwise set it.
+
+    Returns "removed", "updated" or "added".
+    """
+    previous = _remove_reaction(user_id, post_id)
+    if previous is not None:
+        bump_reaction_count(post_id, previous, -1)
+    if previous == reaction_type:
+        return "removed"
+
+    if insert_ignore(Reaction, user_id=user_id, post_id=post_id, reaction_type=reaction_type):
+        bump_reaction_count(post_id, reaction_type, 1)
+    return "updated" if previous is not None else "added"
+
+
+def set_reaction(user_id, post_id, reaction_type):
+    """Make the user's reaction `reaction_type` (None = no reaction) without touching counters.
+
+    Returns a Counter of per-type row deltas.
+    """
+    deltas = Counter()
+    previous = _remove_reaction(user_id, post_id)
+    if previous is not None:
+        deltas[previous] -= 1
+    if reaction_type is not None and insert_ignore(Reaction, user_id=user_id, post_id=post_id, reaction_type=reaction_type):
+        deltas[reaction_type] += 1
+    return deltas
@@ -1,12 +1,15 @@
-import json
 import os
+import time
+import hashlib
 import logging
-from urllib.request import urlopen
 from authlib.jose import jwt
 from authlib.jose.errors import JoseError
 from flask import request, jsonify
 from functools import wraps
 from app.logging_setup import logger  # ✅ Import the logger
+from app.cache import LRUCache
+from app.keycloak_keys import key_manager
+from app.identity import resolve_identity
 from datetime import datetime
 
 # -------------------------
@@ -26,46 +29,64 @@ def get_keycloak_config():
 
 
 # -------------------------
-# 🔹 Fetch & Cache Keycloak Public Keys
+# 🔹 Keycloak Public Keys (see app/keycloak_keys.py)
 # -------------------------
-KEYCLOAK_PUBLIC_KEYS = None  # Cache for public keys
-
 def get_keycloak_public_keys():
-    """Fetch and cache Keycloak public keys for JWT validation."""
-    global KEYCLOAK_PUBLIC_KEYS
+    """Return the current Keycloak JWKS, kept fresh by the background key manager."""
+    return key_manager.key_set()
 
-    keycloak_config = get_keycloak_config()
-    certs_url = keycloak_config["certs_url"]
 
-    logger.info(f"🔹 Fetching Keycloak public keys from: {certs_url}")  # ✅ Logging instead of print
+def _load_signing_key(header, payload):
+    """Resolve the token's signing key by `kid` (refetches the JWKS once for unknown ids)."""
+    key = key_manager.get_key(header.get("kid"))
+    if key is None:
+        raise ValueError(f"Unknown signing key id: {header.get('kid')}")
+    return key
 
-    if not KEYCLOAK_PUBLIC_KEYS:
-        try:
-            response = urlopen(certs_url)
-            KEYCLOAK_PUBLIC_KEYS = json.loads(response.read())
-            logger.info("✅ Successfully fetched Keycloak public keys.")
-        except Exception as e:
-            logger.error(f"⚠️ Could not fetch Keycloak public keys. Error: {e}")
-            return None
 
-    return KEYCLOAK_PUBLIC_KEYS
+# -------------------------
+# 🔹 Verified JWT Cache
+# -------------------------
+# Mobile clients send the same bearer token many times per session, so verified
+# claims are cached by token hash until the token's `exp`. Repeat requests skip
+# signature verification entirely.
+VERIFIED_TOKEN_CACHE = LRUCache(maxsize=10000, ttl=0)
+
+
+def init_app(app):
+    """Size the verified token cache from JWT_CACHE_MAX_ENTRIES."""
+    global VERIFIED_TOKEN_CACHE
+    VERIFIED_TOKEN_CACHE = LRUCache(maxsize=app.config.get("JWT_CACHE_MAX_ENTRIES", 10000), ttl=0)
+
+
+def _token_cache_key(token):
+    """Hash the raw token so bearer credentials are never kept as cache keys."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def clear_verified_token_cache():
+    """Drop all cached claims (called whenever the Keycloak key set changes)."""
+    VERIFIED_TOKEN_CACHE.clear()
+
+
+key_manager.add_rotation_listener(clear_verified_token_cache)  # ✅ Evict on key rotation
 
 
 # -------------------------
 # 🔹 JWT Token Verification
 # -------------------------
 def verify_jwt(token):
-    """Verify and decode a JWT token from Keycloak."""
-    try:
-        public_keys = get_keycloak_public_keys()
-        if not public_keys:
-            logger.error("❌ Public keys not found.")
-            return None
+    """Verify and decode a JWT token from Keycloak (cached until the token expires)."""
+    cache_key = _token_cache_key(token)
+    cached_claims = VERIFIED_TOKEN_CACHE.get(cache_key)
+    if cached_claims is not None:
+        return dict(cached_claims)  # ✅ Callers may modify their claims; the cached dict stays intact
 
+    try:
         keycloak_config = get_keycloak_config()
         expected_issuer = keycloak_config["issuer_url"]
 
-        claims = jwt.decode(token, public_keys, claims_options={
+        claims = jwt.decode(token, _load_signing_key, claims_options={
             "exp": {"essential": True},
             "iss": {"essential": True}
         })
@@ -78,27 +99,40 @@ def verify_jwt(token):
 
         # ✅ Issuer Validation
         if claims["iss"] != expected_issuer:
-            logger.warning(f"❌ Invalid issuer! Expected: {expected_issuer}, Found: {claims['iss']}")
+            logger.warning("❌ Invalid issuer! Expected: %s, Found: %s", expected_issuer, claims['iss'])
             return None
 
+        # ✅ Cache verified claims until the token's own expiry
+        ttl = exp_timestamp - time.time() if exp_timestamp else 0
+        if ttl > 0:
+            VERIFIED_TOKEN_CACHE.set(cache_key, dict(claims), ttl=ttl)
+
         # ✅ Log Successful JWT Decoding
-        logger.info(f"✅ JWT decoded successfully for user {claims.get('preferred_username')}")
+        logger.debug("✅ JWT decoded successfully for user %s", claims.get("preferred_username"))
         return claims  # Return decoded claims
 
     except (JoseError, ValueError) as e:
-        logger.error(f"❌ JWT verification failed: {e}")
+        logger.error("❌ JWT verification failed: %s", e)
         return None
 
 
 # -------------------------
 # 🔹 Flask Route Protection Decorator
 # -------------------------
-def require_auth():
-    """Protect Flask routes by enforcing Keycloak JWT authentication."""
+def require_auth(optional=False):
+    """Protect Flask routes by enforcing Keycloak JWT authentication.
+
+    With `optional=True`, requests without an Authorization header pass through
+    anonymously (`request.identity` is None); a bad token is still rejected.
+    """
     def decorator(f):
         @wraps(f)
         def wrapper(*args, **kwargs):
             auth_header = request.headers.get("Authorization", None)
+            if not auth_header and optional:
+                request.user = None
+                request.identity = None
+                return f(*args, **kwargs)
             if not auth_header:
                 logger.warning("❌ Missing Authorization Header")
                 return jsonify({"message": "❌ Missing Authorization Header"}), 401
@@ -123,7 +157,10 @@ def require_auth():
                 "username": decoded_token.get("preferred_username"),
             }
 
-            logger.info(f"🔹 User authenticated: {request.user['username']} ({request.user['keycloak_id']})")
+            # ✅ Resolve the local user once per request (None until the first login creates it)
+            request.identity = resolve_identity(keycloak_id)
+
+            logger.info("🔹 User authenticated: %s (%s)", request.user["username"], request.user["keycloak_id"])
             return f(*args, **kwargs)
 
         return wrapper
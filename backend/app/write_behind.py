@@ -0,0 +1,272 @@
+import atexit
+import threading
+from collections import Counter, namedtuple
+from flask import has_app_context
+from sqlalchemy.exc import SQLAlchemyError
+from app.models import Post, Like, Reaction, db
+from app.counters import bump_post_counter, bump_reaction_count
+from app.toggles import set_like, set_reaction
+from app.logging_setup import logger
+
+# -------------------------
+# 🔹 Write-behind Buffer for Likes & Reactions (opt-in)
+# -------------------------
+# With WRITE_BEHIND_ENABLED, LikePost / ReactToPost are acknowledged as soon as
+# the event is buffered. Events are coalesced per (user, post): only the final
+# state is written, so a like/unlike/like burst becomes one row change. A
+# background thread writes batches every WRITE_BEHIND_FLUSH_INTERVAL seconds
+# (sooner once WRITE_BEHIND_BATCH_SIZE events are waiting) in one transaction,
+# with one counter UPDATE per post. If a batch fails, its events are written
+# one at a time, each in its own SAVEPOINT, so one bad event (e.g. a like on
+# a post deleted meanwhile) doesn't hold up the rest; an event that keeps
+# failing is dropped after WRITE_BEHIND_MAX_RETRIES flushes. Reads merge the
+# unflushed deltas in, and pending events are flushed at shutdown. Buffers are
+# per worker process.
+
+Entry = namedtuple("Entry", ["base", "desired"])  # state in the DB when first buffered, state to write
+
+_MISSING = object()
+
+
+class EngagementBuffer:
+    def __init__(self):
+        self.enabled = False
+        self.app = None
+        self.flush_interval = 0.5
+        self.batch_size = 500
+        self.max_pending = 10000
+        self.max_retries = 3
+        self._pending = {}  # ("like" | "reaction", user_id, post_id) -> Entry
+        self._inflight = {}  # entries taken by a flush that hasn't committed yet
+        self._attempts = {}  # key -> failed flushes so far (only for pending/in-flight keys)
+        self._like_deltas = Counter()  # post_id -> unflushed like delta
+        self._reaction_deltas = {}  # post_id -> Counter(reaction_type -> unflushed delta)
+        self._lock = threading.Lock()
+        self._not_full = threading.Condition(self._lock)
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def init_app(self, app):
+        """Configure from WRITE_BEHIND_* settings and start the flusher when enabled."""
+        self.enabled = app.config.get("WRITE_BEHIND_ENABLED", False)
+        if not self.enabled:
+            return
+        self.app = app
+        self.flush_interval = app.config.get("WRITE_BEHIND_FLUSH_INTERVAL", 0.5)
+        self.batch_size = app.config.get("WRITE_BEHIND_BATCH_SIZE", 500)
+        self.max_pending = app.config.get("WRITE_BEHIND_MAX_PENDING", 10000)
+        self.max_retries = app.config.get("WRITE_BEHIND_MAX_RETRIES", 3)
+        self.start()
+        atexit.register(self.stop)  # ✅ Flush what's left at shutdown
+
+    # -------------------------
+    # Events
+    # -------------------------
+    def toggle_like(self, user_id, post_id):
+        """Buffer a like toggle. Returns True if the post is now liked by the user."""
+        _, liked = self._record(
+            ("like", user_id, post_id),
+            load_state=lambda: db.session.query(Like.id).filter_by(user_id=user_id, post_id=post_id).first() is not None,
+            next_state=lambda liked: not liked,
+        )
+        return liked
+
+    def toggle_reaction(self, user_id, post_id, reaction_type):
+        """Buffer a reaction toggle. Returns "removed", "updated" or "added" like `toggles.toggle_reaction`."""
+        previous, current = self._record(
+            ("reaction", user_id, post_id),
+            load_state=lambda: db.session.query(Reaction.reaction_type).filter_by(user_id=user_id, post_id=post_id).scalar(),
+            next_state=lambda previous: None if previous == reaction_type else reaction_type,
+        )
+        if current is None:
+            return "removed"
+        return "updated" if previous is not None else "added"
+
+    def _known_state(self, key):
+        entry = self._pending.get(key) or self._inflight.get(key)
+        return entry.desired if entry is not None else _MISSING
+
+    def _record(self, key, load_state, next_state):
+        with self._lock:
+            state = self._known_state(key)
+        if state is _MISSING:
+            state = load_state()  # ✅ One indexed read, outside the lock
+
+        with self._not_full:
+            while key not in self._pending and len(self._pending) >= self.max_pending:
+                self._wakeup.set()
+                self._not_full.wait(self.flush_interval)  # ✅ Backpressure: wait for the flusher to drain
+            known = self._known_state(key)
+            if known is not _MISSING:
+                state = known  # ✅ Another request buffered this key meanwhile
+            entry = self._pending.get(key)
+            new_entry = Entry(base=entry.base if entry else state, desired=next_state(state))
+            self._contribute(key, entry, -1)
+            self._contribute(key, new_entry, 1)
+            self._pending[key] = new_entry
+            size = len(self._pending)
+
+        if size >= self.batch_size:
+            self._wakeup.set()
+        return state, new_entry.desired
+
+    def _contribute(self, key, entry, sign):
+        """Add (sign=1) or remove (sign=-1) an entry's effect on the per-post deltas (caller holds the lock)."""
+        if entry is None:
+            return
+        kind, _, post_id = key
+        if kind == "like":
+            self._like_deltas[post_id] += sign * (int(entry.desired) - int(entry.base))
+            if not self._like_deltas[post_id]:
+                del self._like_deltas[post_id]
+            return
+        deltas = self._reaction_deltas.setdefault(post_id, Counter())
+        if entry.base is not None:
+            deltas[entry.base] -= sign
+        if entry.desired is not None:
+            deltas[entry.desired] += sign
+        for reaction_type in [t for t, d in deltas.items() if not d]:
+            del deltas[reaction_type]
+        if not deltas:
+            del self._reaction_deltas[post_id]
+
+    # -------------------------
+    # Reads
+    # -------------------------
+    def merged_counts(self, post_id, likes, reactions):
+        """Return (likes, reactions) for a post with this worker's unflushed events applied."""
+        if not self.enabled:
+            return likes, reactions
+        with self._lock:
+            like_delta = self._like_deltas.get(post_id, 0)
+            reaction_deltas = dict(self._reaction_deltas.get(post_id, {}))
+        if reaction_deltas:
+            reactions = dict(reactions)
+            for reaction_type, delta in reaction_deltas.items():
+                count = reactions.get(reaction_type, 0) + delta
+                if count > 0:
+                    reactions[reaction_type] = count
+                else:
+                    reactions.pop(reaction_type, None)
+        return likes + like_delta, reactions
+
+    # -------------------------
+    # Flushing
+    # -------------------------
+    def flush(self, user_id=None):
+        """Write one batch of buffered events (or all of one user's) now. Returns the number written."""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            keys = [key for key in self._pending if user_id is None or key[1] == user_id]
+            batch = {key: self._pending.pop(key) for key in keys[: self.batch_size if user_id is None else None]}
+            self._inflight.update(batch)
+            self._not_full.notify_all()
+        if not batch:
+            return 0
+
+        try:
+            if has_app_context():
+                failed = self._write(batch)  # ✅ In a request: write on its session (and pin it to the primary)
+            else:
+                with self.app.app_context():
+                    failed = self._write(batch)
+        except Exception as e:
+            logger.error("❌ Write-behind flush of %s events failed, will retry: %s", len(batch), e)
+            failed = dict.fromkeys(batch, e)
+
+        with self._lock:
+            for key, entry in batch.items():
+                del self._inflight[key]
+                if key not in failed:
+                    self._attempts.pop(key, None)
+                    self._contribute(key, entry, -1)
+                    continue
+                attempts = self._attempts.pop(key, 0) + 1
+                newer = self._pending.get(key)
+                if attempts <= self.max_retries:
+                    self._attempts[key] = attempts
+                elif newer is None:
+                    logger.error("❌ Dropping write-behind %s event after %s attempts: %s", key, attempts, failed[key])
+                    self._contribute(key, entry, -1)
+                    continue
+                # ✅ Deltas of both entries are still counted; together they equal the merged entry's
+                self._pending[key] = Entry(entry.base, newer.desired) if newer else entry
+        return len(batch) - len(failed)
+
+    def _write(self, batch):
+        """Write a batch in one transaction, falling back to one SAVEPOINT per event. Returns {key: error} of failed events."""
+        try:
+            return self._write_events(batch, isolate=False)
+        except Exception as e:
+            logger.warning("⚠️ Write-behind batch of %s events failed, writing them one at a time: %s", len(batch), e)
+        return self._write_events(batch, isolate=True)
+
+    def _write_events(self, batch, isolate):
+        like_deltas, reaction_deltas, failed = Counter(), Counter(), {}
+        try:
+            for key, entry in batch.items():
+                if entry.desired == entry.base:
+                    continue  # ✅ Toggled back to where it started: nothing to write
+                if not isolate:
+                    self._apply(key, entry, like_deltas, reaction_deltas)
+                    continue
+                event_like_deltas, event_reaction_deltas = Counter(), Counter()
+                try:
+                    with db.session.begin_nested():  # ✅ SAVEPOINT: a bad event doesn't poison the batch
+                        self._apply(key, entry, event_like_deltas, event_reaction_deltas)
+                except SQLAlchemyError as e:
+                    failed[key] = e
+                    continue
+                like_deltas.update(event_like_deltas)
+                reaction_deltas.update(event_reaction_deltas)
+
+            # ✅ One counter statement per post (and reaction type), not one per event
+            for post_id, delta in like_deltas.items():
+                if delta:
+                    bump_post_counter(post_id, Post.like_count, delta)
+            for (post_id, reaction_type), delta in reaction_deltas.items():
+                if delta:
+                    bump_reaction_count(post_id, reaction_type, delta)
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        return failed
+
+    def _apply(self, key, entry, like_deltas, reaction_deltas):
+        kind, user_id, post_id = key
+        if kind == "like":
+            like_deltas[post_id] += set_like(user_id, post_id, entry.desired)
+            return
+        for reaction_type, delta in set_reaction(user_id, post_id, entry.desired).items():
+            reaction_deltas[post_id, reaction_type] += delta
+
+    def start(self):
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="write-behind", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flusher and write everything still pending."""
+        self._stop.set()
+        self._wakeup.set()
+        if self._thread:
+            self._thread.join()
+        while self.flush():
+            pass
+        if self._pending:
+            logger.error("❌ %s write-behind events could not be flushed at shutdown", len(self._pending))
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            while self.flush() >= self.batch_size:
+                pass  # ✅ Drain a backlog in consecutive batches
+
+
+engagement_buffer = EngagementBuffer()
@@ -0,0 +1,37 @@
+"""Added unique (user_id, post_id) constraint to reaction
+
+Revision ID: 0b6d8e2f4a17
+Revises: f1a7c3e9b482
+Create Date: 2026-10-17 19:48:37.205164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '0b6d8e2f4a17'
+down_revision = 'f1a7c3e9b482'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ✅ Keep each user's newest reaction per post, then recount the per-type totals
+    op.execute(
+        "DELETE FROM reaction WHERE id NOT IN "
+        "(SELECT MAX(id) FROM reaction GROUP BY user_id, post_id)"
+    )
+    op.execute("DELETE FROM post_reaction_count")
+    op.execute(
+        "INSERT INTO post_reaction_count (post_id, reaction_type, count) "
+        "SELECT post_id, reaction_type, COUNT(id) FROM reaction GROUP BY post_id, reaction_type"
+    )
+
+    with op.batch_alter_table('reaction', schema=None) as batch_op:
+        batch_op.create_unique_constraint('unique_reaction', ['user_id', 'post_id'])
+
+
+def downgrade():
+    with op.batch_alter_table('reaction', schema=None) as batch_op:
+        batch_op.drop_constraint('unique_reaction', type_='unique')
@@ -0,0 +1,69 @@
+"""Added last-message preview to conversation and conversation_member inbox table
+
+Revision ID: 2e7a5c9b1d46
+Revises: 9d4f2b6a8c31
+Create Date: 2026-10-17 22:04:51.903318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2e7a5c9b1d46'
+down_revision = '9d4f2b6a8c31'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('last_message_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('last_sender_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('last_message_preview', sa.String(length=200), nullable=True))
+        batch_op.add_column(sa.Column('last_message_at', sa.DateTime(), nullable=True))
+
+    op.create_table('conversation_member',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('conversation_id', sa.Integer(), nullable=False),
+    sa.Column('last_message_at', sa.DateTime(), nullable=False),
+    sa.Column('unread_count', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_read_message_id', sa.Integer(), nullable=True),
+    sa.ForeignKeyConstraint(['conversation_id'], ['conversation.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'conversation_id')
+    )
+    with op.batch_alter_table('conversation_member', schema=None) as batch_op:
+        batch_op.create_index('ix_conversation_member_user_id_last_message_at_conversation_id', ['user_id', 'last_message_at', 'conversation_id'], unique=False)
+
+    # ✅ Last message of every existing conversation
+    op.execute(
+        "UPDATE conversation SET last_message_id = "
+        "(SELECT MAX(chat.id) FROM chat WHERE chat.conversation_id = conversation.id)"
+    )
+    op.execute(
+        "UPDATE conversation SET "
+        "last_sender_id = (SELECT chat.sender_id FROM chat WHERE chat.id = conversation.last_message_id), "
+        "last_message_preview = (SELECT SUBSTR(chat.message, 1, 100) FROM chat WHERE chat.id = conversation.last_message_id), "
+        "last_message_at = (SELECT chat.timestamp FROM chat WHERE chat.id = conversation.last_message_id)"
+    )
+
+    # ✅ Both participants get an inbox entry; existing history counts as read
+    for member_column in ('low_user_id', 'high_user_id'):
+        op.execute(
+            f"INSERT INTO conversation_member (user_id, conversation_id, last_message_at, unread_count, last_read_message_id) "
+            f"SELECT {member_column}, id, COALESCE(last_message_at, created_at, CURRENT_TIMESTAMP), 0, last_message_id "
+            f"FROM conversation"
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('conversation_member', schema=None) as batch_op:
+        batch_op.drop_index('ix_conversation_member_user_id_last_message_at_conversation_id')
+
+    op.drop_table('conversation_member')
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        batch_op.drop_column('last_message_at')
+        batch_op.drop_column('last_message_preview')
+        batch_op.drop_column('last_sender_id')
+        batch_op.drop_column('last_message_id')
@@ -0,0 +1,26 @@
+"""Added composite (user_id, timestamp, id) index to post for feed pagination
+
+Revision ID: 3f9a1c7e5b20
+Revises: d492599e6d25
+Create Date: 2026-10-17 09:12:44.104512
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f9a1c7e5b20'
+down_revision = 'd492599e6d25'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.create_index('ix_post_user_id_timestamp_id', ['user_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_index('ix_post_user_id_timestamp_id')
@@ -0,0 +1,32 @@
+"""Replaced single-column follow indexes with (user, id) indexes for follow list pages
+
+Revision ID: 4b8e2d6f1a93
+Revises: 8c1e4a7d2f59
+Create Date: 2026-10-17 23:18:42.270514
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4b8e2d6f1a93'
+down_revision = '8c1e4a7d2f59'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('follow', schema=None) as batch_op:
+        batch_op.create_index('ix_follow_followed_id_id', ['followed_id', 'id'], unique=False)
+        batch_op.create_index('ix_follow_follower_id_id', ['follower_id', 'id'], unique=False)
+        batch_op.drop_index('ix_follow_followed_id')
+        batch_op.drop_index('ix_follow_follower_id')
+
+
+def downgrade():
+    with op.batch_alter_table('follow', schema=None) as batch_op:
+        batch_op.create_index('ix_follow_follower_id', ['follower_id'], unique=False)
+        batch_op.create_index('ix_follow_followed_id', ['followed_id'], unique=False)
+        batch_op.drop_index('ix_follow_follower_id_id')
+        batch_op.drop_index('ix_follow_followed_id_id')
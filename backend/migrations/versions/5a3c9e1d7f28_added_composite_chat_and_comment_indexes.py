@@ -0,0 +1,32 @@
+"""Added composite indexes for conversation and comment reads
+
+Revision ID: 5a3c9e1d7f28
+Revises: 0b6d8e2f4a17
+Create Date: 2026-10-17 20:41:12.538907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a3c9e1d7f28'
+down_revision = '0b6d8e2f4a17'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.create_index('ix_chat_sender_id_receiver_id_timestamp', ['sender_id', 'receiver_id', 'timestamp'], unique=False)
+
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.create_index('ix_comment_post_id_timestamp_id', ['post_id', 'timestamp', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('comment', schema=None) as batch_op:
+        batch_op.drop_index('ix_comment_post_id_timestamp_id')
+
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.drop_index('ix_chat_sender_id_receiver_id_timestamp')
@@ -0,0 +1,33 @@
+"""Removed self-follows and added a check constraint against them
+
+Revision ID: 6f3a9c2e8d14
+Revises: 4b8e2d6f1a93
+Create Date: 2026-10-17 23:52:16.408113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f3a9c2e8d14'
+down_revision = '4b8e2d6f1a93'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ✅ Drop existing self-follows (and their counter contribution) before enforcing the check
+    op.execute(
+        'UPDATE "user" SET follower_count = follower_count - 1, following_count = following_count - 1 '
+        'WHERE id IN (SELECT follower_id FROM follow WHERE follower_id = followed_id)'
+    )
+    op.execute('DELETE FROM follow WHERE follower_id = followed_id')
+
+    with op.batch_alter_table('follow', schema=None) as batch_op:
+        batch_op.create_check_constraint('check_no_self_follow', 'follower_id != followed_id')
+
+
+def downgrade():
+    with op.batch_alter_table('follow', schema=None) as batch_op:
+        batch_op.drop_constraint('check_no_self_follow', type_='check')
@@ -0,0 +1,59 @@
+"""Added timeline_entry table for fan-out-on-write home timelines
+
+Revision ID: 7b2d4e9a1f63
+Revises: 3f9a1c7e5b20
+Create Date: 2026-10-17 10:03:18.551207
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7b2d4e9a1f63'
+down_revision = '3f9a1c7e5b20'
+branch_labels = None
+depends_on = None
+
+TIMELINE_BACKFILL_LIMIT = 200  # ✅ Posts per author, matching the config default
+
+
+def upgrade():
+    op.create_table('timeline_entry',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('author_id', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['author_id'], ['user.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'post_id')
+    )
+    with op.batch_alter_table('timeline_entry', schema=None) as batch_op:
+        batch_op.create_index('ix_timeline_entry_user_id_timestamp_post_id', ['user_id', 'timestamp', 'post_id'], unique=False)
+
+    # ✅ Backfill existing timelines (own and followed authors' newest posts, as
+    # flask rebuild-timelines does) so home feeds are not empty after upgrade
+    ranked_posts = (
+        "(SELECT id, user_id, timestamp, ROW_NUMBER() OVER "
+        "(PARTITION BY user_id ORDER BY timestamp DESC, id DESC) AS position "
+        "FROM post WHERE timestamp IS NOT NULL) AS ranked"
+    )
+    op.execute(
+        "INSERT INTO timeline_entry (user_id, post_id, author_id, timestamp) "
+        f"SELECT ranked.user_id, ranked.id, ranked.user_id, ranked.timestamp FROM {ranked_posts} "
+        f"WHERE ranked.position <= {TIMELINE_BACKFILL_LIMIT}"
+    )
+    op.execute(
+        "INSERT INTO timeline_entry (user_id, post_id, author_id, timestamp) "
+        f"SELECT follow.follower_id, ranked.id, ranked.user_id, ranked.timestamp FROM follow JOIN {ranked_posts} "
+        "ON ranked.user_id = follow.followed_id "
+        f"WHERE ranked.position <= {TIMELINE_BACKFILL_LIMIT} AND follow.follower_id != follow.followed_id"
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('timeline_entry', schema=None) as batch_op:
+        batch_op.drop_index('ix_timeline_entry_user_id_timestamp_post_id')
+
+    op.drop_table('timeline_entry')
@@ -0,0 +1,27 @@
+"""Added archived_through_id to conversation for the chat archive
+
+Revision ID: 8c1e4a7d2f59
+Revises: 2e7a5c9b1d46
+Create Date: 2026-10-17 22:47:09.615820
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1e4a7d2f59'
+down_revision = '2e7a5c9b1d46'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ✅ The chat_archive_segment table lives in the archive bind; `flask archive-messages` creates it
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('archived_through_id', sa.Integer(), nullable=True))
+
+
+def downgrade():
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        batch_op.drop_column('archived_through_id')
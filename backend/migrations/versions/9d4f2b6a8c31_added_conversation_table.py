@@ -0,0 +1,68 @@
+"""Added conversation table and keyed chat messages by conversation
+
+Revision ID: 9d4f2b6a8c31
+Revises: 5a3c9e1d7f28
+Create Date: 2026-10-17 21:26:44.170392
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4f2b6a8c31'
+down_revision = '5a3c9e1d7f28'
+branch_labels = None
+depends_on = None
+
+LOW_USER_ID = "CASE WHEN chat.sender_id < chat.receiver_id THEN chat.sender_id ELSE chat.receiver_id END"
+HIGH_USER_ID = "CASE WHEN chat.sender_id < chat.receiver_id THEN chat.receiver_id ELSE chat.sender_id END"
+
+
+def upgrade():
+    op.create_table('conversation',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('low_user_id', sa.Integer(), nullable=False),
+    sa.Column('high_user_id', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint('low_user_id < high_user_id', name='check_conversation_user_order'),
+    sa.ForeignKeyConstraint(['high_user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['low_user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('low_user_id', 'high_user_id', name='unique_conversation')
+    )
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_conversation_high_user_id'), ['high_user_id'], unique=False)
+
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('conversation_id', sa.Integer(), nullable=True))
+
+    # ✅ One conversation per pair that has messages, then point every message at it
+    op.execute(
+        f"INSERT INTO conversation (low_user_id, high_user_id, created_at) "
+        f"SELECT {LOW_USER_ID}, {HIGH_USER_ID}, MIN(chat.timestamp) FROM chat "
+        f"GROUP BY {LOW_USER_ID}, {HIGH_USER_ID}"
+    )
+    op.execute(
+        f"UPDATE chat SET conversation_id = (SELECT conversation.id FROM conversation "
+        f"WHERE conversation.low_user_id = {LOW_USER_ID} AND conversation.high_user_id = {HIGH_USER_ID})"
+    )
+
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.alter_column('conversation_id', existing_type=sa.Integer(), nullable=False)
+        batch_op.create_foreign_key('fk_chat_conversation_id_conversation', 'conversation', ['conversation_id'], ['id'], ondelete='CASCADE')
+        batch_op.drop_index('ix_chat_sender_id_receiver_id_timestamp')  # ✅ Superseded by the conversation key
+        batch_op.create_index('ix_chat_conversation_id_id', ['conversation_id', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('chat', schema=None) as batch_op:
+        batch_op.drop_index('ix_chat_conversation_id_id')
+        batch_op.create_index('ix_chat_sender_id_receiver_id_timestamp', ['sender_id', 'receiver_id', 'timestamp'], unique=False)
+        batch_op.drop_constraint('fk_chat_conversation_id_conversation', type_='foreignkey')
+        batch_op.drop_column('conversation_id')
+
+    with op.batch_alter_table('conversation', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_conversation_high_user_id'))
+
+    op.drop_table('conversation')
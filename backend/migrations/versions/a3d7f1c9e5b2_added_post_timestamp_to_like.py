@@ -0,0 +1,31 @@
+"""Added post_timestamp to like with a (user, post_timestamp, post) index for the favorites feed
+
+Revision ID: a3d7f1c9e5b2
+Revises: 6f3a9c2e8d14
+Create Date: 2026-10-18 00:21:07.903412
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3d7f1c9e5b2'
+down_revision = '6f3a9c2e8d14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('like', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('post_timestamp', sa.DateTime(), nullable=True))
+        batch_op.create_index('ix_like_user_id_post_timestamp_post_id', ['user_id', 'post_timestamp', 'post_id'], unique=False)
+
+    # ✅ Backfill existing likes from their posts
+    op.execute('UPDATE "like" SET post_timestamp = (SELECT post.timestamp FROM post WHERE post.id = "like".post_id)')
+
+
+def downgrade():
+    with op.batch_alter_table('like', schema=None) as batch_op:
+        batch_op.drop_index('ix_like_user_id_post_timestamp_post_id')
+        batch_op.drop_column('post_timestamp')
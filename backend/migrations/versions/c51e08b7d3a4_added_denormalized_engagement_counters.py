@@ -0,0 +1,55 @@
+"""Added denormalized engagement counters to post and user
+
+Revision ID: c51e08b7d3a4
+Revises: 7b2d4e9a1f63
+Create Date: 2026-10-17 11:26:02.318874
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c51e08b7d3a4'
+down_revision = '7b2d4e9a1f63'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('post_reaction_count',
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('reaction_type', sa.String(length=50), nullable=False),
+    sa.Column('count', sa.Integer(), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('post_id', 'reaction_type')
+    )
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('like_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('comment_count', sa.Integer(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('follower_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('following_count', sa.Integer(), server_default='0', nullable=False))
+
+    # ✅ Backfill counters from existing rows (same statements as `flask repair-counters`)
+    op.execute('UPDATE post SET like_count = (SELECT COUNT(*) FROM "like" WHERE "like".post_id = post.id)')
+    op.execute('UPDATE post SET comment_count = (SELECT COUNT(*) FROM comment WHERE comment.post_id = post.id)')
+    op.execute('UPDATE "user" SET follower_count = (SELECT COUNT(*) FROM follow WHERE follow.followed_id = "user".id)')
+    op.execute('UPDATE "user" SET following_count = (SELECT COUNT(*) FROM follow WHERE follow.follower_id = "user".id)')
+    op.execute(
+        'INSERT INTO post_reaction_count (post_id, reaction_type, count) '
+        'SELECT post_id, reaction_type, COUNT(*) FROM reaction GROUP BY post_id, reaction_type'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('user', schema=None) as batch_op:
+        batch_op.drop_column('following_count')
+        batch_op.drop_column('follower_count')
+
+    with op.batch_alter_table('post', schema=None) as batch_op:
+        batch_op.drop_column('comment_count')
+        batch_op.drop_column('like_count')
+
+    op.drop_table('post_reaction_count')
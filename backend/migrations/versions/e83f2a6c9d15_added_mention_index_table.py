@@ -0,0 +1,75 @@
+"""Added mention index table for the mentions feed
+
+Revision ID: e83f2a6c9d15
+Revises: c51e08b7d3a4
+Create Date: 2026-10-17 12:40:51.772930
+
+"""
+import re
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e83f2a6c9d15'
+down_revision = 'c51e08b7d3a4'
+branch_labels = None
+depends_on = None
+
+MENTION_PATTERN = re.compile(r"@([\w.-]+)")  # ✅ Same syntax as app.mentions, frozen for this migration
+CHUNK_SIZE = 500
+
+
+def upgrade():
+    op.create_table('mention',
+    sa.Column('mentioned_user_id', sa.Integer(), nullable=False),
+    sa.Column('post_id', sa.Integer(), nullable=False),
+    sa.Column('timestamp', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['mentioned_user_id'], ['user.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['post_id'], ['post.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('mentioned_user_id', 'post_id')
+    )
+    with op.batch_alter_table('mention', schema=None) as batch_op:
+        batch_op.create_index('ix_mention_mentioned_user_id_timestamp_post_id', ['mentioned_user_id', 'timestamp', 'post_id'], unique=False)
+
+    # ✅ Index mentions in existing posts, then comments (the first mention of a post wins)
+    bind = op.get_bind()
+    user = sa.table('user', sa.column('id'), sa.column('username'))
+    mention = sa.table('mention', sa.column('mentioned_user_id'), sa.column('post_id'), sa.column('timestamp'))
+    indexed = set()
+    for table_name, post_id_column in (('post', 'id'), ('comment', 'post_id')):
+        source = sa.table(table_name, sa.column('id'), sa.column(post_id_column), sa.column('content'), sa.column('timestamp'))
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.select(source.c.id, source.c[post_id_column].label('post_id'), source.c.content, source.c.timestamp)
+                .where(source.c.id > last_id, source.c.content.like('%@%'), source.c.timestamp.isnot(None))
+                .order_by(source.c.id)
+                .limit(CHUNK_SIZE)
+            ).all()
+            if not rows:
+                break
+            last_id = rows[-1].id
+
+            mentioned = {
+                row.id: {name.rstrip('.-') for name in MENTION_PATTERN.findall(row.content) if name.rstrip('.-')}
+                for row in rows
+            }
+            usernames = set().union(*mentioned.values())
+            user_ids = dict(bind.execute(sa.select(user.c.username, user.c.id).where(user.c.username.in_(usernames))).all()) if usernames else {}
+            values = []
+            for row in rows:
+                for username in mentioned[row.id]:
+                    key = (user_ids.get(username), row.post_id)
+                    if key[0] is not None and key not in indexed:
+                        indexed.add(key)
+                        values.append({'mentioned_user_id': key[0], 'post_id': row.post_id, 'timestamp': row.timestamp})
+            if values:
+                bind.execute(mention.insert(), values)
+
+
+def downgrade():
+    with op.batch_alter_table('mention', schema=None) as batch_op:
+        batch_op.drop_index('ix_mention_mentioned_user_id_timestamp_post_id')
+
+    op.drop_table('mention')
@@ -0,0 +1,39 @@
+"""Added unique (user_id, setting_id) indexes to settings tables
+
+Revision ID: f1a7c3e9b482
+Revises: e83f2a6c9d15
+Create Date: 2026-10-17 19:35:12.418306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f1a7c3e9b482'
+down_revision = 'e83f2a6c9d15'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # ✅ Keep only the newest row per (user_id, setting_id) so the unique index can be built
+    for table in ('email_notification_settings', 'profile_visibility_settings'):
+        op.execute(
+            f"DELETE FROM {table} WHERE id NOT IN "
+            f"(SELECT MAX(id) FROM {table} GROUP BY user_id, setting_id)"
+        )
+
+    with op.batch_alter_table('email_notification_settings', schema=None) as batch_op:
+        batch_op.create_index('ix_email_notification_settings_user_id_setting_id', ['user_id', 'setting_id'], unique=True)
+
+    with op.batch_alter_table('profile_visibility_settings', schema=None) as batch_op:
+        batch_op.create_index('ix_profile_visibility_settings_user_id_setting_id', ['user_id', 'setting_id'], unique=True)
+
+
+def downgrade():
+    with op.batch_alter_table('profile_visibility_settings', schema=None) as batch_op:
+        batch_op.drop_index('ix_profile_visibility_settings_user_id_setting_id')
+
+    with op.batch_alter_table('email_notification_settings', schema=None) as batch_op:
+        batch_op.drop_index('ix_email_notification_settings_user_id_setting_id')
@@ -0,0 +1,90 @@
+"""Benchmark: concurrent SQLite writers with the default journal vs the app's WAL profile.
+
+Each writer thread commits small transactions (insert a post, bump a counter)
+while reader threads keep scanning, which is the shape of the feed/like/comment
+traffic. Uses throwaway database files, so no app database is touched.
+
+Usage (from backend/):
+    python scripts/bench_sqlite_writers.py [writers] [transactions_per_writer] [readers]
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from sqlalchemy import create_engine, text  # noqa: E402
+from sqlalchemy.exc import OperationalError  # noqa: E402
+from app.config import Config  # noqa: E402
+from app.database import apply_sqlite_pragmas  # noqa: E402
+
+
+def make_engine(path, tuned):
+    engine = create_engine(f"sqlite:///{path}")
+    if tuned:
+        apply_sqlite_pragmas(engine, vars(Config))  # ✅ Same pragmas the app applies
+    with engine.begin() as conn:
+        conn.execute(text("CREATE TABLE post (id INTEGER PRIMARY KEY, user_id INTEGER, content TEXT, like_count INTEGER DEFAULT 0)"))
+        conn.execute(text("CREATE TABLE counter (id INTEGER PRIMARY KEY, value INTEGER)"))
+        conn.execute(text("INSERT INTO counter (id, value) VALUES (1, 0)"))
+    return engine
+
+
+def bench(label, tuned, writers, transactions, readers):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "bench.db"), tuned)
+        errors, reads = [], [0]
+        stop = threading.Event()
+
+        def write(worker):
+            for i in range(transactions):
+                try:
+                    with engine.begin() as conn:
+                        conn.execute(text("INSERT INTO post (user_id, content) VALUES (:u, :c)"), {"u": worker, "c": f"post {i}"})
+                        conn.execute(text("UPDATE counter SET value = value + 1 WHERE id = 1"))
+                except OperationalError as e:
+                    errors.append(e)
+
+        def read():
+            while not stop.is_set():
+                with engine.connect() as conn:
+                    conn.execute(text("SELECT user_id, count(*) FROM post GROUP BY user_id")).all()
+                reads[0] += 1
+
+        reader_threads = [threading.Thread(target=read) for _ in range(readers)]
+        writer_threads = [threading.Thread(target=write, args=(w,)) for w in range(writers)]
+        for t in reader_threads:
+            t.start()
+        start = time.perf_counter()
+        for t in writer_threads:
+            t.start()
+        for t in writer_threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        stop.set()
+        for t in reader_threads:
+            t.join()
+
+        with engine.connect() as conn:
+            mode = conn.execute(text("PRAGMA journal_mode")).scalar()
+        engine.dispose()
+
+    committed = writers * transactions - len(errors)
+    print(f"{label:<8} journal={mode:<7} {committed / elapsed:>9.0f} commits/s  "
+          f"{reads[0] / elapsed:>9.0f} reads/s  {len(errors):>5} lock errors")
+
+
+def main():
+    writers = int(sys.argv[1]) if len(sys.argv) > 1 else 8
+    transactions = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    readers = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+
+    print(f"{writers} writers x {transactions} transactions, {readers} concurrent readers")
+    bench("default", False, writers, transactions, readers)
+    bench("tuned", True, writers, transactions, readers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import sys
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import pytest
+from flask_migrate import upgrade
+import app.utils as utils
+from app import create_app, db
+from app.config import DevelopmentConfig
+from app.models import User
+
+# -------------------------
+# 🔹 Test App Factory
+# -------------------------
+# Every test gets its own SQLite files under tmp_path, no background threads
+# and no Keycloak: a bearer token "tok-<name>" authenticates user <name>.
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(__file__), "..", "migrations")
+
+
+@pytest.fixture
+def make_app(tmp_path, monkeypatch):
+    """Build an app on fresh SQLite files; keyword arguments override config settings.
+
+    The schema comes from the models, or from running every migration with `migrate=True`.
+    """
+    claims = {}
+    monkeypatch.setattr(utils, "verify_jwt", claims.get)
+    contexts = []
+
+    def factory(migrate=False, **overrides):
+        config = type("TestConfig", (DevelopmentConfig,), {
+            "TESTING": True,
+            "DEBUG": False,
+            "SQLALCHEMY_DATABASE_URI": f"sqlite:///{tmp_path / 'primary.db'}",
+            "SQLALCHEMY_BINDS": {"archive": f"sqlite:///{tmp_path / 'archive.db'}"},
+            "JWKS_REFRESH_INTERVAL": 0,
+            "JWKS_SNAPSHOT_PATH": str(tmp_path / "keycloak_jwks.json"),
+            "METRICS_ENABLED": False,
+            **overrides,
+        })
+        app = create_app(config)
+        app.claims = claims
+        ctx = app.app_context()
+        ctx.push()
+        contexts.append(ctx)
+        if migrate:
+            upgrade(directory=MIGRATIONS_DIR)
+        else:
+            db.create_all(bind_key=[None, *app.config["SQLALCHEMY_BINDS"]])  # ✅ Not binds left on `db` by earlier apps
+        return app
+
+    yield factory
+    for ctx in reversed(contexts):
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+        ctx.pop()
+
+
+def make_user(app, name, **fields):
+    """Create a user that can authenticate with `auth_header(name)`."""
+    user = User(keycloak_id=f"kc-{name}", username=name, email=f"{name}@example.com", **fields)
+    db.session.add(user)
+    db.session.commit()
+    app.claims[f"tok-{name}"] = {"sub": f"kc-{name}", "preferred_username": name, "email": f"{name}@example.com"}
+    return user
+
+
+def auth_header(name):
+    return {"Authorization": f"Bearer tok-{name}"}
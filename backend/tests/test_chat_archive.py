@@ -0,0 +1,29 @@
+from datetime import datetime, timedelta
+from app import db
+from app.chat_archive import archive_messages
+from app.models import Chat
+from conftest import auth_header, make_user
+
+
+def test_unread_messages_stay_hot_and_are_counted(make_app):
+    app = make_app()
+    make_user(app, "alice")
+    bob = make_user(app, "bob")
+    client = app.test_client()
+    for i in range(6):
+        response = client.post("/api/send_message", json={"receiver_id": bob.id, "message": f"m{i}"}, headers=auth_header("alice"))
+        assert response.status_code == 201
+    messages = Chat.query.order_by(Chat.id).all()
+    for message in messages:
+        message.timestamp = datetime.utcnow() - timedelta(days=400)
+    db.session.commit()
+    alice_id, ids = messages[0].sender_id, [message.id for message in messages]
+
+    response = client.post(f"/api/mark_read/{alice_id}", json={"message_id": ids[2]}, headers=auth_header("bob"))
+    assert response.json["unread_count"] == 3
+
+    assert archive_messages(180) == 3  # ✅ Only what bob has read
+    assert [message.message for message in Chat.query.order_by(Chat.id)] == ["m3", "m4", "m5"]
+
+    response = client.post(f"/api/mark_read/{alice_id}", json={"message_id": ids[3]}, headers=auth_header("bob"))
+    assert response.json["unread_count"] == 2
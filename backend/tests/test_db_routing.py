@@ -0,0 +1,73 @@
+import shutil
+import pytest
+from itsdangerous.timed import TimestampSigner
+from sqlalchemy import text
+from app import db
+from app.db_routing import STICKY_COOKIE
+from conftest import auth_header, make_user
+
+
+@pytest.fixture
+def app(make_app, tmp_path):
+    """Primary and replica as two SQLite files; the replica's copy of every bio says "from-replica"."""
+    app = make_app(SQLALCHEMY_BINDS={
+        "archive": f"sqlite:///{tmp_path / 'archive.db'}",
+        "replica_0": f"sqlite:///{tmp_path / 'replica.db'}",
+    })
+    make_user(app, "alice", bio="from-primary")
+    make_user(app, "bob", bio="from-primary")
+    db.session.remove()
+    for engine in db.engines.values():
+        engine.dispose()
+    shutil.copy(tmp_path / "primary.db", tmp_path / "replica.db")  # ✅ A replica in sync at the snapshot
+    with db.engines["replica_0"].begin() as connection:
+        connection.execute(text("UPDATE user SET bio = 'from-replica'"))
+    return app
+
+
+def bio(client, name, viewer, pin=None):
+    if pin is not None:
+        client.set_cookie(STICKY_COOKIE, pin)
+    response = client.get(f"/api/profile/kc-{name}", headers=auth_header(viewer))
+    db.session.remove()
+    return response.json["bio"]
+
+
+def write_bio(client, name, value):
+    response = client.put("/api/update_profile", json={"bio": value}, headers=auth_header(name))
+    assert response.status_code == 200
+    db.session.remove()
+    return response
+
+
+def pin_cookie(response):
+    cookie = next(c for c in response.headers.getlist("Set-Cookie") if c.startswith(f"{STICKY_COOKIE}="))
+    return cookie.split(";")[0].split("=", 1)[1]
+
+
+def test_reads_go_to_the_replica(app):
+    assert bio(app.test_client(), "alice", "alice") == "from-replica"
+
+
+def test_writer_reads_own_write_on_any_worker(app):
+    response = write_bio(app.test_client(), "alice", "new")
+
+    # ✅ A fresh client (another worker, nothing shared in memory) carrying the cookie reads the primary
+    assert bio(app.test_client(), "alice", "alice", pin=pin_cookie(response)) == "new"
+    assert bio(app.test_client(), "alice", "alice") == "from-replica"
+
+
+def test_pin_belongs_to_the_writer(app):
+    response = write_bio(app.test_client(), "alice", "new")
+    assert bio(app.test_client(), "alice", "bob", pin=pin_cookie(response)) == "from-replica"
+
+
+def test_expired_or_forged_pin_reads_the_replica(app, monkeypatch):
+    pin = pin_cookie(write_bio(app.test_client(), "alice", "new"))
+    assert bio(app.test_client(), "alice", "alice", pin=pin) == "new"
+    forged = pin[:-2] + ("AA" if not pin.endswith("AA") else "BB")
+    assert bio(app.test_client(), "alice", "alice", pin=forged) == "from-replica"
+
+    now = TimestampSigner.get_timestamp
+    monkeypatch.setattr(TimestampSigner, "get_timestamp", lambda self: now(self) + 60)
+    assert bio(app.test_client(), "alice", "alice", pin=pin) == "from-replica"
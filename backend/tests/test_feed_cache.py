@@ -0,0 +1,34 @@
+import time
+from flask import Flask
+from app.cache import FeedCache
+
+
+def make_cache(**config):
+    app = Flask(__name__)
+    app.config.update(FEED_CACHE_SHARED_BACKEND="local", FEED_CACHE_TTL=0.2, **config)
+    cache = FeedCache()
+    cache.init_app(app)
+    return cache
+
+
+def test_pages_expire_from_the_shared_tier():
+    cache = make_cache()
+    key, page = cache.get(1, "all", None, 20)
+    assert page is None
+    cache.set(key, {"posts": []})
+
+    fresh = make_cache()  # ✅ Another worker: empty local tier, same kind of shared tier
+    fresh.shared = cache.shared
+    assert fresh.get(1, "all", None, 20) == (key, {"posts": []})
+
+    time.sleep(0.25)
+    cache.local.delete(key)
+    assert cache.get(1, "all", None, 20) == (key, None)
+
+
+def test_invalidate_changes_the_key():
+    cache = make_cache()
+    key, _ = cache.get(1, "all", None, 20)
+    cache.set(key, {"posts": []})
+    cache.invalidate(1)
+    assert cache.get(1, "all", None, 20)[1] is None
@@ -0,0 +1,28 @@
+from app import db, identity
+from app.identity import invalidate_identity, resolve_identity
+from app.models import User
+from conftest import make_user
+
+
+def test_invalidation_on_another_worker_reaches_this_one(make_app):
+    app = make_app(IDENTITY_CACHE_SHARED_BACKEND="local")
+    make_user(app, "alice")
+    assert resolve_identity("kc-alice").username == "alice"
+
+    User.query.filter_by(keycloak_id="kc-alice").delete()
+    db.session.commit()
+    assert resolve_identity("kc-alice") is not None  # ✅ Still cached here
+
+    identity._shared_versions.incr("identity_version:kc-alice")  # ✅ What invalidate_identity does on another worker
+    assert resolve_identity("kc-alice") is None
+
+
+def test_invalidate_without_a_shared_tier(make_app):
+    app = make_app(IDENTITY_CACHE_SHARED_BACKEND="")
+    user = make_user(app, "alice")
+    assert resolve_identity("kc-alice").username == "alice"
+
+    user.username = "alicia"
+    db.session.commit()
+    invalidate_identity("kc-alice")
+    assert resolve_identity("kc-alice").username == "alicia"
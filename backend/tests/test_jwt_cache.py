@@ -0,0 +1,14 @@
+from flask import Flask
+import app.utils as utils
+
+
+def test_cache_is_sized_from_config_and_returns_copies():
+    app = Flask(__name__)
+    app.config["JWT_CACHE_MAX_ENTRIES"] = 3
+    utils.init_app(app)
+    assert utils.VERIFIED_TOKEN_CACHE.maxsize == 3
+
+    utils.VERIFIED_TOKEN_CACHE.set(utils._token_cache_key("tok"), {"sub": "kc-1"}, ttl=60)
+    claims = utils.verify_jwt("tok")
+    claims["sub"] = "changed"
+    assert utils.verify_jwt("tok") == {"sub": "kc-1"}
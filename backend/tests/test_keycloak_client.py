@@ -0,0 +1,171 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import pytest
+from flask import Flask
+from app.keycloak_client import OPERATIONS, KeycloakClient, KeycloakUnavailable
+
+# -------------------------
+# 🔹 Local Keycloak Stub
+# -------------------------
+# A real HTTP server on 127.0.0.1 so the client's pool, timeouts and retries
+# run unchanged. Each (method, path) replays a script of (status, body, delay)
+# responses; the last one repeats.
+
+TOKEN_PATH = "/realms/test/protocol/openid-connect/token"
+USER_PATH = "/admin/realms/test/users/kc-1"
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    def _respond(self):
+        stub = self.server.stub
+        with stub.lock:
+            stub.calls.append((self.command, self.path))
+            script = stub.routes.get((self.command, self.path), [(404, None, 0)])
+            status, body, delay = script.pop(0) if len(script) > 1 else script[0]
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        time.sleep(delay)
+        payload = json.dumps(body).encode("utf-8") if body is not None else b""
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        except OSError:
+            pass  # ✅ The client gave up (read timeout)
+
+    do_GET = do_POST = do_PUT = do_DELETE = _respond
+
+    def log_message(self, *args):
+        pass
+
+
+class Stub:
+    def __init__(self):
+        self.routes = {}
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def script(self, method, path, *responses):
+        """Responses are (status, body) or (status, body, delay_seconds)."""
+        self.routes[(method, path)] = [(r + (0,))[:3] for r in responses]
+
+    def count(self, method, path):
+        return self.calls.count((method, path))
+
+
+@pytest.fixture
+def stub():
+    stub = Stub()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.daemon_threads = True
+    server.stub = stub
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    stub.url = f"http://127.0.0.1:{server.server_port}"
+    yield stub
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def client(stub):
+    app = Flask(__name__)
+    app.config.update(
+        KEYCLOAK_SERVER_URL=stub.url,
+        KEYCLOAK_REALM_NAME="test",
+        KEYCLOAK_MAX_RETRIES=2,
+        KEYCLOAK_RETRY_BACKOFF=0,
+        KEYCLOAK_BREAKER_THRESHOLD=3,
+        KEYCLOAK_BREAKER_COOLDOWN=0.2,
+    )
+    client = KeycloakClient()
+    client.init_app(app)
+    return client
+
+
+# -------------------------
+# Retries and timeouts
+# -------------------------
+def test_idempotent_operation_is_retried(client, stub):
+    stub.script("DELETE", USER_PATH, (503, None), (502, None), (204, None))
+    assert client.delete_user("kc-1", "token").status_code == 204
+    assert stub.count("DELETE", USER_PATH) == 3
+
+
+def test_non_idempotent_operation_is_not_retried(client, stub):
+    stub.script("POST", TOKEN_PATH, (503, None), (200, {"access_token": "a"}))
+    assert client.token({"grant_type": "password"}).status_code == 503
+    assert stub.count("POST", TOKEN_PATH) == 1
+
+
+def test_retries_stop_after_max_retries(client, stub):
+    stub.script("DELETE", USER_PATH, (503, None))
+    assert client.delete_user("kc-1", "token").status_code == 503  # ✅ Keycloak's own 5xx goes back to the caller
+    assert stub.count("DELETE", USER_PATH) == 3
+
+
+def test_read_timeout_is_retried_then_raises(client, stub, monkeypatch):
+    monkeypatch.setitem(OPERATIONS, "delete_user", {"timeout": (1, 0.1), "idempotent": True})
+    stub.script("DELETE", USER_PATH, (204, None, 0.5))
+    started = time.monotonic()
+    with pytest.raises(KeycloakUnavailable):
+        client.delete_user("kc-1", "token")
+    assert stub.count("DELETE", USER_PATH) == 3
+    assert time.monotonic() - started < 1.5  # ✅ Bounded by the read timeout, not the slow server
+
+
+# -------------------------
+# Circuit breaker
+# -------------------------
+def test_breaker_opens_then_goes_half_open(client, stub):
+    stub.script("POST", TOKEN_PATH, (503, None))
+    for _ in range(3):
+        client.token({})
+    assert client.breaker.is_open
+
+    # ✅ Open: fail fast without calling Keycloak
+    with pytest.raises(KeycloakUnavailable):
+        client.token({})
+    assert stub.count("POST", TOKEN_PATH) == 3
+
+    # ✅ Half-open after the cooldown: one trial call; it fails, so the next call is rejected again
+    time.sleep(0.25)
+    assert client.token({}).status_code == 503
+    with pytest.raises(KeycloakUnavailable):
+        client.token({})
+    assert stub.count("POST", TOKEN_PATH) == 4
+
+    # ✅ A successful trial closes the circuit
+    stub.script("POST", TOKEN_PATH, (200, {"access_token": "a"}))
+    time.sleep(0.25)
+    assert client.token({}).status_code == 200
+    assert not client.breaker.is_open
+    assert client.token({}).status_code == 200
+
+
+# -------------------------
+# Refresh coalescing
+# -------------------------
+def test_concurrent_refreshes_of_one_token_share_one_request(client, stub):
+    stub.script("POST", TOKEN_PATH, (200, {"access_token": "new"}, 0.3))
+    barrier = threading.Barrier(8)
+    results = []
+
+    def refresh():
+        barrier.wait()
+        results.append(client.refresh({"grant_type": "refresh_token", "refresh_token": "r1"}))
+
+    threads = [threading.Thread(target=refresh) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results == [(200, {"access_token": "new"})] * 8
+    assert stub.count("POST", TOKEN_PATH) == 1
+
+    client.refresh({"grant_type": "refresh_token", "refresh_token": "r2"})  # ✅ A different token is its own call
+    assert stub.count("POST", TOKEN_PATH) == 2
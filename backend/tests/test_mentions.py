@@ -0,0 +1,20 @@
+from datetime import datetime
+from app import db
+from app.mentions import record_mentions
+from app.models import Mention, Post
+from conftest import make_user
+
+
+def test_mentions_already_indexed_for_a_post_are_ignored(make_app):
+    app = make_app()
+    alice = make_user(app, "alice")
+    bob = make_user(app, "bob")
+    post = Post(content="hi @bob", user_id=alice.id)
+    db.session.add(post)
+    db.session.commit()
+
+    assert record_mentions(post.id, post.content, post.timestamp) == {bob.id}
+    assert record_mentions(post.id, "@bob @alice again", datetime.utcnow()) == {alice.id}  # ✅ No IntegrityError
+    db.session.commit()
+    mentions = {(m.mentioned_user_id, m.timestamp) for m in Mention.query.filter_by(post_id=post.id)}
+    assert (bob.id, post.timestamp) in mentions and len(mentions) == 2
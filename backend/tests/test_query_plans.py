@@ -0,0 +1,23 @@
+import pytest
+from sqlalchemy import text
+from app import db
+from app.query_plans import HOT_QUERIES, PLAN_PROBLEMS, check_query_plans, explain
+
+
+@pytest.fixture
+def migrated(make_app):
+    """An app whose schema was built by the migrations, like production."""
+    return make_app(migrate=True)
+
+
+@pytest.mark.parametrize("name", list(HOT_QUERIES))
+def test_hot_query_uses_an_index(migrated, name):
+    plan = explain(HOT_QUERIES[name]())
+    assert not [line for line in plan if PLAN_PROBLEMS["sqlite"].search(line)], "\n".join(plan)
+
+
+def test_check_catches_a_dropped_index(migrated):
+    db.session.execute(text("DROP INDEX ix_chat_conversation_id_id"))
+    results = check_query_plans()
+    assert results["messages"][1]
+    assert not results["inbox"][1]
@@ -0,0 +1,48 @@
+from app import db
+from app.models import Follow, Post, TimelineEntry, User
+from conftest import auth_header, make_user
+
+
+def test_self_follow_is_rejected_and_posting_still_works(make_app):
+    app = make_app()
+    alice = make_user(app, "alice")
+    client = app.test_client()
+
+    for body in ({"action": "follow"}, {"action": "unfollow"}):
+        response = client.post(f"/api/follow/{alice.id}", json=body, headers=auth_header("alice"))
+        assert response.status_code == 400
+    assert Follow.query.count() == 0
+    assert db.session.get(User, alice.id).follower_count == 0
+
+    response = client.post("/api/post", json={"content": "hello"}, headers=auth_header("alice"))
+    assert response.status_code == 201
+    entries = TimelineEntry.query.filter_by(user_id=alice.id).all()
+    assert [(entry.author_id, entry.post_id) for entry in entries] == [(alice.id, Post.query.one().id)]
+
+
+def test_follow_fans_out_to_followers_only(make_app):
+    app = make_app()
+    alice = make_user(app, "alice")
+    bob = make_user(app, "bob")
+    client = app.test_client()
+
+    assert client.post(f"/api/follow/{alice.id}", json={"action": "follow"}, headers=auth_header("bob")).status_code in (200, 201)
+    assert client.post("/api/post", json={"content": "hi"}, headers=auth_header("alice")).status_code == 201
+    assert {entry.user_id for entry in TimelineEntry.query.filter_by(post_id=Post.query.one().id)} == {alice.id, bob.id}
+
+
+def test_favorites_are_newest_post_first(make_app):
+    app = make_app(FEED_CACHE_ENABLED=False)
+    make_user(app, "alice")
+    make_user(app, "bob")
+    client = app.test_client()
+    for content in ("first", "second", "third"):
+        assert client.post("/api/post", json={"content": content}, headers=auth_header("alice")).status_code == 201
+    first, second, third = Post.query.order_by(Post.id).all()
+    for post in (third, first, second):  # ✅ Liked out of post order
+        assert client.post(f"/api/post/{post.id}/like", headers=auth_header("bob")).status_code == 201
+
+    page = client.get("/api/feed?feed_type=favorites&limit=2", headers=auth_header("bob")).json
+    assert [post["content"] for post in page["posts"]] == ["third", "second"]
+    page = client.get(f"/api/feed?feed_type=favorites&limit=2&cursor={page['next_cursor']}", headers=auth_header("bob")).json
+    assert [post["content"] for post in page["posts"]] == ["first"] and page["next_cursor"] is None